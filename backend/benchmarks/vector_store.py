@@ -0,0 +1,105 @@
+"""
+Compares the recall and query latency of the vector store backends on synthetic,
+clustered embeddings. Run from the repository root:
+
+    python -m backend.benchmarks.vector_store --num-vectors 20000
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+
+import chromadb
+import numpy as np
+
+from ..src.vector_store import ChromaVectorStore, NumpyVectorStore, VectorStore
+
+
+def make_embeddings(
+    num_vectors: int, dim: int, num_clusters: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Normalized embeddings scattered around `num_clusters` random topics."""
+    centers = rng.normal(size=(num_clusters, dim))
+    vectors = centers[rng.integers(num_clusters, size=num_vectors)]
+    vectors = vectors + rng.normal(scale=0.3, size=(num_vectors, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def benchmark(
+    name: str,
+    store: VectorStore,
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    ground_truth: list[set[str]],
+    k: int,
+) -> None:
+    ids = [str(i) for i in range(len(embeddings))]
+    start = time.perf_counter()
+    for batch_start in range(0, len(ids), 1000):
+        store.upsert(
+            ids=ids[batch_start : batch_start + 1000],
+            embeddings=embeddings[batch_start : batch_start + 1000].tolist(),
+        )
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, ground_truth):
+        start = time.perf_counter()
+        [result] = store.query(query_embeddings=[query.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(expected & {id for id, _ in result}) / k)
+    latencies_ms = np.array(latencies) * 1000
+    print(
+        f"{name:<16} recall@{k} {np.mean(recalls):.3f}  "
+        + f"p50 {np.percentile(latencies_ms, 50):7.2f}ms  "
+        + f"p99 {np.percentile(latencies_ms, 99):7.2f}ms  "
+        + f"build {build_seconds:6.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=64)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = make_embeddings(args.num_vectors, args.dim, 200, rng)
+    queries = make_embeddings(args.num_queries, args.dim, 200, rng)
+    # Exact nearest neighbours, by float32 brute force.
+    similarities = queries @ embeddings.T
+    ground_truth = [
+        {str(i) for i in np.argsort(-row)[: args.k]} for row in similarities
+    ]
+
+    collection = chromadb.EphemeralClient().create_collection(
+        name=f"benchmark-{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"}
+    )
+    stores: list[tuple[str, VectorStore]] = [("chroma", ChromaVectorStore(collection))]
+    with tempfile.TemporaryDirectory() as path:
+        for dtype in ["float16", "int8"]:
+            for index in ["flat", "ivf"]:
+                stores.append(
+                    (
+                        f"numpy {dtype} {index}",
+                        NumpyVectorStore(
+                            f"{path}/{dtype}-{index}",
+                            dtype=dtype,
+                            index=index,
+                            nlist=args.nlist,
+                            nprobe=args.nprobe,
+                        ),
+                    )
+                )
+        for name, store in stores:
+            benchmark(name, store, embeddings, queries, ground_truth, args.k)
+
+
+if __name__ == "__main__":
+    main()
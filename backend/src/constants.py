@@ -3,6 +3,95 @@ import os
 DEFAULT_TOKEN_EXPIRE_MINUTES = 15
 STATIC_DIR_PATH = os.path.abspath("static/")
 EXPIRE_JOBS_AFTER_DAYS = 7
+# Jobs marked inactive or deleted per statement, transaction and vector store call.
+EXPIRE_JOBS_CHUNK_SIZE = 1000
+
+# The scrapers and job expiry run in the worker (`python -m src.worker`). Set to
+# `true` to run them in the API process instead, e.g. for local development.
+RUN_BACKGROUND_TASKS_IN_API = (
+    os.getenv("RUN_BACKGROUND_TASKS_IN_API", "false").lower() == "true"
+)
+
+# Apply pending database migrations when the API or the worker starts. When unset,
+# they have to be applied with `python -m src.migrations` before starting them.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+# Only the process holding the scheduler lease runs the background tasks. The lease
+# is renewed every LEASE_HEARTBEAT_SECONDS and taken over by another process once
+# it has not been renewed for LEASE_TTL_SECONDS, e.g. after its holder crashed.
+SCHEDULER_LEASE_NAME = "scheduler"
+LEASE_TTL_SECONDS = int(os.getenv("LEASE_TTL_SECONDS", "60"))
+LEASE_HEARTBEAT_SECONDS = LEASE_TTL_SECONDS // 3
+
+# Threads running the scheduled background tasks. Every task run checks out its own
+# database connections (a scrape uses two), so the connection pool of the database
+# is sized for them plus the API requests. Checkouts waiting longer than
+# DB_POOL_CHECKOUT_WARN_SECONDS are logged.
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_SECONDS = 30
+DB_POOL_CHECKOUT_WARN_SECONDS = 1.0
+
+# Uploaded resumes are parsed in a pool of this many processes, and their keywords
+# are extracted by this many worker threads.
+RESUME_PDF_WORKERS = 2
+RESUME_KEYWORD_WORKERS = 2
+
+# Default and maximum number of jobs per page of job search results.
+SEARCH_DEFAULT_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Rank constant of the reciprocal rank fusion of lexical and semantic search
+# results. Larger values flatten the difference between the top ranks.
+RECIPROCAL_RANK_FUSION_K = 60
+# Number of jobs each leg of a hybrid search retrieves before the results are
+# fused. The same for every page, so that pages are slices of one fused ranking,
+# and search results end after this many jobs.
+SEARCH_MAX_CANDIDATES = 500
+# Threads running the semantic leg of hybrid searches next to the lexical one.
+SEARCH_VECTOR_WORKERS = int(os.getenv("SEARCH_VECTOR_WORKERS", "4"))
+
+# Number of recommended jobs materialized per user and role, and how long the
+# materialized recommendations of a user are served before they are recomputed.
+RECOMMENDATIONS_PER_ROLE = 100
+RECOMMENDATIONS_MAX_AGE_HOURS = 24
+
+# Weights of the signals combined by the `best_match` ranking of recommended jobs,
+# how fast the recency signal decays and how fast the experience fit drops for
+# every year of experience the user is missing.
+RANKING_WEIGHT_SIMILARITY = float(os.getenv("RANKING_WEIGHT_SIMILARITY", "0.55"))
+RANKING_WEIGHT_RECENCY = float(os.getenv("RANKING_WEIGHT_RECENCY", "0.15"))
+RANKING_WEIGHT_SALARY = float(os.getenv("RANKING_WEIGHT_SALARY", "0.1"))
+RANKING_WEIGHT_EXPERIENCE = float(os.getenv("RANKING_WEIGHT_EXPERIENCE", "0.2"))
+RANKING_RECENCY_HALF_LIFE_DAYS = 3
+RANKING_EXPERIENCE_GAP_SCALE_YEARS = 2
+
+# Backend storing the job embeddings: `chroma`, or `numpy` for an in-process
+# memory-mapped matrix of float16 or int8 embeddings stored at VECTOR_STORE_PATH,
+# searched by brute force (`flat`) or through an inverted file index (`ivf`) of
+# VECTOR_STORE_IVF_LISTS lists, VECTOR_STORE_IVF_PROBES of which are searched.
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+# Chroma server of the `chroma` backend, a local persistent client if unset.
+CHROMA_HOST = os.getenv("CHROMA_HOST", "")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH") or os.path.abspath("vectors/")
+VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float16")
+VECTOR_STORE_INDEX = os.getenv("VECTOR_STORE_INDEX", "flat")
+VECTOR_STORE_IVF_LISTS = int(os.getenv("VECTOR_STORE_IVF_LISTS", "64"))
+VECTOR_STORE_IVF_PROBES = int(os.getenv("VECTOR_STORE_IVF_PROBES", "16"))
+# The IVF index is only trained once every list would get this many entries.
+VECTOR_STORE_IVF_MIN_POINTS_PER_LIST = 39
+# Writes to the `numpy` store are appended to a log of the changed ids and
+# metadata, compacted into a snapshot once larger than the last one (and this).
+VECTOR_STORE_LOG_MIN_COMPACT_BYTES = 1 << 20
+
+# Job documents are embedded in batches of this size by a pool of this many threads.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))
+
+# Number of embedded jobs checked at once when backfilling their metadata.
+JOB_COLLECTION_BACKFILL_CHUNK_SIZE = 1000
 
 # Roles for which scrapers will scrape the job data. Please keep the list sorted alphabetically.
 ROLES = ["Software Engineer"]
@@ -30,3 +119,69 @@ LOCATION_GEO_IDS_FOR_LINKEDIN = {
 # Make sure that the string matches exactly with `source` in the scraper.
 # Please keep the list sorted alphabetically.
 SOURCES = ["LinkedIn"]
+
+# Adaptive per-host rate control of the scrapers' fetch engine.
+SCRAPER_INITIAL_CONCURRENCY_PER_HOST = 2
+SCRAPER_MAX_CONCURRENCY_PER_HOST = 8
+SCRAPER_MIN_DELAY_SECONDS = 0.5
+SCRAPER_MAX_DELAY_SECONDS = 60.0
+# A response slower than this multiple of the running average counts as a spike.
+SCRAPER_LATENCY_SPIKE_FACTOR = 3.0
+SCRAPER_MAX_FETCH_ATTEMPTS = 3
+
+# Pooled HTTP client shared by the scrapers.
+SCRAPER_HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+SCRAPER_HTTP_READ_TIMEOUT_SECONDS = 30.0
+SCRAPER_HTTP_MAX_RETRIES = 3
+SCRAPER_HTTP_BACKOFF_BASE_SECONDS = 0.5
+SCRAPER_HTTP_BACKOFF_MAX_SECONDS = 30.0
+# Number of hosts to keep connection pools for, and connections kept per host.
+SCRAPER_HTTP_POOL_HOSTS = 10
+SCRAPER_HTTP_POOL_MAXSIZE = SCRAPER_MAX_CONCURRENCY_PER_HOST
+
+# Number of URLs looked up per query when checking which listings are already known.
+KNOWN_URLS_LOOKUP_CHUNK_SIZE = 500
+
+# Number of jobs written per INSERT ... ON CONFLICT statement when saving scraped jobs.
+SAVE_JOBS_BATCH_SIZE = 500
+
+# Streaming scrape pipeline. Stages are connected by queues of this size, and the
+# persist and embed stages write at most `PIPELINE_BATCH_SIZE` jobs at once.
+PIPELINE_QUEUE_SIZE = 16
+PIPELINE_FETCH_WORKERS = SCRAPER_MAX_CONCURRENCY_PER_HOST
+PIPELINE_PARSE_WORKERS = 2
+PIPELINE_EXTRACT_WORKERS = 2
+PIPELINE_BATCH_SIZE = 20
+
+# Disk cache of LLM job extractions, keyed by the normalized page text.
+# Set LLM_CACHE_PATH to ":memory:" to keep the cache in memory instead.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or os.path.abspath("llm-cache.db")
+LLM_CACHE_TTL_SECONDS = 60 * 60 * 24 * 30
+LLM_CACHE_MAX_ENTRIES = 50_000
+
+# Job fields are first extracted with patterns, and the LLM is only called when
+# the patterns are less confident than this or descriptions should be reformatted.
+RULE_EXTRACTION_MIN_CONFIDENCE = 0.8
+REFORMAT_JOB_DESCRIPTIONS_WITH_LLM = False
+
+# Cache of generated cover letters, keyed by user, job, resume and prompt version.
+# Set COVER_LETTER_CACHE_PATH to ":memory:" to keep the cache in memory instead.
+COVER_LETTER_CACHE_PATH = os.getenv("COVER_LETTER_CACHE_PATH") or os.path.abspath(
+    "cover-letter-cache.db"
+)
+COVER_LETTER_CACHE_TTL_SECONDS = 60 * 60 * 24 * 7
+COVER_LETTER_CACHE_MAX_ENTRIES = 10_000
+
+# LLM model routing. Rate-limited models cool down for the Retry-After period
+# (or the default below) and models failing repeatedly are skipped for a while.
+LLM_DEFAULT_COOLDOWN_SECONDS = 30.0
+LLM_CIRCUIT_FAILURE_THRESHOLD = 3
+LLM_CIRCUIT_OPEN_SECONDS = 60.0
+
+# Number of job postings sent to the LLM in a single extraction request.
+LLM_EXTRACTION_BATCH_SIZE = 4
+
+# Estimated tokens of page data each model gets per job posting, also when several
+# postings are batched. Page data is stripped of boilerplate and trimmed to fit.
+LLM_PAGE_DATA_TOKEN_BUDGETS = {"llama-3.1-8b-instant": 3000}
+LLM_DEFAULT_PAGE_DATA_TOKEN_BUDGET = 4000
@@ -1,12 +1,98 @@
+import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+
+from .constants import (
+    DB_POOL_CHECKOUT_WARN_SECONDS,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+)
 
 load_dotenv()
 
+logger = logging.getLogger("uvicorn")
+
 DATABASE_URL = str(os.getenv("DATABASE_URL", "sqlite:///remote-radar.db"))
 # Needed for the admin dash on sqlite.
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# In-memory SQLite databases live in a single connection, which is not pooled.
+pool_args = (
+    {}
+    if DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
+    else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    }
+)
+engine = create_engine(DATABASE_URL, connect_args=connect_args, **pool_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def get_dialect_insert(db: Session):
+    """Returns the `insert` construct supporting ON CONFLICT for the dialect of `db`."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+class CheckoutWaits:
+    """Time the sessions of background tasks waited for a pooled connection."""
+
+    def __init__(self) -> None:
+        self.num_checkouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.num_checkouts += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self) -> dict[str, float]:
+        """Checkouts since startup, and their average and longest wait."""
+        with self._lock:
+            return {
+                "checkouts": self.num_checkouts,
+                "avg_wait_seconds": self.total_seconds / max(self.num_checkouts, 1),
+                "max_wait_seconds": self.max_seconds,
+            }
+
+
+checkout_waits = CheckoutWaits()
+
+
+@contextmanager
+def task_session(
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[Session]:
+    """
+    Fresh session of a single run of a background task, closed afterwards, so
+    concurrent runs never share a connection. The connection is checked out of
+    the pool right away to time how long the run waited for it.
+    """
+    db = session_factory()
+    try:
+        start_time = time.perf_counter()
+        db.connection()
+        wait_seconds = time.perf_counter() - start_time
+        checkout_waits.record(wait_seconds)
+        if wait_seconds > DB_POOL_CHECKOUT_WARN_SECONDS:
+            logger.warning(
+                f"Waited {wait_seconds:.2f} seconds for a database connection, "
+                + f"the pool might be too small: {checkout_waits.stats()}"
+            )
+        yield db
+    finally:
+        db.close()
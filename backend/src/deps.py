@@ -3,8 +3,7 @@ import os
 import traceback
 from typing import Annotated
 
-import chromadb
-import chromadb.config
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -12,8 +11,12 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
+from .constants import VECTOR_STORE_BACKEND
 from .llm.llm import LLM
 from .database import SessionLocal
+from .embedding import JobEmbedder
+from .resume_processing import ResumeProcessor
+from .vector_store import create_vector_store
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,10 +27,11 @@ SECRET_KEY = str(os.getenv("AUTH_SECRET_KEY", ""))
 ALGORITHM = str(os.getenv("AUTH_ALGORITHM", ""))
 
 llm = LLM()
-chromadb_client = chromadb.PersistentClient()
-job_collection = chromadb_client.get_or_create_collection(
-    name="job_collection", metadata={"hnsw:space": "cosine"}
-)
+embedding_function = DefaultEmbeddingFunction()
+vector_store = create_vector_store(VECTOR_STORE_BACKEND, embedding_function)
+job_embedder = JobEmbedder(embedding_function)
+# Resume keywords are embedded like the jobs, so they can be queried directly.
+resume_processor = ResumeProcessor(llm, embedding_function)
 
 
 def get_db():
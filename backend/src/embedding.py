@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .constants import EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS
+from .database import get_dialect_insert
+from .models import JobEmbedding
+from .vector_store import EmbeddingFunction
+
+logger = logging.getLogger("uvicorn")
+
+
+def content_hash(document: str) -> str:
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class JobEmbedder:
+    """
+    Embeds job documents in batches of `batch_size` on a pool of `workers`
+    threads. Embeddings are stored in the job_embeddings table keyed by the hash
+    of the document, so unchanged documents are never embedded again.
+    """
+
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction,
+        workers: int = EMBEDDING_WORKERS,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+    ) -> None:
+        self.embedding_function = embedding_function
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="embedding"
+        )
+
+    def _embed_batch(self, documents: list[str]) -> np.ndarray:
+        start_time = time.monotonic()
+        embeddings = np.asarray(self.embedding_function(documents), dtype=np.float32)
+        seconds = time.monotonic() - start_time
+        logger.info(
+            f"Embedded {len(documents)} job documents in {seconds:.2f} seconds "
+            + f"({len(documents) / max(seconds, 1e-6):.1f} documents/s)"
+        )
+        return embeddings
+
+    def embed(
+        self, db: Session, documents: list[str]
+    ) -> tuple[list[str], list[list[float]]]:
+        """
+        Hashes and embeddings of `documents`, reusing the stored embeddings and
+        storing the new ones through `db`.
+        """
+        hashes = [content_hash(document) for document in documents]
+        embeddings: dict[str, np.ndarray] = {
+            hash: np.frombuffer(embedding, np.float32)
+            for hash, embedding in db.query(
+                JobEmbedding.content_hash, JobEmbedding.embedding
+            )
+            .filter(JobEmbedding.content_hash.in_(set(hashes)))
+            .tuples()
+        }
+        missing = {
+            hash: document
+            for hash, document in zip(hashes, documents)
+            if hash not in embeddings
+        }
+        missing_hashes = list(missing)
+        batches = {
+            self._executor.submit(
+                self._embed_batch,
+                [missing[hash] for hash in missing_hashes[i : i + self.batch_size]],
+            ): missing_hashes[i : i + self.batch_size]
+            for i in range(0, len(missing_hashes), self.batch_size)
+        }
+        insert = get_dialect_insert(db)
+        try:
+            for batch in as_completed(batches):
+                rows = []
+                for hash, embedding in zip(batches[batch], batch.result()):
+                    embeddings[hash] = embedding
+                    rows.append(
+                        {"content_hash": hash, "embedding": embedding.tobytes()}
+                    )
+                db.execute(
+                    insert(JobEmbedding)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=[JobEmbedding.content_hash])
+                )
+            db.commit()
+        except Exception:
+            for batch in batches:
+                batch.cancel()
+            db.rollback()
+            raise
+        if missing:
+            logger.info(
+                f"Embedded {len(missing)} of {len(documents)} job documents, "
+                + "the others were unchanged"
+            )
+        return hashes, [embeddings[hash].tolist() for hash in hashes]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+import functools
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import Any, Callable
+
+from sqlalchemy import DateTime, func, or_, update
+from sqlalchemy.engine import Connection, Dialect, Engine
+from sqlalchemy.orm import Session
+
+from .constants import LEASE_TTL_SECONDS
+from .database import get_dialect_insert
+from .models import Lease
+
+logger = logging.getLogger("uvicorn")
+
+
+def database_utc_now(dialect: Dialect, delta: timedelta = timedelta()) -> Any:
+    """
+    SQL expression of the current UTC time of the database plus `delta`, naive
+    as the lease times are stored without a time zone.
+    """
+    if dialect.name == "postgresql":
+        return func.timezone("utc", func.now(), type_=DateTime) + delta
+    # In the format SQLAlchemy stores SQLite datetimes in, to the millisecond.
+    return func.strftime(
+        "%Y-%m-%d %H:%M:%f", "now", f"+{delta.total_seconds()} seconds"
+    )
+
+
+class LeaseHolder:
+    """
+    Holder of the lease named `name` in the `leases` table of `bind`.
+
+    `acquire` takes the lease if it is free or expired and renews it if it is
+    already held, in a single conditional UPDATE, so at most one process holds
+    the lease at a time. Calling `acquire` every few seconds (a heartbeat) keeps
+    the lease, and once the holder stops renewing it, e.g. because its process
+    died, the next heartbeat of another process takes the lease over. Expiry is
+    decided by the clock of the database, so the clocks of the processes may
+    differ.
+    """
+
+    def __init__(
+        self,
+        bind: Engine | Connection,
+        name: str,
+        ttl_seconds: float = LEASE_TTL_SECONDS,
+    ) -> None:
+        self.bind = bind
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:" + uuid.uuid4().hex[:8]
+        self.is_held = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Take or renew the lease. Whether this process holds the lease now."""
+        with self._lock:
+            dialect = self.bind.dialect
+            now = database_utc_now(dialect)
+            try:
+                with Session(self.bind) as db:
+                    insert = get_dialect_insert(db)
+                    db.execute(
+                        insert(Lease)
+                        .values(name=self.name, holder=self.holder, expires_at=now)
+                        .on_conflict_do_nothing(index_elements=["name"])
+                    )
+                    result: Any = db.execute(
+                        update(Lease)
+                        .where(
+                            Lease.name == self.name,
+                            or_(Lease.holder == self.holder, Lease.expires_at <= now),
+                        )
+                        .values(
+                            holder=self.holder,
+                            expires_at=database_utc_now(dialect, self.ttl),
+                        )
+                    )
+                    db.commit()
+                    is_held = result.rowcount == 1
+            except Exception as e:
+                # The lease might have expired meanwhile, so don't assume it is held.
+                logger.error(f"Error renewing the {self.name} lease: {e}")
+                is_held = False
+            if is_held != self.is_held:
+                logger.info(
+                    f"{'Acquired' if is_held else 'Lost'} the {self.name} lease "
+                    + f"as {self.holder}"
+                )
+            self.is_held = is_held
+            return is_held
+
+    def release(self) -> None:
+        """Let another process take the lease right away, if it is held."""
+        with self._lock:
+            with Session(self.bind) as db:
+                db.execute(
+                    update(Lease)
+                    .where(Lease.name == self.name, Lease.holder == self.holder)
+                    .values(expires_at=database_utc_now(self.bind.dialect))
+                )
+                db.commit()
+            self.is_held = False
+
+    def guard(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """`func`, run only while this process holds the lease."""
+
+        @functools.wraps(func)
+        def guarded(*args: Any, **kwargs: Any) -> Any:
+            if not self.acquire():
+                logger.info(f"Skipping {func.__qualname__}, not holding the lease")
+                return None
+            return func(*args, **kwargs)
+
+        return guarded
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from ..constants import (
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SECONDS,
+)
+
+# Parts of a scraped page that change between scrapes of the same posting
+# (e.g. "Reposted 3 days ago", "Over 200 applicants").
+VOLATILE_PAGE_TEXT_PATTERN = re.compile(
+    r"\b(?:reposted\s+)?\d+\s+(?:minute|hour|day|week|month|year)s?\s+ago\b"
+    r"|\b(?:over\s+)?\d+\s+applicants?\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_page_data(page_data: str) -> str:
+    """Drop volatile text and collapse whitespace so reposts hash the same."""
+    return " ".join(VOLATILE_PAGE_TEXT_PATTERN.sub(" ", page_data).split())
+
+
+def template_version(template: str) -> str:
+    """Short hash of a prompt template, so editing the prompt invalidates old entries."""
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+
+class LLMCache:
+    """
+    Disk-backed cache of LLM responses, stored in a small SQLite file.
+
+    Entries expire after `ttl_seconds` and the least recently used entries are
+    evicted once there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used_at "
+                "ON llm_cache (last_used_at)"
+            )
+
+    @staticmethod
+    def make_key(page_data: str, source: str, template: str, model_name: str) -> str:
+        return hashlib.sha256(
+            "\0".join(
+                [
+                    template_version(template),
+                    model_name,
+                    source,
+                    normalize_page_data(page_data),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, keys: list[str]) -> Optional[dict]:
+        """Returns the value of the first of `keys` that is cached and not expired."""
+        now = time.time()
+        with self._lock, self._connection:
+            for key in keys:
+                row = self._connection.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[1] < now - self.ttl_seconds:
+                    continue
+                self._connection.execute(
+                    "UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key)
+                )
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._connection.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            self._connection.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            (size,) = self._connection.execute(
+                "SELECT COUNT(*) FROM llm_cache"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "size": size}
@@ -0,0 +1,82 @@
+import re
+from typing import NamedTuple
+
+# Text LinkedIn (and most job boards) add around every posting that tells the
+# LLM nothing about the job itself.
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [
+        r"\bshow (?:more|less)\b",
+        r"\breport this job\b",
+        r"\bsee who \S.{0,80}? has hired for this role\b",
+        r"\breferrals increase your chances of interviewing at .{0,80}?(?:\.|$)",
+        r"\bget notified about new .{0,80}? jobs in .{0,80}?(?:\.|$)",
+        r"\bsign in to .{0,80}?(?:\.|$)",
+        r"\bbe among the first \d+ applicants\b",
+    ]
+]
+# Sentences of equal employment opportunity disclaimers are dropped entirely.
+DISCLAIMER_PATTERN = re.compile(
+    r"\bequal (?:employment )?opportunity\b"
+    r"|\bwithout regard to (?:race|color|religion|sex|gender|age|national origin)\b"
+    r"|\breasonable accommodations?\b",
+    re.IGNORECASE,
+)
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+")
+# Rough stand-in for a BPE tokenizer: words split into pieces of up to four
+# characters plus every punctuation mark, which tracks the Llama tokenizer
+# closely enough for budgeting.
+TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+class CompactionResult(NamedTuple):
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+
+def estimate_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def compact_page_data(page_data: str, token_budget: int) -> CompactionResult:
+    """
+    Strip boilerplate, disclaimers and repeated sentences from scraped page data
+    and trim it to at most `token_budget` (estimated) tokens at the last sentence
+    that fits, or at the last whole word when not even the first sentence does.
+    """
+    tokens_before = estimate_tokens(page_data)
+    text = page_data
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub(" ", text)
+
+    seen_sentences: set[str] = set()
+    sentences: list[str] = []
+    tokens = 0
+    for sentence in SENTENCE_BOUNDARY_PATTERN.split(" ".join(text.split())):
+        normalized_sentence = sentence.lower()
+        if (
+            not sentence
+            or normalized_sentence in seen_sentences
+            or DISCLAIMER_PATTERN.search(sentence)
+        ):
+            continue
+        seen_sentences.add(normalized_sentence)
+        sentence_tokens = estimate_tokens(sentence)
+        if tokens + sentence_tokens > token_budget:
+            if not sentences:
+                words = []
+                for word in sentence.split(" "):
+                    word_tokens = estimate_tokens(word)
+                    if tokens + word_tokens > token_budget:
+                        break
+                    words.append(word)
+                    tokens += word_tokens
+                sentences.append(" ".join(words))
+            break
+        sentences.append(sentence)
+        tokens += sentence_tokens
+
+    return CompactionResult(
+        text=" ".join(sentences), tokens_before=tokens_before, tokens_after=tokens
+    )
@@ -1,8 +1,12 @@
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import threading
 import traceback
-from typing import Optional
+from collections import Counter
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 from langchain_core.output_parsers import (
     PydanticOutputParser,
@@ -10,13 +14,25 @@ from langchain_core.output_parsers import (
     StrOutputParser,
 )
 from langchain_core.prompts import PromptTemplate
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_groq import ChatGroq
-from groq import RateLimitError
 from pydantic import BaseModel, Field
 
-from ..constants import ROLES
+from ..constants import (
+    COVER_LETTER_CACHE_MAX_ENTRIES,
+    COVER_LETTER_CACHE_PATH,
+    COVER_LETTER_CACHE_TTL_SECONDS,
+    LLM_DEFAULT_PAGE_DATA_TOKEN_BUDGET,
+    LLM_PAGE_DATA_TOKEN_BUDGETS,
+    ROLES,
+)
 from ..scrapers.levels_fyi import scrape_levels_fyi
+from .cache import LLMCache, template_version
+from .compaction import compact_page_data, estimate_tokens
 from .prompts import *
+from .router import AllModelsUnavailableError, ModelRouter
+from .single_flight import SingleFlight
 
 load_dotenv()
 
@@ -46,18 +62,89 @@ class Job(BaseModel):
     remote: bool = Field(description="Is the job remotely available")
 
 
+class JobWithUrl(Job):
+    url: str = Field(description="URL of the job posting the details belong to")
+
+
+class JobBatch(BaseModel):
+    jobs: list[JobWithUrl] = Field(description="Details of every job posting")
+
+
 class LLM:
     """Class to interact with the LLM API."""
 
-    def __init__(self) -> None:
-        self.llms = [
-            ChatGroq(  # type: ignore[call-arg]
-                temperature=0,
-                groq_api_key=GROQ_API_KEY,
-                model_name=model_name,
+    def __init__(
+        self,
+        extraction_cache: Optional[LLMCache] = None,
+        cover_letter_cache: Optional[LLMCache] = None,
+    ) -> None:
+        self.router = ModelRouter(
+            {
+                model_name: ChatGroq(  # type: ignore[call-arg]
+                    temperature=0,
+                    groq_api_key=GROQ_API_KEY,
+                    model_name=model_name,
+                    # Rate limits and failures are handled by the router, which
+                    # moves on to the next model instead of retrying this one.
+                    max_retries=0,
+                )
+                for model_name in LLM_MODELS
+            }
+        )
+        self.extraction_cache = extraction_cache or LLMCache()
+        self.cover_letter_cache = cover_letter_cache or LLMCache(
+            path=COVER_LETTER_CACHE_PATH,
+            ttl_seconds=COVER_LETTER_CACHE_TTL_SECONDS,
+            max_entries=COVER_LETTER_CACHE_MAX_ENTRIES,
+        )
+        self.cover_letter_flights = SingleFlight()
+        self.token_usage: Counter[str] = Counter()
+        self._token_usage_lock = threading.Lock()
+
+    def compact_pages(
+        self, pages: dict[str, str], model_name: str, template: str
+    ) -> dict[str, str]:
+        """
+        Compact the page data of every page to the page data budget of the model
+        and record the tokens sent and saved. Every page gets the full budget, so
+        batching postings does not cut them shorter.
+        """
+        page_budget = LLM_PAGE_DATA_TOKEN_BUDGETS.get(
+            model_name, LLM_DEFAULT_PAGE_DATA_TOKEN_BUDGET
+        )
+        compacted_pages = {}
+        tokens_sent = estimate_tokens(template)
+        tokens_saved = 0
+        for key, page_data in pages.items():
+            result = compact_page_data(page_data, page_budget)
+            compacted_pages[key] = result.text
+            tokens_sent += result.tokens_after
+            tokens_saved += result.tokens_before - result.tokens_after
+        with self._token_usage_lock:
+            self.token_usage["calls"] += 1
+            self.token_usage["tokens_sent"] += tokens_sent
+            self.token_usage["tokens_saved"] += tokens_saved
+        logger.debug(
+            f"Sending ~{tokens_sent} tokens to {model_name}, "
+            + f"saved ~{tokens_saved} tokens by compacting {len(pages)} page(s)"
+        )
+        return compacted_pages
+
+    def token_stats(self) -> dict[str, int]:
+        with self._token_usage_lock:
+            return dict(self.token_usage)
+
+    def get_extraction_cache_keys(self, page_data: str, source: str) -> dict[str, str]:
+        """
+        Extraction cache key of the page for every model. Batched and single
+        extractions share entries, both are keyed on the single posting template.
+        """
+        return {
+            model_name: LLMCache.make_key(
+                page_data, source, EXTRACT_JOB_FROM_PAGE_DATA_TEMPLATE, model_name
             )
             for model_name in LLM_MODELS
-        ]
+        }
 
     def extract_job_from_page_data(
         self,
@@ -65,38 +152,110 @@ class LLM:
         source: str,
     ) -> dict[str, str]:
         """Extract job details from the url."""
-        for idx, llm in enumerate(self.llms):
-            try:
-                chain = (
-                    PromptTemplate(
-                        template=EXTRACT_JOB_FROM_PAGE_DATA_TEMPLATE,
-                        input_variables=["page_data", "source"],
-                    )
-                    | llm
-                    | PydanticOutputParser(pydantic_object=Job)
-                )
-                response: Job = chain.invoke(
-                    {
-                        "page_data": page_data,
-                        "source": source,
+        cache_keys = self.get_extraction_cache_keys(page_data, source)
+        cached_response = self.extraction_cache.get(list(cache_keys.values()))
+        if cached_response is not None:
+            return cached_response
+        return self._extract_job_from_page_data(page_data, source, cache_keys)
+
+    def _extract_job_from_page_data(
+        self, page_data: str, source: str, cache_keys: dict[str, str]
+    ) -> dict[str, str]:
+        try:
+            model_name, response = self.router.invoke(
+                lambda model_name, llm: RunnableLambda(
+                    lambda inputs: {
+                        "page_data": self.compact_pages(
+                            {"page_data": inputs["page_data"]},
+                            model_name,
+                            EXTRACT_JOB_FROM_PAGE_DATA_TEMPLATE,
+                        )["page_data"],
+                        "source": inputs["source"],
                     }
                 )
-                return response.model_dump()
-            except RateLimitError as e:
-                if idx == len(self.llms) - 1:
-                    logger.error(
-                        f"Rate limit hit for all models: {traceback.format_exc()}"
+                | PromptTemplate(
+                    template=EXTRACT_JOB_FROM_PAGE_DATA_TEMPLATE,
+                    input_variables=["page_data", "source"],
+                )
+                | llm
+                | PydanticOutputParser(pydantic_object=Job),
+                {
+                    "page_data": page_data,
+                    "source": source,
+                },
+            )
+        except AllModelsUnavailableError:
+            logger.error(f"Rate limit hit for all models: {traceback.format_exc()}")
+            return {}
+        except Exception:
+            logger.error(f"Error extracting job details: {traceback.format_exc()}")
+            return {}
+        self.extraction_cache.set(cache_keys[model_name], response.model_dump())
+        return response.model_dump()
+
+    def extract_jobs_from_page_data_batch(
+        self, pages: dict[str, str], source: str
+    ) -> dict[str, dict]:
+        """
+        Extract job details of several postings (url → page data) with a single
+        request. Postings missing from the response, or all of them when the
+        response cannot be parsed, are extracted one request at a time instead.
+        """
+        results: dict[str, dict] = {}
+        cache_keys = {
+            url: self.get_extraction_cache_keys(page_data, source)
+            for url, page_data in pages.items()
+        }
+        for url in pages:
+            cached_response = self.extraction_cache.get(list(cache_keys[url].values()))
+            if cached_response is not None:
+                results[url] = cached_response
+        pending_pages = {
+            url: page_data for url, page_data in pages.items() if url not in results
+        }
+        if len(pending_pages) > 1:
+            try:
+                model_name, response = self.router.invoke(
+                    lambda model_name, llm: RunnableLambda(
+                        lambda inputs: {
+                            "postings": "\n".join(
+                                f"### POSTING {url}\n{page_data}"
+                                for url, page_data in self.compact_pages(
+                                    inputs["postings"],
+                                    model_name,
+                                    EXTRACT_JOBS_FROM_PAGE_DATA_BATCH_TEMPLATE,
+                                ).items()
+                            ),
+                            "source": inputs["source"],
+                        }
                     )
-                else:
-                    logger.warning(
-                        f"Rate limit hit for {LLM_MODELS[idx]}: {traceback.format_exc()}"
+                    | PromptTemplate(
+                        template=EXTRACT_JOBS_FROM_PAGE_DATA_BATCH_TEMPLATE,
+                        input_variables=["postings", "source"],
                     )
-                    logger.warning(f"Falling back to {LLM_MODELS[idx + 1]}")
-                continue
+                    | llm
+                    | PydanticOutputParser(pydantic_object=JobBatch),
+                    {"postings": pending_pages, "source": source},
+                )
+                for job in response.jobs:
+                    if job.url in pending_pages and job.url not in results:
+                        results[job.url] = job.model_dump(exclude={"url"})
+                        self.extraction_cache.set(
+                            cache_keys[job.url][model_name], results[job.url]
+                        )
+            except AllModelsUnavailableError:
+                logger.error(f"Rate limit hit for all models: {traceback.format_exc()}")
+                return results
             except Exception:
-                logger.error(f"Error extracting job details: {traceback.format_exc()}")
-                return {}
-        return {}
+                logger.warning(
+                    f"Error extracting a batch of job details, extracting them one by one: {traceback.format_exc()}"
+                )
+        for url, page_data in pending_pages.items():
+            if url not in results:
+                results[url] = self._extract_job_from_page_data(
+                    page_data, source, cache_keys[url]
+                )
+        return results
 
     def extract_skills_from_resume(
         self, resume_data: str, preferred_roles: Optional[list[str]]
@@ -104,76 +263,147 @@ class LLM:
         """Extract skills from resume"""
         if preferred_roles is None or len(preferred_roles) == 0:
             return {}
-        for idx, llm in enumerate(self.llms):
-            try:
-                return (
-                    PromptTemplate(
-                        template=EXTRACT_KEYWORDS_FROM_RESUME_TEMPLATE,
-                        input_variables=["resume_data", "roles"],
-                    )
-                    | llm
-                    | JsonOutputParser()
-                ).invoke(
-                    {"resume_data": resume_data, "roles": "\n".join(preferred_roles)}
+        try:
+            _, response = self.router.invoke(
+                lambda model_name, llm: PromptTemplate(
+                    template=EXTRACT_KEYWORDS_FROM_RESUME_TEMPLATE,
+                    input_variables=["resume_data", "roles"],
                 )
-            except RateLimitError as e:
-                if idx == len(self.llms) - 1:
-                    logger.error(
-                        f"Rate limit hit for all models: {traceback.format_exc()}"
-                    )
-                else:
-                    logger.warning(
-                        f"Rate limit hit for {LLM_MODELS[idx]}: {traceback.format_exc()}"
-                    )
-                    logger.warning(f"Falling back to {LLM_MODELS[idx + 1]}")
-                continue
-            except Exception:
-                logger.error(
-                    f"Error extracting keywords from user resume data: {traceback.format_exc()}"
-                )
-                return {}
-        return {}
+                | llm
+                | JsonOutputParser(),
+                {"resume_data": resume_data, "roles": "\n".join(preferred_roles)},
+            )
+            return response
+        except AllModelsUnavailableError:
+            logger.error(f"Rate limit hit for all models: {traceback.format_exc()}")
+            return {}
+        except Exception:
+            logger.error(
+                f"Error extracting keywords from user resume data: {traceback.format_exc()}"
+            )
+            return {}
+
+    def build_cover_letter_chain(self, model_name: str, llm: BaseChatModel) -> Runnable:
+        return (
+            PromptTemplate(
+                template=GENERATE_COVER_LETTER_TEMPLATE,
+                input_variables=[
+                    "resume_data",
+                    "job_description",
+                    "name",
+                    "company",
+                ],
+            )
+            | llm
+            | StrOutputParser()
+        )
 
     def generate_cover_letter(
         self, resume_data: str, job_description: str, company: str, name: str
     ):
-        for idx, llm in enumerate(self.llms):
-            try:
-                return (
-                    PromptTemplate(
-                        template=GENERATE_COVER_LETTER_TEMPLATE,
-                        input_variables=[
-                            "resume_data",
-                            "job_description",
-                            "name",
-                            "company",
-                        ],
-                    )
-                    | llm
-                    | StrOutputParser()
-                ).invoke(
-                    {
-                        "resume_data": resume_data,
-                        "job_description": job_description,
-                        "name": name,
-                        "company": company,
-                    }
-                )
-            except RateLimitError as e:
-                if idx == len(self.llms) - 1:
-                    logger.error(
-                        f"Rate limit hit for all models: {traceback.format_exc()}"
-                    )
-                    raise e
-                else:
-                    logger.warning(
-                        f"Rate limit hit for {LLM_MODELS[idx]}: {traceback.format_exc()}"
-                    )
-                    logger.warning(f"Falling back to {LLM_MODELS[idx + 1]}")
-                continue
-            except Exception:
-                logger.error(
-                    f"Error extracting keywords from user resume data: {traceback.format_exc()}"
-                )
-                return {}
-        return {}
+        try:
+            _, response = self.router.invoke(
+                self.build_cover_letter_chain,
+                {
+                    "resume_data": resume_data,
+                    "job_description": job_description,
+                    "name": name,
+                    "company": company,
+                },
+            )
+            return response
+        except AllModelsUnavailableError:
+            logger.error(f"Rate limit hit for all models: {traceback.format_exc()}")
+            raise
+        except Exception:
+            logger.error(
+                f"Error extracting keywords from user resume data: {traceback.format_exc()}"
+            )
+            return {}
+
+    def stream_cover_letter(
+        self, resume_data: str, job_description: str, company: str, name: str
+    ) -> AsyncIterator[str]:
+        """Stream the cover letter as it is generated, falling back between models."""
+        return self.router.astream(
+            self.build_cover_letter_chain,
+            {
+                "resume_data": resume_data,
+                "job_description": job_description,
+                "name": name,
+                "company": company,
+            },
+        )
+
+    @staticmethod
+    def get_cover_letter_cache_key(email: str, job_url: str, resume_text: str) -> str:
+        return hashlib.sha256(
+            "\0".join(
+                [
+                    template_version(GENERATE_COVER_LETTER_TEMPLATE),
+                    email,
+                    job_url,
+                    hashlib.sha256(resume_text.encode("utf-8")).hexdigest(),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def get_or_generate_cover_letter(
+        self, cache_key: str, regenerate: bool = False, **inputs: str
+    ) -> str:
+        """
+        Cover letter from the cache, or generated once for all concurrent requests
+        with the same `cache_key`. `regenerate` skips the cached letter.
+        """
+        if not regenerate:
+            cached_response = self.cover_letter_cache.get([cache_key])
+            if cached_response is not None:
+                return cached_response["cover_letter"]
+
+        def generate() -> str:
+            cover_letter = self.generate_cover_letter(**inputs)
+            if cover_letter:
+                self.cover_letter_cache.set(cache_key, {"cover_letter": cover_letter})
+            return cover_letter
+
+        return self.cover_letter_flights.do(cache_key, generate)
+
+    async def stream_or_get_cover_letter(
+        self, cache_key: str, regenerate: bool = False, **inputs: str
+    ) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of `get_or_generate_cover_letter`. Cached letters and
+        letters generated for a concurrent request come in a single chunk.
+        """
+        if not regenerate:
+            # The cache is in SQLite, so it is read and written off the event loop.
+            cached_response = await asyncio.to_thread(
+                self.cover_letter_cache.get, [cache_key]
+            )
+            if cached_response is not None:
+                yield cached_response["cover_letter"]
+                return
+        future, leader = self.cover_letter_flights.claim(cache_key)
+        if not leader:
+            yield await asyncio.wrap_future(future)
+            return
+        chunks = []
+        try:
+            async for chunk in self.stream_cover_letter(**inputs):
+                chunks.append(chunk)
+                yield chunk
+        except BaseException as e:
+            self.cover_letter_flights.resolve(
+                cache_key,
+                error=(
+                    e
+                    if isinstance(e, Exception)
+                    else RuntimeError("Cover letter generation was cancelled")
+                ),
+            )
+            raise
+        cover_letter = "".join(chunks)
+        await asyncio.to_thread(
+            self.cover_letter_cache.set, cache_key, {"cover_letter": cover_letter}
+        )
+        self.cover_letter_flights.resolve(cache_key, cover_letter)
@@ -14,6 +14,24 @@ Modify the `description` as an HTML document by adding <h1> tags, A LOT OF <b>,
 ### DO NOT OUTPUT ANYTHING APART FROM JSON OBJECT
 """
 
+EXTRACT_JOBS_FROM_PAGE_DATA_BATCH_TEMPLATE = """
+### SCRAPED TEXT OF JOB POSTINGS FROM WEBSITE:
+{postings}
+### INSTRUCTION:
+The scraped text above contains several job listing pages from {source}, each one starting with a `### POSTING <url>` line.
+Your job is to extract from every job posting the following keys and values:
+`url`, `description`, `required_experience`, `salary_min`, `salary_max`, `salary_currency`, `salary_from_levels_fyi`, `remote`.
+`url` must be copied exactly from the `### POSTING` line of the job posting.
+`description` should clearly communicate everything about the job, responsibilities, required qualifications, preferred qualifications and necessary disclaimers.
+Modify the `description` as an HTML document by adding <h1> tags, A LOT OF <b>, <em> and <p> tags, and <ul> and <li> tags for listing but DO NOT CHANGE THE TEXT CONTENT.
+`salary_from_levels_fyi` should be false.
+`required_experience` is the minimum number of years of experience required for the job.
+`remote` is a Boolean value representing whether the job is available remotely.
+Present them in JSON format as an object with a single key `jobs` holding a list with one object per job posting, in the same order as the job postings.
+### VALID JSON (NO PREAMBLE)
+### DO NOT OUTPUT ANYTHING APART FROM JSON OBJECT
+"""
+
 
 EXTRACT_KEYWORDS_FROM_RESUME_TEMPLATE = """
 ### USER RESUME DATA:
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable
+
+from groq import APIError, RateLimitError
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+
+from ..constants import (
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_OPEN_SECONDS,
+    LLM_DEFAULT_COOLDOWN_SECONDS,
+)
+
+logger = logging.getLogger("uvicorn")
+
+
+class AllModelsUnavailableError(Exception):
+    """Raised when every model is cooling down, has an open circuit or just failed."""
+
+
+def _retry_after_seconds(error: RateLimitError) -> float:
+    try:
+        return float(error.response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return LLM_DEFAULT_COOLDOWN_SECONDS
+
+
+class ModelHealth:
+    """Health and usage stats of a single model."""
+
+    def __init__(self) -> None:
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limits = 0
+        self.total_latency = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def stats(self, now: float) -> dict[str, Any]:
+        return {
+            "available": self.is_available(now),
+            "cooldown_seconds_left": max(0.0, round(self.cooldown_until - now, 2)),
+            "successes": self.successes,
+            "failures": self.failures,
+            "rate_limits": self.rate_limits,
+            "avg_latency_seconds": (
+                round(self.total_latency / self.successes, 3)
+                if self.successes
+                else None
+            ),
+        }
+
+
+class ModelRouter:
+    """
+    Routes LLM calls to the first healthy model, in order of preference.
+
+    A rate-limit response puts the model in cooldown until its Retry-After
+    deadline, and `LLM_CIRCUIT_FAILURE_THRESHOLD` consecutive API failures open
+    its circuit for `LLM_CIRCUIT_OPEN_SECONDS`. Unhealthy models are skipped
+    without a round trip. Once the deadline passes the model gets calls again,
+    and a single failure re-opens the circuit until a call succeeds.
+    """
+
+    def __init__(self, models: dict[str, BaseChatModel]) -> None:
+        self.models = models
+        self.health = {model_name: ModelHealth() for model_name in models}
+        self._lock = threading.Lock()
+
+    def available_models(self) -> list[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                model_name
+                for model_name, health in self.health.items()
+                if health.is_available(now)
+            ]
+
+    def invoke(
+        self,
+        build_chain: Callable[[str, BaseChatModel], Runnable],
+        inputs: dict[str, Any],
+    ) -> tuple[str, Any]:
+        """
+        Invoke the chain built around the first healthy model, moving on to the
+        next one on rate limits and API failures.
+        Returns the name of the model that answered along with its output.
+        """
+        for model_name in self.available_models():
+            start_time = time.monotonic()
+            try:
+                result = build_chain(model_name, self.models[model_name]).invoke(inputs)
+            except RateLimitError as e:
+                self.record_rate_limit(model_name, _retry_after_seconds(e))
+                continue
+            except APIError as e:
+                self.record_failure(model_name)
+                logger.warning(f"Call to {model_name} failed: {e}")
+                continue
+            self.record_success(model_name, time.monotonic() - start_time)
+            return model_name, result
+        raise AllModelsUnavailableError("No LLM model is currently available")
+
+    async def astream(
+        self,
+        build_chain: Callable[[str, BaseChatModel], Runnable],
+        inputs: dict[str, Any],
+    ) -> AsyncIterator[Any]:
+        """
+        Stream the output chunks of the chain built around the first healthy
+        model. Models failing before their first chunk are skipped like in
+        `invoke`, while a failure halfway through the output is raised, as the
+        chunks already sent cannot be taken back.
+        """
+        for model_name in self.available_models():
+            start_time = time.monotonic()
+            streaming = False
+            try:
+                async for chunk in build_chain(
+                    model_name, self.models[model_name]
+                ).astream(inputs):
+                    streaming = True
+                    yield chunk
+            except RateLimitError as e:
+                self.record_rate_limit(model_name, _retry_after_seconds(e))
+                if streaming:
+                    raise
+                continue
+            except APIError as e:
+                self.record_failure(model_name)
+                if streaming:
+                    raise
+                logger.warning(f"Call to {model_name} failed: {e}")
+                continue
+            self.record_success(model_name, time.monotonic() - start_time)
+            return
+        raise AllModelsUnavailableError("No LLM model is currently available")
+
+    def record_success(self, model_name: str, latency: float) -> None:
+        with self._lock:
+            health = self.health[model_name]
+            health.successes += 1
+            health.total_latency += latency
+            health.consecutive_failures = 0
+
+    def record_rate_limit(self, model_name: str, cooldown_seconds: float) -> None:
+        with self._lock:
+            health = self.health[model_name]
+            health.rate_limits += 1
+            health.cooldown_until = max(
+                health.cooldown_until, time.monotonic() + cooldown_seconds
+            )
+        logger.warning(
+            f"Rate limit hit for {model_name}, cooling down for {cooldown_seconds:.0f} seconds"
+        )
+
+    def record_failure(self, model_name: str) -> None:
+        with self._lock:
+            health = self.health[model_name]
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.consecutive_failures >= LLM_CIRCUIT_FAILURE_THRESHOLD:
+                health.cooldown_until = max(
+                    health.cooldown_until, time.monotonic() + LLM_CIRCUIT_OPEN_SECONDS
+                )
+                logger.warning(
+                    f"Opened circuit for {model_name} after "
+                    + f"{health.consecutive_failures} consecutive failures"
+                )
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model_name: health.stats(now)
+                for model_name, health in self.health.items()
+            }
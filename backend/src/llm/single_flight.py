@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+
+class SingleFlight:
+    """
+    Lets concurrent calls for the same key share a single in-flight computation.
+
+    The first caller of a key (the leader) computes the result while later
+    callers wait for it on a shared future. Once the leader resolves the key,
+    the next call starts a fresh computation.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: str) -> tuple[Future, bool]:
+        """
+        Returns the future of the in-flight computation of `key`, and whether
+        the caller is its leader and must `resolve` it.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def resolve(
+        self, key: str, result: Any = None, error: Optional[Exception] = None
+    ) -> None:
+        with self._lock:
+            future = self._calls.pop(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Returns the result of `compute`, shared with concurrent calls for `key`."""
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = compute()
+        except Exception as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result)
+        return result
@@ -0,0 +1,178 @@
+"""
+Versioned migrations of the database schema. Applied migrations are recorded in
+the `schema_migrations` table, and the API and the worker check on startup that
+all migrations are applied (applying them first if MIGRATE_ON_STARTUP is set).
+To apply them by hand, e.g. before a deploy:
+
+    python -m src.migrations
+
+Migrations are never changed once released, new ones are appended to
+`MIGRATIONS`. Since the first migration creates the tables of the current models,
+migrations must check for what they add, so they are no-ops on new databases.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple
+
+from sqlalchemy import Connection, Engine, inspect, select, text
+
+from .database import engine
+from .models import Base, Job, Recommendation, SchemaMigration, User
+from .search import SQLITE_JOBS_FTS_UPDATE_TRIGGER_DDL, create_full_text_index
+
+logger = logging.getLogger("uvicorn")
+
+# Key of the Postgres advisory lock taken while migrating, so that processes
+# starting at the same time don't apply the same migration twice.
+MIGRATIONS_LOCK_KEY = 7_120_425
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def create_tables(connection: Connection) -> None:
+    Base.metadata.create_all(bind=connection)
+    create_full_text_index(connection)  # Index jobs saved before search was hybrid
+
+
+def add_column_if_missing(
+    connection: Connection, table_name: str, column_name: str
+) -> None:
+    column = Base.metadata.tables[table_name].c[column_name]
+    if column.name in {c["name"] for c in inspect(connection).get_columns(table_name)}:
+        return
+    preparer = connection.dialect.identifier_preparer
+    connection.execute(
+        text(
+            f"ALTER TABLE {preparer.quote(table_name)} "
+            + f"ADD COLUMN {preparer.quote(column.name)} "
+            + column.type.compile(dialect=connection.dialect)
+        )
+    )
+
+
+def add_resume_status_column(connection: Connection) -> None:
+    add_column_if_missing(connection, User.__tablename__, "resume_status")
+
+
+def add_resume_keyword_columns(connection: Connection) -> None:
+    add_column_if_missing(connection, User.__tablename__, "resume_raw_text")
+    add_column_if_missing(connection, User.__tablename__, "resume_keyword_hashes")
+
+
+def add_recommendation_columns(connection: Connection) -> None:
+    add_column_if_missing(connection, User.__tablename__, "resume_keyword_embeddings")
+    add_column_if_missing(
+        connection, User.__tablename__, "recommendations_refreshed_at"
+    )
+
+
+def add_job_embedding_columns(connection: Connection) -> None:
+    add_column_if_missing(connection, Job.__tablename__, "content_hash")
+    for index in Base.metadata.tables[Job.__tablename__].indexes:
+        if index.name == "ix_jobs_content_hash":
+            index.create(connection, checkfirst=True)
+
+
+def add_job_query_indexes(connection: Connection) -> None:
+    for table_name in [Job.__tablename__, Recommendation.__tablename__]:
+        for index in Base.metadata.tables[table_name].indexes:
+            index.create(connection, checkfirst=True)
+    if connection.dialect.name == "sqlite":
+        # Don't rewrite the full-text index when jobs are only marked inactive.
+        connection.execute(text("DROP TRIGGER IF EXISTS jobs_fts_after_update"))
+        connection.execute(text(SQLITE_JOBS_FTS_UPDATE_TRIGGER_DDL))
+
+
+MIGRATIONS = [
+    Migration(
+        1, "Create the tables and the full-text index of the jobs", create_tables
+    ),
+    Migration(2, "Add the resume status column", add_resume_status_column),
+    Migration(3, "Add the resume text and keyword columns", add_resume_keyword_columns),
+    Migration(
+        4,
+        "Add the resume keyword embedding and recommendation refresh columns",
+        add_recommendation_columns,
+    ),
+    Migration(
+        5,
+        "Add the job embedding columns",
+        add_job_embedding_columns,
+    ),
+    Migration(6, "Add indexes matching the job queries", add_job_query_indexes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+schema_migrations = Base.metadata.tables[SchemaMigration.__tablename__]
+
+
+def get_applied_versions(connection: Connection) -> set[int]:
+    if not inspect(connection).has_table(SchemaMigration.__tablename__):
+        return set()
+    return set(connection.scalars(select(SchemaMigration.version)))
+
+
+def migrate(bind: Engine) -> None:
+    """Apply the migrations that were not applied to the database of `bind` yet."""
+    with bind.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(
+                text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY}
+            )
+            connection.commit()
+        try:
+            with connection.begin():
+                schema_migrations.create(connection, checkfirst=True)
+                applied_versions = get_applied_versions(connection)
+            for migration in MIGRATIONS:
+                if migration.version in applied_versions:
+                    continue
+                logger.info(
+                    f"Applying migration {migration.version}: {migration.description}"
+                )
+                with connection.begin():
+                    migration.upgrade(connection)
+                    connection.execute(
+                        schema_migrations.insert().values(
+                            version=migration.version,
+                            description=migration.description,
+                            applied_at=datetime.now(timezone.utc).replace(tzinfo=None),
+                        )
+                    )
+        finally:
+            if connection.dialect.name == "postgresql":
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": MIGRATIONS_LOCK_KEY},
+                )
+                connection.commit()
+
+
+def check_schema_version(bind: Engine) -> None:
+    """Raise if the database of `bind` is missing migrations or has unknown ones."""
+    with bind.connect() as connection:
+        applied_versions = get_applied_versions(connection)
+    known_versions = {migration.version for migration in MIGRATIONS}
+    if applied_versions - known_versions:
+        raise RuntimeError(
+            f"The database has migrations {sorted(applied_versions - known_versions)} "
+            + "applied that this version of the app does not know about."
+        )
+    if known_versions - applied_versions:
+        raise RuntimeError(
+            f"The database is missing migrations {sorted(known_versions - applied_versions)}. "
+            + "Apply them with `python -m src.migrations`."
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    migrate(engine)
+    logger.info(f"The database schema is at version {SCHEMA_VERSION}.")
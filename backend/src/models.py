@@ -1,4 +1,15 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -23,11 +34,33 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
 
     resume_url = Column(String)  # Path or S3 URL to uploaded resume
-    resume_text = Column(String)
+    resume_text = Column(String)  # JSON of role → resume keywords
+    resume_status = Column(String)  # processing, ready or failed
+    resume_raw_text = Column(Text)  # Text extracted from the resume PDF
+    # JSON of role → hash of the resume text its keywords were extracted from
+    resume_keyword_hashes = Column(String)
+    # JSON of role → embedding of the resume keywords, computed once per resume
+    resume_keyword_embeddings = Column(Text)
+    # When the recommendations of the user were last materialized, None if stale
+    recommendations_refreshed_at = Column(DateTime)
 
 
 class Job(Base):
     __tablename__ = "jobs"
+    # Matched to the filters of job searches (newest first) and of the expiry,
+    # which always filter on `is_active`. Existing databases get them through
+    # a migration, see `migrations.py`.
+    __table_args__ = (
+        Index("ix_jobs_active_posted_at", "is_active", "posted_at"),
+        Index("ix_jobs_active_role_posted_at", "is_active", "role", "posted_at"),
+        Index("ix_jobs_active_source_posted_at", "is_active", "source", "posted_at"),
+        Index(
+            "ix_jobs_active_remote_experience",
+            "is_active",
+            "remote",
+            "required_experience",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -47,3 +80,55 @@ class Job(Base):
 
     posted_at = Column(DateTime)
     is_active = Column(Boolean, default=True)
+
+    # Hash of the embedded title and description, keying its JobEmbedding
+    content_hash = Column(String, index=True)
+
+
+class JobEmbedding(Base):
+    """Embeddings of job documents, so a document is only ever embedded once."""
+
+    __tablename__ = "job_embeddings"
+
+    content_hash = Column(String, primary_key=True)
+    embedding = Column(LargeBinary, nullable=False)  # float32 array
+
+
+class Recommendation(Base):
+    """Materialized recommended jobs of a user, refreshed after scrapes and expiry."""
+
+    __tablename__ = "recommendations"
+    __table_args__ = (
+        Index("ix_recommendations_user_role_score", "user_id", "role", "score"),
+        # Recommendations of expired jobs are deleted with them.
+        Index("ix_recommendations_job_id", "job_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    role = Column(String, nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"))
+    score = Column(Float, nullable=False)  # Cosine similarity to the resume keywords
+
+
+class Lease(Base):
+    """
+    Named lease held by one process until `expires_at`, so only one of several
+    API or worker processes runs the scheduled background tasks.
+    """
+
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)  # hostname:pid:random suffix
+    expires_at = Column(DateTime, nullable=False)  # UTC
+
+
+class SchemaMigration(Base):
+    """Migrations applied to the database, see `migrations.py`."""
+
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)  # UTC
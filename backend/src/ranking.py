@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .constants import (
+    RANKING_EXPERIENCE_GAP_SCALE_YEARS,
+    RANKING_RECENCY_HALF_LIFE_DAYS,
+    RANKING_WEIGHT_EXPERIENCE,
+    RANKING_WEIGHT_RECENCY,
+    RANKING_WEIGHT_SALARY,
+    RANKING_WEIGHT_SIMILARITY,
+)
+from .models import Job
+
+SECONDS_PER_DAY = 60 * 60 * 24
+
+
+class RankingWeights(NamedTuple):
+    similarity: float = RANKING_WEIGHT_SIMILARITY
+    recency: float = RANKING_WEIGHT_RECENCY
+    salary: float = RANKING_WEIGHT_SALARY
+    experience: float = RANKING_WEIGHT_EXPERIENCE
+
+
+def get_timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return np.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def score_jobs(
+    jobs: Sequence[Job],
+    similarities: Sequence[float],
+    experience_years: Optional[int],
+    weights: RankingWeights = RankingWeights(),
+    now: Optional[datetime] = None,
+) -> np.ndarray:
+    """
+    Weighted sum of the signals of every job, each between 0 and 1:
+    - similarity: similarity of the job to the resume keywords
+    - recency: halves every `RANKING_RECENCY_HALF_LIFE_DAYS` since the job was posted
+    - salary: average salary relative to the best paid job in the same currency
+    - experience: 1 when the user has the required experience, decaying with the
+      years missing otherwise
+    Jobs without a posting date or salary get 0 for that signal.
+    """
+    num_jobs = len(jobs)
+    now_timestamp = (now or datetime.now(timezone.utc)).timestamp()
+    similarity = np.asarray(similarities, dtype=np.float64)
+    posted_at = np.fromiter(
+        (get_timestamp(job.posted_at) for job in jobs),  # type: ignore[arg-type]
+        dtype=np.float64,
+        count=num_jobs,
+    )
+    salary_min = np.fromiter(
+        (np.nan if job.salary_min is None else job.salary_min for job in jobs),
+        dtype=np.float64,
+        count=num_jobs,
+    )
+    salary_max = np.fromiter(
+        (np.nan if job.salary_max is None else job.salary_max for job in jobs),
+        dtype=np.float64,
+        count=num_jobs,
+    )
+    required_experience = np.fromiter(
+        (job.required_experience or 0 for job in jobs),
+        dtype=np.float64,
+        count=num_jobs,
+    )
+    _, currency = np.unique(
+        [str(job.salary_currency) for job in jobs], return_inverse=True
+    )
+
+    age_days = np.clip((now_timestamp - posted_at) / SECONDS_PER_DAY, 0, None)
+    recency = np.nan_to_num(np.exp2(-age_days / RANKING_RECENCY_HALF_LIFE_DAYS))
+
+    average_salary = np.nan_to_num((salary_min + salary_max) / 2)
+    best_salary = np.zeros(currency.max() + 1)
+    np.maximum.at(best_salary, currency, average_salary)
+    salary = np.divide(
+        average_salary,
+        best_salary[currency],
+        out=np.zeros(num_jobs),
+        where=best_salary[currency] > 0,
+    )
+
+    if experience_years is None:
+        experience = np.ones(num_jobs)
+    else:
+        missing_experience = np.clip(required_experience - experience_years, 0, None)
+        experience = np.exp(-missing_experience / RANKING_EXPERIENCE_GAP_SCALE_YEARS)
+
+    return (
+        weights.similarity * similarity
+        + weights.recency * recency
+        + weights.salary * salary
+        + weights.experience * experience
+    )
+
+
+def rank_jobs(
+    jobs: Sequence[Job],
+    similarities: Sequence[float],
+    experience_years: Optional[int],
+    weights: RankingWeights = RankingWeights(),
+) -> list[Job]:
+    """`jobs` ordered by their combined score, best first."""
+    if not jobs:
+        return []
+    scores = score_jobs(jobs, similarities, experience_years, weights)
+    return [jobs[index] for index in np.argsort(-scores, kind="stable")]
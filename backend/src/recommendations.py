@@ -0,0 +1,99 @@
+import json
+import logging
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .constants import RECOMMENDATIONS_MAX_AGE_HOURS, RECOMMENDATIONS_PER_ROLE
+from .deps import vector_store
+from .models import Job, Recommendation, User
+
+logger = logging.getLogger("uvicorn")
+
+
+def query_recommendations(
+    resume_keywords: dict[str, list[str]],
+    keyword_embeddings: dict[str, list[float]],
+    n_results: int = RECOMMENDATIONS_PER_ROLE,
+) -> dict[str, list[tuple[str, float]]]:
+    """
+    Mapping of role → (URL, score) of the jobs nearest to the resume keywords of
+    the role, best first. The embeddings of the keywords are reused when every
+    role has one, otherwise the keywords are embedded by the vector store.
+    """
+    roles = list(resume_keywords)
+    if not roles:
+        return {}
+    if all(role in keyword_embeddings for role in roles):
+        results = vector_store.query(
+            query_embeddings=[keyword_embeddings[role] for role in roles],
+            n_results=n_results,
+        )
+    else:
+        results = vector_store.query(
+            query_texts=[" ".join(resume_keywords[role]) for role in roles],
+            n_results=n_results,
+        )
+    return {
+        role: [(url, 1 - distance) for url, distance in result]
+        for role, result in zip(roles, results)
+    }
+
+
+def is_recommendations_stale(user: User) -> bool:
+    refreshed_at: Optional[datetime] = user.recommendations_refreshed_at  # type: ignore[assignment]
+    if refreshed_at is None:
+        return True
+    if refreshed_at.tzinfo is None:
+        refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - refreshed_at > timedelta(
+        hours=RECOMMENDATIONS_MAX_AGE_HOURS
+    )
+
+
+def refresh_user_recommendations(db: Session, user: User) -> None:
+    """
+    Materialize the recommended jobs of every role of `user`. Roles are always
+    refreshed together, as the jobs of any role are candidates for every role
+    and the refresh time of the user covers all of them.
+    """
+    resume_keywords: dict[str, list[str]] = json.loads(str(user.resume_text or "{}"))
+    role_to_scores = query_recommendations(
+        resume_keywords, json.loads(str(user.resume_keyword_embeddings or "{}"))
+    )
+    urls = set(url for scores in role_to_scores.values() for url, _ in scores)
+    url_to_job_id = dict(
+        db.query(Job.url, Job.id)
+        .filter(Job.url.in_(list(urls)), Job.is_active == True)
+        .tuples()
+        .all()
+    )
+
+    db.query(Recommendation).filter(Recommendation.user_id == user.id).delete(
+        synchronize_session=False
+    )
+    recommendations = [
+        {"user_id": user.id, "role": role, "job_id": url_to_job_id[url], "score": score}
+        for role, scores in role_to_scores.items()
+        for url, score in scores
+        if url in url_to_job_id
+    ]
+    if recommendations:
+        db.execute(insert(Recommendation), recommendations)
+    user.recommendations_refreshed_at = datetime.now(timezone.utc)  # type: ignore[assignment]
+    db.commit()
+
+
+def refresh_recommendations(db: Session) -> None:
+    """Materialize the recommended jobs of every user with resume keywords."""
+    try:
+        users = db.query(User).filter(User.resume_text.isnot(None)).all()
+        for user in users:
+            refresh_user_recommendations(db, user)
+        logger.info(f"Refreshed the recommendations of {len(users)} users.")
+    except Exception:
+        logger.error(f"Error refreshing recommendations: {traceback.format_exc()}")
+        db.rollback()
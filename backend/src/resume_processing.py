@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import pdfplumber
+from chromadb import Documents, Embeddings
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .constants import RESUME_KEYWORD_WORKERS, RESUME_PDF_WORKERS
+from .llm.llm import LLM
+from .models import User
+
+logger = logging.getLogger("uvicorn")
+
+RESUME_STATUS_PROCESSING = "processing"
+RESUME_STATUS_READY = "ready"
+RESUME_STATUS_FAILED = "failed"
+
+
+def extract_resume_text(resume_file_path: str) -> str:
+    """Text of the resume PDF. Runs in a worker process, as parsing is CPU bound."""
+    with pdfplumber.open(resume_file_path) as pdf:
+        return re.sub(
+            r"[\n\t\r]+",
+            " ",
+            "\n".join(page.extract_text() for page in pdf.pages),
+        )
+
+
+def resume_text_hash(resume_text: str) -> str:
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+
+class ResumeProcessor:
+    """
+    Background queue for uploaded resumes.
+
+    PDF text is extracted in a process pool and the keywords are extracted by the
+    LLM on a worker thread, after which the user row is updated with the keywords
+    and a `ready` (or `failed`) resume status. Only the latest job of a user is
+    applied, so an older upload finishing late does not overwrite a newer one.
+
+    Keywords are kept per role along with a hash of the resume text they were
+    extracted from, and the LLM is only asked for the roles whose keywords are
+    missing or were extracted from a different resume. The keywords of those roles
+    are embedded once here, so recommendations don't embed them on every request.
+    """
+
+    def __init__(
+        self,
+        llm: LLM,
+        embedding_function: Optional[Callable[[Documents], Embeddings]] = None,
+        pdf_workers: int = RESUME_PDF_WORKERS,
+        keyword_workers: int = RESUME_KEYWORD_WORKERS,
+    ) -> None:
+        self.llm = llm
+        self.embedding_function = embedding_function
+        self.pdf_workers = pdf_workers
+        self._pdf_executor: Optional[ProcessPoolExecutor] = None
+        self._keyword_executor = ThreadPoolExecutor(
+            max_workers=keyword_workers, thread_name_prefix="resume"
+        )
+        self._latest_jobs: dict[str, int] = {}
+        self._num_jobs = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pdf_executor(self) -> ProcessPoolExecutor:
+        # Started on first use, so processes that never get a resume don't fork.
+        with self._lock:
+            if self._pdf_executor is None:
+                self._pdf_executor = ProcessPoolExecutor(max_workers=self.pdf_workers)
+            return self._pdf_executor
+
+    def submit(
+        self,
+        bind: Engine | Connection,
+        email: str,
+        preferred_roles: list[str],
+        resume_file_path: Optional[str] = None,
+    ) -> Future:
+        """
+        Queue the resume of the user with `email`, whose resume status should
+        already be `processing`. Without `resume_file_path`, keywords for new
+        roles are extracted from the text of the resume uploaded before.
+        The user row is updated through `bind`.
+        """
+        with self._lock:
+            self._num_jobs += 1
+            job_id = self._num_jobs
+            self._latest_jobs[email] = job_id
+        return self._keyword_executor.submit(
+            self._process, bind, email, job_id, preferred_roles, resume_file_path
+        )
+
+    def _process(
+        self,
+        bind: Engine | Connection,
+        email: str,
+        job_id: int,
+        preferred_roles: list[str],
+        resume_file_path: Optional[str],
+    ) -> None:
+        with Session(bind) as db:
+            user = db.query(User).filter(User.email == email).first()
+            if user is None:
+                return
+            resume_text: Optional[str] = (
+                None if user.resume_raw_text is None else str(user.resume_raw_text)
+            )
+            resume_keywords = json.loads(str(user.resume_text or "{}"))
+            keyword_hashes = json.loads(str(user.resume_keyword_hashes or "{}"))
+            keyword_embeddings = json.loads(str(user.resume_keyword_embeddings or "{}"))
+
+        try:
+            if resume_file_path is not None:
+                resume_text = self.pdf_executor.submit(
+                    extract_resume_text, resume_file_path
+                ).result()
+            if resume_text is None:
+                raise ValueError("No resume was uploaded")
+            resume_hash = resume_text_hash(resume_text)
+            stale_roles = [
+                role
+                for role in preferred_roles
+                if role not in resume_keywords
+                or keyword_hashes.get(role) != resume_hash
+            ]
+            if stale_roles:
+                extracted_keywords = self.llm.extract_skills_from_resume(
+                    resume_text, stale_roles
+                )
+                for role in stale_roles:
+                    if role in extracted_keywords:
+                        resume_keywords[role] = extracted_keywords[role]
+                        keyword_hashes[role] = resume_hash
+            roles_to_embed = [
+                role
+                for role in resume_keywords
+                if self.embedding_function is not None
+                and (role in stale_roles or role not in keyword_embeddings)
+            ]
+            if roles_to_embed and self.embedding_function is not None:
+                embeddings = self.embedding_function(
+                    [" ".join(resume_keywords[role]) for role in roles_to_embed]
+                )
+                for role, embedding in zip(roles_to_embed, embeddings):
+                    keyword_embeddings[role] = [float(value) for value in embedding]
+            logger.info(
+                f"Extracted resume keywords of {email} for {len(stale_roles)} of "
+                + f"{len(preferred_roles)} roles"
+            )
+            resume_status = RESUME_STATUS_READY
+        except Exception:
+            logger.error(
+                f"Error while processing the resume of {email}: {traceback.format_exc()}"
+            )
+            resume_status = RESUME_STATUS_FAILED
+
+        with self._lock:
+            if self._latest_jobs.get(email) != job_id:
+                logger.info(f"Skipping outdated resume job of {email}")
+                return
+            del self._latest_jobs[email]
+        with Session(bind) as db:
+            user = db.query(User).filter(User.email == email).first()
+            if user is None:
+                return
+            if resume_status == RESUME_STATUS_READY:
+                user.resume_raw_text = resume_text  # type: ignore[assignment]
+                user.resume_text = (
+                    json.dumps(resume_keywords) if resume_keywords else None  # type: ignore[assignment]
+                )
+                user.resume_keyword_hashes = json.dumps(keyword_hashes)  # type: ignore[assignment]
+                user.resume_keyword_embeddings = json.dumps(keyword_embeddings)  # type: ignore[assignment]
+                if stale_roles or roles_to_embed:
+                    # Served live until the recommendations are materialized again.
+                    user.recommendations_refreshed_at = None  # type: ignore[assignment]
+            user.resume_status = resume_status  # type: ignore[assignment]
+            db.commit()
+        logger.info(f"Processed the resume of {email}: {resume_status}")
+
+    def shutdown(self) -> None:
+        self._keyword_executor.shutdown(wait=False, cancel_futures=True)
+        if self._pdf_executor is not None:
+            self._pdf_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -21,7 +22,6 @@ from fastapi import (
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import jwt
-import pdfplumber
 from pydantic import (
     BaseModel,
     EmailStr,
@@ -36,8 +36,9 @@ from sqlalchemy.orm import Session
 
 from ..utils import get_normalized_locations_list_string, hash_password, verify_password
 from ..constants import DEFAULT_TOKEN_EXPIRE_MINUTES, ROLES, SOURCES, STATIC_DIR_PATH
-from ..deps import db_dependency, llm, user_dependency
+from ..deps import db_dependency, resume_processor, user_dependency
 from ..models import User
+from ..resume_processing import RESUME_STATUS_PROCESSING
 
 load_dotenv()
 
@@ -68,6 +69,22 @@ class UserModel(BaseModel):
         description="Did the user opt-in to receive email alerts"
     )
     resume_url: Optional[str] = Field(description="Resume URL of the user")
+    resume_status: Optional[str] = Field(
+        None,
+        description="Processing status of the uploaded resume "
+        "(One of `processing`, `ready` or `failed`)",
+    )
+
+
+class ResumeStatusModel(BaseModel):
+    resume_url: Optional[str] = Field(description="Resume URL of the user")
+    resume_status: Optional[str] = Field(
+        description="Processing status of the uploaded resume "
+        "(One of `processing`, `ready` or `failed`)"
+    )
+    has_keywords: bool = Field(
+        description="Were keywords for the preferred roles extracted from the resume"
+    )
 
 
 class UserCreateRequest(BaseModel):
@@ -241,6 +258,18 @@ def authenticate_user(username: str, password: str, db: Session) -> Optional[Use
     return user
 
 
+async def save_resume(resume: UploadFile, resume_file_path: str) -> None:
+    """Write the uploaded resume to `resume_file_path` without blocking the event loop."""
+    content = await resume.read()
+
+    def write() -> None:
+        os.makedirs(os.path.dirname(resume_file_path), exist_ok=True)
+        with open(resume_file_path, "wb") as f:
+            f.write(content)
+
+    await asyncio.to_thread(write)
+
+
 def create_access_token(
     email: str,
     expires_delta: timedelta = timedelta(minutes=DEFAULT_TOKEN_EXPIRE_MINUTES),
@@ -268,6 +297,26 @@ def get_myself(email: user_dependency, db: db_dependency):
     return user
 
 
+@router.get(
+    "/resume-status",
+    response_model=ResumeStatusModel,
+    summary="Get resume processing status",
+    description="Get the processing status of the resume of the authenticated user",
+    response_description="Processing status of the resume",
+)
+def get_resume_status(email: user_dependency, db: db_dependency):
+    user = db.query(User).filter(User.email == email["email"]).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated"
+        )
+    return {
+        "resume_url": user.resume_url,
+        "resume_status": user.resume_status,
+        "has_keywords": bool(user.resume_text),
+    }
+
+
 @router.get(
     "/{user_email}",
     response_model=UserModel,
@@ -306,7 +355,6 @@ async def create_user(
             detail=json.loads(e.json()),
         )
     hashed_password = hash_password(user_obj.password)
-    resume_text = None
     resume_file_path = None
 
     if resume and not isinstance(resume, str):
@@ -321,32 +369,16 @@ async def create_user(
                 detail="Resume filename not specified",
             )
         try:
-            # Save the file to the uploads directory
+            # Save the file to the uploads directory, it is parsed in the background
             resume_file_path = os.path.join(
                 STATIC_DIR_PATH, user_obj.email, resume.filename
             )
-            os.makedirs(os.path.dirname(resume_file_path), exist_ok=True)
-            with open(resume_file_path, "wb") as f:
-                f.write(await resume.read())
-
-            # Parse the resume text
-            with pdfplumber.open(resume_file_path) as pdf:
-                resume_text = re.sub(
-                    r"[\n\t\r]+",
-                    " ",
-                    "\n".join(page.extract_text() for page in pdf.pages),
-                )
+            await save_resume(resume, resume_file_path)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to process the resume: {str(e)}",
             )
-    if resume_text is not None and len(user_obj.preferred_roles) > 0:
-        resume_text = json.dumps(
-            llm.extract_skills_from_resume(resume_text, user_obj.preferred_roles)
-        )
-    else:
-        resume_text = None
     try:
         db_user = User(
             email=user_obj.email,
@@ -365,11 +397,20 @@ async def create_user(
                 and resume.filename is not None
                 else None
             ),
-            resume_text=resume_text,
+            resume_status=(
+                RESUME_STATUS_PROCESSING if resume_file_path is not None else None
+            ),
         )
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        if resume_file_path is not None:
+            resume_processor.submit(
+                db.get_bind(),
+                user_obj.email,
+                user_obj.preferred_roles,
+                resume_file_path=resume_file_path,
+            )
         return db_user
     except sqlalchemy.exc.IntegrityError as e:
         db.rollback()
@@ -498,27 +539,15 @@ async def update_user(
             resume_file_path = os.path.join(
                 STATIC_DIR_PATH, user.email, resume.filename
             )
-            os.makedirs(os.path.dirname(resume_file_path), exist_ok=True)
-            with open(resume_file_path, "wb") as f:
-                f.write(await resume.read())
-
-            with pdfplumber.open(resume_file_path) as pdf:
-                resume_text = re.sub(
-                    r"[\n\t\r]+",
-                    " ",
-                    "\n".join(page.extract_text() for page in pdf.pages),
-                )
+            await save_resume(resume, resume_file_path)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to process the resume: {str(e)}",
             )
 
-    if resume_text:
-        resume_text = json.dumps(
-            llm.extract_skills_from_resume(resume_text, user_obj.preferred_roles)
-        )
-
     try:
         user.full_name = (
             user_obj.full_name  # type: ignore[assignment]
@@ -551,13 +580,25 @@ async def update_user(
             else user.receive_email_alerts
         )
 
-        if resume and not isinstance(resume, str) and resume.filename:
-            user.resume_url = os.path.join("static", user.email, resume.filename)  # type: ignore[assignment]
-            if resume_text:
-                user.resume_text = resume_text  # type: ignore[assignment]
+        if resume_file_path is not None and resume and not isinstance(resume, str):
+            user.resume_url = os.path.join("static", user.email, resume.filename)  # type: ignore[arg-type, assignment]
+        # Keywords are extracted from a new resume, or for newly preferred roles
+        # from the resume uploaded before.
+        extract_keywords = resume_file_path is not None or (
+            user_obj.preferred_roles is not None and user.resume_raw_text is not None
+        )
+        if extract_keywords:
+            user.resume_status = RESUME_STATUS_PROCESSING  # type: ignore[assignment]
 
         db.commit()
         db.refresh(user)
+        if extract_keywords:
+            resume_processor.submit(
+                db.get_bind(),
+                str(user.email),
+                json.loads(str(user.preferred_roles or "[]")),
+                resume_file_path=resume_file_path,
+            )
         return user
 
     except Exception as e:
@@ -1,15 +1,30 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 import logging
+import time
 import traceback
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query, status
-from groq import RateLimitError
+from typing import AsyncIterator, Callable, Optional, TypeVar
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import case, desc
+from sqlalchemy.orm import Session
 
-from ..deps import db_dependency, job_collection, llm, user_dependency
-from ..models import Job, User
+from ..constants import (
+    SEARCH_MAX_CANDIDATES,
+    SEARCH_DEFAULT_PAGE_SIZE,
+    SEARCH_MAX_PAGE_SIZE,
+    SEARCH_VECTOR_WORKERS,
+)
+from ..deps import db_dependency, llm, user_dependency, vector_store
+from ..llm.router import AllModelsUnavailableError
+from ..models import Job, Recommendation, User
+from ..ranking import rank_jobs
+from ..recommendations import is_recommendations_stale, refresh_user_recommendations
+from ..search import full_text_search, get_job_filter_conditions, reciprocal_rank_fusion
+from ..utils import get_job_metadata_filter
 
 router = APIRouter(
     prefix="/job",
@@ -18,6 +33,12 @@ router = APIRouter(
 
 logger = logging.getLogger("uvicorn")
 
+T = TypeVar("T")
+
+search_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_VECTOR_WORKERS, thread_name_prefix="search"
+)
+
 
 class JobModel(BaseModel):
     title: str = Field(
@@ -88,74 +109,100 @@ def recommended_jobs(
     sort_by: str = Query(
         "relevance",
         description="Sort by experience required (increasing or decreasing), "
-        "average salary or relevance (One of `relevance`, `salary`, `inc_experience`, `desc_experience)",
+        "average salary, relevance or the best match of relevance, recency, salary "
+        "and experience combined (One of `relevance`, `salary`, `inc_experience`, "
+        "`desc_experience`, `best_match`)",
         examples=["inc_experience"],
     ),
 ):
     """Get all recommended jobs for the user based on their resume keywords"""
-    resume_text = db.query(User.resume_text).filter(User.email == user["email"]).first()
-    if resume_text is None:
+    current_user = db.query(User).filter(User.email == user["email"]).first()
+    if current_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"User not authenticated",
         )
-    resume_text_json = resume_text[0]
-    if not resume_text_json:
+    if not current_user.resume_text:
         return {"NULL": db.query(Job).filter(Job.is_active == True).all()}
 
-    resume_text_grouped_by_roles: dict = json.loads(resume_text_json)
+    roles = list(json.loads(str(current_user.resume_text)))
     if role:
-        resume_text_grouped_by_roles = {role: resume_text_grouped_by_roles[role]}
-
-    role_to_urls = dict(
-        zip(
-            list(resume_text_grouped_by_roles.keys()),
-            job_collection.query(
-                query_texts=[
-                    " ".join(keywords)
-                    for keywords in resume_text_grouped_by_roles.values()
-                ],
-                n_results=100,
-                include=[],
-            )["ids"],
-        )
-    )
-    jobs = (
-        db.query(Job)
+        roles = [role]
+    if is_recommendations_stale(current_user):
+        # Computed live, and materialized for the next requests.
+        refresh_user_recommendations(db, current_user)
+
+    role_to_jobs: dict[str, list[Job]] = {role: [] for role in roles}
+    role_to_scores: dict[str, list[float]] = {role: [] for role in roles}
+    recommendations = (
+        db.query(Recommendation.role, Recommendation.score, Job)
+        .join(Job, Job.id == Recommendation.job_id)
         .filter(
-            Job.url.in_(
-                list(set(url for urls in role_to_urls.values() for url in urls))
-            ),
+            Recommendation.user_id == current_user.id,
+            Recommendation.role.in_(roles),
             Job.is_active == True,
         )
-        .all()
+        .order_by(desc(Recommendation.score))
+        .tuples()
     )
-    url_to_job = {job.url: job for job in jobs}
+    for job_role, score, job in recommendations:
+        role_to_jobs[job_role].append(job)
+        role_to_scores[job_role].append(score)
 
-    def sort_func(job: Job, role: str):
+    def sort_func(job: Job):
         if sort_by == "desc_experience":
             return int(job.required_experience)
         elif sort_by == "inc_experience":
             return 15 - int(job.required_experience)
-        elif sort_by == "salary":
+        else:
             return (
                 (int(job.salary_min) + int(job.salary_max)) / 2
                 if job.salary_min and job.salary_max
                 else 0
             )
-        else:
-            return len(role_to_urls) - role_to_urls[role].index(job.url)
 
+    if sort_by == "relevance":
+        # Already ordered by similarity to the resume keywords.
+        return role_to_jobs
+    if sort_by == "best_match":
+        experience_years = current_user.experience_years
+        return {
+            role: rank_jobs(
+                jobs,
+                role_to_scores[role],
+                None if experience_years is None else int(experience_years),
+            )
+            for role, jobs in role_to_jobs.items()
+        }
     return {
-        role: sorted(
-            [url_to_job[url] for url in urls if url in url_to_job],
-            key=lambda job: sort_func(job, role),
-            reverse=True,
-        )
-        for role, urls in role_to_urls.items()
+        role: sorted(jobs, key=sort_func, reverse=True)
+        for role, jobs in role_to_jobs.items()
     }
 
 
+def timed(func: Callable[..., T], *args) -> tuple[T, float]:
+    """Result of `func(*args)` along with how long it took, in seconds."""
+    start = time.monotonic()
+    result = func(*args)
+    return result, time.monotonic() - start
+
+
+def vector_search(
+    query_text: str, where: Optional[dict], num_results: int
+) -> list[str]:
+    """
+    URLs of the `num_results` jobs nearest to `query_text`, nearest first. Jobs
+    at the same distance are ordered by URL, as vector stores return them in no
+    particular order and pages must be slices of the same ranking.
+    """
+    results = vector_store.query(
+        query_texts=[query_text], n_results=num_results, where=where
+    )[0]
+    return [
+        url for url, _ in sorted(results, key=lambda result: (result[1], result[0]))
+    ]
+
+
 @router.get(
     "/search",
     response_model=dict[str, list[JobModel]],
@@ -166,6 +213,7 @@ def recommended_jobs(
 def search_jobs(
     user: user_dependency,
     db: db_dependency,
+    response: Response,
     search_query: str = Query(
         "",
         description="Search keyword(s) for the job title or description",
@@ -199,49 +247,83 @@ def search_jobs(
         "average salary or relevance (One of `relevance`, `salary`, `inc_experience`, `desc_experience)",
         examples=["inc_experience"],
     ),
+    page: int = Query(
+        1,
+        ge=1,
+        description="Page of the search results. Searches with a query return at "
+        f"most {SEARCH_MAX_CANDIDATES} jobs, so later pages are empty",
+    ),
+    page_size: int = Query(
+        SEARCH_DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=SEARCH_MAX_PAGE_SIZE,
+        description="Number of jobs per page of the search results",
+    ),
 ):
     """Search for jobs based on the provided search query and optional filters"""
-    # Extract job URLs from the job collection
-    job_listings = db.query(Job)
+    conditions = get_job_filter_conditions(
+        location, source, role, remote, min_experience_years, max_experience_years
+    )
+    job_listings = db.query(Job).filter(*conditions)
     ordering = None
+    offset = (page - 1) * page_size
     if search_query:
-        job_urls = list(
-            job_collection.query(
-                query_texts=[(role + " " + search_query).strip()],
-                n_results=5,
-                include=[],
-            )["ids"][0]
+        # Both legs retrieve a fixed number of candidates whatever the page, so
+        # every page is a slice of the same fused ranking.
+        num_candidates = SEARCH_MAX_CANDIDATES
+        # The semantic leg runs on a worker thread while the lexical leg runs on
+        # the session of the request.
+        vector_leg = search_executor.submit(
+            timed,
+            vector_search,
+            (role + " " + search_query).strip(),
+            get_job_metadata_filter(
+                location,
+                source,
+                role,
+                remote,
+                min_experience_years,
+                max_experience_years,
+            ),
+            num_candidates,
+        )
+        lexical_urls, lexical_latency = timed(
+            full_text_search, db, search_query, conditions, num_candidates
+        )
+        vector_urls, vector_latency = vector_leg.result()
+        response.headers["Server-Timing"] = (
+            f"vector;dur={vector_latency * 1000:.1f}, "
+            + f"lexical;dur={lexical_latency * 1000:.1f}"
         )
+        logger.info(
+            f"Searched {search_query!r}: vector {vector_latency * 1000:.1f}ms, "
+            + f"lexical {lexical_latency * 1000:.1f}ms"
+        )
+        job_urls = reciprocal_rank_fusion([vector_urls, lexical_urls])[
+            offset : offset + page_size
+        ]
+        if not job_urls:
+            return {}
         ordering = case({val: idx for idx, val in enumerate(job_urls)}, value=Job.url)
         # Query jobs table for job listings with given
         # job urls filtered by the optional filters with ordering
-        job_listings = job_listings.filter(Job.url.in_(job_urls), Job.is_active == True)
+        job_listings = job_listings.filter(Job.url.in_(job_urls))
     if sort_by == "inc_experience":
         job_listings = job_listings.order_by(Job.required_experience)
-    if sort_by == "desc_experience":
+    elif sort_by == "desc_experience":
         job_listings = job_listings.order_by(desc(Job.required_experience))
     elif sort_by == "salary":
         job_listings = job_listings.order_by(
             desc((Job.salary_min + Job.salary_max) / 2)
         )
-    else:
+    elif ordering is not None:
         job_listings = job_listings.order_by(ordering)
-    if location:
-        job_listings = job_listings.filter(Job.location == location)
-    if source:
-        job_listings = job_listings.filter(Job.source == source)
-    if role:
-        job_listings = job_listings.filter(Job.role == role)
-    if min_experience_years is not None:
-        job_listings = job_listings.filter(
-            Job.required_experience >= min_experience_years
+    if not search_query:
+        job_listings = (
+            job_listings.order_by(desc(Job.posted_at), Job.id)
+            .offset(offset)
+            .limit(page_size)
         )
-    if max_experience_years is not None:
-        job_listings = job_listings.filter(
-            Job.required_experience <= max_experience_years
-        )
-    if remote:
-        job_listings = job_listings.filter(Job.remote == True)
 
     jobs = job_listings.all()
     return dict(
@@ -250,6 +332,41 @@ def search_jobs(
     )
 
 
+def get_cover_letter_request(
+    db: Session, email: str, job_url: str
+) -> tuple[str, dict[str, str]]:
+    """
+    Cache key of the cover letter, along with the resume keywords, name and job
+    details the cover letter prompt needs.
+    """
+    job_info = (
+        db.query(Job.company, Job.description, Job.role)
+        .filter(Job.url == job_url)
+        .first()
+    )
+    if job_info is None:
+        raise ValueError("Job with specified URL does not exist.")
+    company, job_description, role = job_info.tuple()
+    user_info = (
+        db.query(User.resume_text, User.full_name).filter(User.email == email).first()
+    )
+    if user_info is None:
+        raise ValueError("User not authenticated.")
+    user_resume_data, name = user_info.tuple()
+    return llm.get_cover_letter_cache_key(email, job_url, user_resume_data), {
+        "resume_data": json.loads(user_resume_data)[role],
+        "company": company,
+        "name": name,
+        "job_description": job_description,
+    }
+
+
+def format_server_sent_event(data: str, event: Optional[str] = None) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines += [f"data: {line}" for line in data.split("\n")]
+    return "\n".join(lines) + "\n\n"
+
+
 @router.get(
     "/generate-cover",
     response_model=str,
@@ -265,39 +382,84 @@ def generate_cover(
         description="Job URL for which to generate a cover letter for.",
         examples=["inc_experience"],
     ),
+    regenerate: bool = Query(
+        False, description="Generate a new cover letter instead of the cached one"
+    ),
 ):
     logger.info(job_url)
     try:
-        job_info = (
-            db.query(Job.company, Job.description, Job.role)
-            .filter(Job.url == job_url)
-            .first()
+        cache_key, inputs = get_cover_letter_request(db, user["email"], job_url)
+        return llm.get_or_generate_cover_letter(cache_key, regenerate, **inputs)
+    except AllModelsUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hit rate limit for the LLM models on the server",
         )
-        if job_info is None:
-            raise ValueError("Job with specified URL does not exist.")
-        company, job_description, role = job_info.tuple()
-        user_info = (
-            db.query(User.resume_text, User.full_name)
-            .filter(User.email == user["email"])
-            .first()
+    except Exception as e:
+        logger.error(f"Error trying to generate cover letter: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong",
         )
-        if user_info is None:
-            raise ValueError("User not authenticated.")
-        user_resume_data, name = user_info.tuple()
-        return llm.generate_cover_letter(
-            resume_data=json.loads(user_resume_data)[role],
-            company=company,
-            name=name,
-            job_description=job_description,
+
+
+@router.get(
+    "/generate-cover/stream",
+    response_class=StreamingResponse,
+    summary="Stream cover letter",
+    description="Streams the cover letter for a particular job as server-sent events "
+    "while it is generated. Every `message` event carries the next piece of the "
+    "cover letter, and the stream ends with a `done` event (or an `error` event).",
+    response_description="Stream of server-sent events with the cover letter.",
+)
+async def generate_cover_stream(
+    user: user_dependency,
+    db: db_dependency,
+    job_url: str = Query(
+        description="Job URL for which to generate a cover letter for.",
+    ),
+    regenerate: bool = Query(
+        False, description="Generate a new cover letter instead of the cached one"
+    ),
+):
+    logger.info(job_url)
+    try:
+        # Off the event loop, as the queries block.
+        cache_key, inputs = await asyncio.to_thread(
+            get_cover_letter_request, db, user["email"], job_url
         )
-    except RateLimitError as e:
+        chunks = llm.stream_or_get_cover_letter(cache_key, regenerate, **inputs)
+        # Wait for the first chunk, so failing to start still gets a proper status.
+        first_chunk = await anext(chunks, "")
+    except AllModelsUnavailableError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Hit rate limit for the LLM models on the server",
         )
-    except Exception as e:
+    except Exception:
         logger.error(f"Error trying to generate cover letter: {traceback.format_exc()}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Something went wrong",
         )
+
+    async def events() -> AsyncIterator[str]:
+        if first_chunk:
+            yield format_server_sent_event(first_chunk)
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    yield format_server_sent_event(chunk)
+        except Exception:
+            logger.error(
+                f"Error while streaming cover letter: {traceback.format_exc()}"
+            )
+            yield format_server_sent_event("Something went wrong", event="error")
+            return
+        yield format_server_sent_event("", event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Optional, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+from ..constants import (
+    SCRAPER_INITIAL_CONCURRENCY_PER_HOST,
+    SCRAPER_LATENCY_SPIKE_FACTOR,
+    SCRAPER_MAX_CONCURRENCY_PER_HOST,
+    SCRAPER_MAX_DELAY_SECONDS,
+    SCRAPER_MAX_FETCH_ATTEMPTS,
+    SCRAPER_MIN_DELAY_SECONDS,
+)
+from .http_client import ScraperHttpClient, http_client
+
+logger = logging.getLogger("uvicorn")
+
+T = TypeVar("T")
+
+# LinkedIn answers with a non-standard 999 instead of 429 when it throttles us.
+THROTTLE_STATUS_CODES = {429, 999}
+
+
+class HostRateController:
+    """
+    Adaptive concurrency and pacing for a single host.
+
+    Uses additive-increase / multiplicative-decrease: every healthy response
+    lets a little more work in flight and shortens the gap between request
+    starts, while a throttling response or a latency spike halves the
+    concurrency and doubles the gap.
+    """
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.concurrency = float(SCRAPER_INITIAL_CONCURRENCY_PER_HOST)
+        self.delay = SCRAPER_MIN_DELAY_SECONDS
+        self.avg_latency: Optional[float] = None
+        self.in_flight = 0
+        self._next_start = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot and for the pacing delay of this host."""
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight < int(self.concurrency)
+            )
+            self.in_flight += 1
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self.delay
+        await asyncio.sleep(start_at - now)
+
+    async def release(
+        self, throttled: bool, latency: float, retry_after: Optional[float] = None
+    ) -> None:
+        """Free the slot and adapt the rate to how the host responded."""
+        async with self._condition:
+            self.in_flight -= 1
+            spiked = (
+                self.avg_latency is not None
+                and latency > self.avg_latency * SCRAPER_LATENCY_SPIKE_FACTOR
+            )
+            if throttled or spiked:
+                self.concurrency = max(1.0, self.concurrency / 2)
+                self.delay = min(SCRAPER_MAX_DELAY_SECONDS, self.delay * 2)
+                if retry_after is not None:
+                    self._next_start = max(
+                        self._next_start, time.monotonic() + retry_after
+                    )
+                logger.warning(
+                    f"Slowing down {self.host}: concurrency={int(self.concurrency)}, "
+                    + f"delay={self.delay:.2f}s ({'throttled' if throttled else 'latency spike'})"
+                )
+            else:
+                self.concurrency = min(
+                    float(SCRAPER_MAX_CONCURRENCY_PER_HOST),
+                    self.concurrency + 1 / self.concurrency,
+                )
+                self.delay = max(SCRAPER_MIN_DELAY_SECONDS, self.delay * 0.8)
+            if not throttled:
+                self.avg_latency = (
+                    latency
+                    if self.avg_latency is None
+                    else 0.8 * self.avg_latency + 0.2 * latency
+                )
+            self._condition.notify_all()
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class AsyncFetcher:
+    """Fetches pages concurrently, with a `HostRateController` per host."""
+
+    def __init__(self, client: ScraperHttpClient = http_client) -> None:
+        self.client = client
+        self.controllers: dict[str, HostRateController] = {}
+
+    def get_controller(self, url: str) -> HostRateController:
+        host = urlparse(url).netloc
+        if host not in self.controllers:
+            self.controllers[host] = HostRateController(host)
+        return self.controllers[host]
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Fetch the page at `url`, returning its HTML or None if it never succeeded."""
+        controller = self.get_controller(url)
+        for attempt in range(1, SCRAPER_MAX_FETCH_ATTEMPTS + 1):
+            await controller.acquire()
+            start_time = time.monotonic()
+            try:
+                response = await asyncio.to_thread(self.client.get, url)
+            except requests.RequestException as e:
+                # Dropped connections usually mean the host is pushing back too.
+                await controller.release(True, time.monotonic() - start_time)
+                logger.warning(f"Attempt {attempt} to fetch {url} failed: {e}")
+                continue
+            throttled = response.status_code in THROTTLE_STATUS_CODES
+            # The time of the final request only, without the backoff the client
+            # slept through while retrying 5xx responses.
+            await controller.release(
+                throttled,
+                response.elapsed.total_seconds(),
+                _retry_after_seconds(response),
+            )
+            if throttled:
+                logger.warning(
+                    f"Attempt {attempt} to fetch {url} was throttled with status {response.status_code}"
+                )
+                continue
+            return response.text
+        logger.error(f"Giving up on {url} after {SCRAPER_MAX_FETCH_ATTEMPTS} attempts")
+        return None
+
+    async def fetch_all(self, urls: list[str]) -> dict[str, Optional[str]]:
+        """Fetch all `urls` concurrently and map each of them to its HTML."""
+        unique_urls = list(dict.fromkeys(urls))
+        pages = await asyncio.gather(*(self.fetch(url) for url in unique_urls))
+        return dict(zip(unique_urls, pages))
+
+
+def run_coroutine_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run `coro` to completion from synchronous code.
+
+    Scrapers are started from the FastAPI lifespan, where an event loop is
+    already running in the current thread, so in that case the coroutine gets
+    its own loop on a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -0,0 +1,134 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import ConnectionPool, HTTPConnectionPool
+
+from ..constants import (
+    SCRAPER_HTTP_BACKOFF_BASE_SECONDS,
+    SCRAPER_HTTP_BACKOFF_MAX_SECONDS,
+    SCRAPER_HTTP_CONNECT_TIMEOUT_SECONDS,
+    SCRAPER_HTTP_MAX_RETRIES,
+    SCRAPER_HTTP_POOL_HOSTS,
+    SCRAPER_HTTP_POOL_MAXSIZE,
+    SCRAPER_HTTP_READ_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# Throttling statuses (429/999) are deliberately not retried here, the fetch
+# engine slows down for those instead.
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that keeps track of the connection pools it hands out."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.pools: set[HTTPConnectionPool] = set()
+        self._pools_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def get_connection_with_tls_context(
+        self, request, verify, proxies=None, cert=None
+    ) -> ConnectionPool:
+        pool = super().get_connection_with_tls_context(
+            request, verify, proxies=proxies, cert=cert
+        )
+        if isinstance(pool, HTTPConnectionPool):
+            with self._pools_lock:
+                self.pools.add(pool)
+        return pool
+
+
+class ScraperHttpClient:
+    """
+    Pooled HTTP client shared by all scrapers.
+
+    Connections are kept alive and reused per host, so repeated requests to the
+    same host skip the TCP and TLS handshakes. Every request gets a timeout and
+    transient failures (connection errors, timeouts and 5xx responses) are
+    retried with jittered exponential backoff.
+
+    `get` is called concurrently from the fetcher's worker threads. The session
+    is shared between them: urllib3 pools are thread-safe, the headers are only
+    set here, and the cookie jar locks around every access, so cookies set by
+    one response are simply sent with later requests to the same host.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = SCRAPER_HTTP_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = SCRAPER_HTTP_READ_TIMEOUT_SECONDS,
+        max_retries: int = SCRAPER_HTTP_MAX_RETRIES,
+        backoff_base: float = SCRAPER_HTTP_BACKOFF_BASE_SECONDS,
+        backoff_max: float = SCRAPER_HTTP_BACKOFF_MAX_SECONDS,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+        self._retries_lock = threading.Lock()
+
+        self.adapter = PooledHTTPAdapter(
+            pool_connections=SCRAPER_HTTP_POOL_HOSTS,
+            pool_maxsize=SCRAPER_HTTP_POOL_MAXSIZE,
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (zero-based) attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """GET `url`, retrying transient failures."""
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            error: Optional[Exception] = None
+            try:
+                response = self.session.get(url, **kwargs)
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt == self.max_retries
+                ):
+                    return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                error = e
+            delay = self.backoff_seconds(attempt)
+            logger.warning(
+                f"Retrying {url} in {delay:.2f} seconds after "
+                + (f"error: {error}" if error else f"status {response.status_code}")
+            )
+            time.sleep(delay)
+            attempt += 1
+            with self._retries_lock:
+                self.retries += 1
+
+    def stats(self) -> dict[str, int]:
+        """Requests sent and connections opened vs reused since startup."""
+        with self.adapter._pools_lock:
+            pools = list(self.adapter.pools)
+        num_requests = sum(pool.num_requests for pool in pools)
+        num_connections = sum(pool.num_connections for pool in pools)
+        with self._retries_lock:
+            retries = self.retries
+        return {
+            "requests": num_requests,
+            "connections_opened": num_connections,
+            "connections_reused": num_requests - num_connections,
+            "retries": retries,
+        }
+
+
+http_client = ScraperHttpClient()
@@ -1,5 +1,7 @@
 import logging
-from langchain_community.document_loaders import WebBaseLoader
+from bs4 import BeautifulSoup
+
+from .http_client import http_client
 
 logger = logging.getLogger("uvicorn")
 
@@ -16,8 +18,9 @@ def scrape_levels_fyi(company: str, role: str, location: str) -> str:
     try:
         url = f"https://www.levels.fyi/companies/{company}/salaries/{role}/locations/{location}"
         logger.info(f"Scraping Levels.fyi for URL: {url}")
-        loader = WebBaseLoader(url)
-        data = loader.load().pop().page_content
+        response = http_client.get(url)
+        response.raise_for_status()
+        data = BeautifulSoup(response.text, "html.parser").get_text()
         return data
     except Exception as e:
         print(f"Error scraping Levels.fyi for URL {url}: {e}")
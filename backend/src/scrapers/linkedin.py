@@ -1,31 +1,33 @@
 import logging
 import traceback
 
-import requests
 from bs4 import BeautifulSoup
 
 from ..constants import LOCATION_GEO_IDS_FOR_LINKEDIN
+from ..database import SessionLocal
 from ..utils import get_posted_date
+from .http_client import http_client
 from .scraper_base import ScraperBase
 
 logger = logging.getLogger("uvicorn")
 
 
 class LinkedInScraper(ScraperBase):
-    def __init__(self, db, role, num_jobs_per_location=1):
-        super().__init__(source="LinkedIn", role=role, db=db)
+    def __init__(self, db, role, num_jobs_per_location=1, session_factory=SessionLocal):
+        super().__init__(
+            source="LinkedIn", role=role, db=db, session_factory=session_factory
+        )
         self.num_jobs_per_location = num_jobs_per_location
 
     def fetch_job_listing_urls(self):
         logger.info("Fetching job listings from LinkedIn...")
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
             for country, city_dict in LOCATION_GEO_IDS_FOR_LINKEDIN.items():
                 for city, geoId in city_dict.items():
                     self.location_to_urls[f"{city}, {country}"] = []
                     for page_num in range(0, 1):
                         url = f"https://www.linkedin.com/jobs/search/?keywords={self.role}&f_WT=2&geoId={geoId}&position=1&pageNum={page_num}"
-                        response = requests.get(url, headers=headers)
+                        response = http_client.get(url)
                         soup = BeautifulSoup(response.text, "html.parser")
 
                         for job_card in soup.select("ul.jobs-search__results-list li"):
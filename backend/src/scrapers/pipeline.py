@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import traceback
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+from ..constants import (
+    LLM_EXTRACTION_BATCH_SIZE,
+    PIPELINE_BATCH_SIZE,
+    PIPELINE_EXTRACT_WORKERS,
+    PIPELINE_FETCH_WORKERS,
+    PIPELINE_PARSE_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+)
+from .fetcher import AsyncFetcher
+
+if TYPE_CHECKING:
+    from .scraper_base import ScraperBase
+
+logger = logging.getLogger("uvicorn")
+
+# Put on a queue once the stage feeding it has finished.
+_DONE = object()
+
+
+class ScrapePipeline:
+    """
+    Streams job listings through fetch → parse → extract → persist → embed.
+
+    Every stage runs its own workers and hands its output to the next stage
+    through a bounded queue, so at most a few queues' worth of pages are held in
+    memory regardless of the size of the run, and jobs are saved (and show up in
+    the API) as soon as they are extracted instead of at the end of the run.
+    The blocking parts (HTML parsing, LLM calls and database/collection writes)
+    run in worker threads.
+    """
+
+    def __init__(
+        self, scraper: "ScraperBase", fetcher: Optional[AsyncFetcher] = None
+    ) -> None:
+        self.scraper = scraper
+        self.fetcher = fetcher or AsyncFetcher()
+        self.counts: Counter[str] = Counter()
+
+    async def run(self, listings: list[tuple[str, str]]) -> dict[str, int]:
+        """Scrape the (location, url) `listings` and return counts for every stage."""
+        self.counts.clear()
+        listings_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        pages_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        parsed_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        extracted_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        saved_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+
+        async def produce() -> None:
+            for listing in listings:
+                await listings_queue.put(listing)
+            await listings_queue.put(_DONE)
+
+        await asyncio.gather(
+            produce(),
+            self._stage(
+                listings_queue, pages_queue, self._fetch, PIPELINE_FETCH_WORKERS
+            ),
+            self._stage(pages_queue, parsed_queue, self._parse, PIPELINE_PARSE_WORKERS),
+            self._batch_stage(
+                parsed_queue,
+                extracted_queue,
+                self._extract,
+                LLM_EXTRACTION_BATCH_SIZE,
+                PIPELINE_EXTRACT_WORKERS,
+            ),
+            self._batch_stage(
+                extracted_queue, saved_queue, self._persist, PIPELINE_BATCH_SIZE
+            ),
+            self._batch_stage(saved_queue, None, self._embed, PIPELINE_BATCH_SIZE),
+        )
+        return dict(self.counts)
+
+    async def _stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        handle: Callable[[Any], Awaitable[Optional[Any]]],
+        num_workers: int,
+    ) -> None:
+        """Run `num_workers` workers passing every item of `inbox` through `handle`."""
+
+        async def worker() -> None:
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Let the sibling workers know as well.
+                    await inbox.put(_DONE)
+                    return
+                try:
+                    result = await handle(item)
+                except Exception:
+                    logger.error(f"Error in scrape pipeline: {traceback.format_exc()}")
+                    continue
+                if result is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+        await outbox.put(_DONE)
+
+    async def _batch_stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        handle: Callable[[list], Awaitable[list]],
+        batch_size: int,
+        num_workers: int = 1,
+    ) -> None:
+        """
+        Run `num_workers` workers passing items of `inbox` through `handle` in
+        batches of whatever has queued up (at most `batch_size`), so a batch never
+        waits for more items.
+        """
+
+        async def worker() -> None:
+            done = False
+            while not done:
+                batch = [await inbox.get()]
+                while (
+                    len(batch) < batch_size
+                    and batch[-1] is not _DONE
+                    and not inbox.empty()
+                ):
+                    batch.append(inbox.get_nowait())
+                if batch[-1] is _DONE:
+                    # Let the sibling workers know as well.
+                    await inbox.put(_DONE)
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+                try:
+                    results = await handle(batch)
+                except Exception:
+                    logger.error(f"Error in scrape pipeline: {traceback.format_exc()}")
+                    continue
+                if outbox is not None:
+                    for result in results:
+                        await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    async def _fetch(self, listing: tuple[str, str]) -> Optional[tuple[str, str, str]]:
+        location, url = listing
+        page_html = await self.fetcher.fetch(url)
+        if page_html is None:
+            self.counts["fetch_failed"] += 1
+            return None
+        self.counts["fetched"] += 1
+        return location, url, page_html
+
+    async def _parse(self, page: tuple[str, str, str]) -> Optional[dict]:
+        location, url, page_html = page
+        parsed_job = await asyncio.to_thread(
+            self.scraper.parse_job_page, url, location, page_html
+        )
+        if parsed_job is None or parsed_job["title"] is None:
+            self.counts["parse_failed"] += 1
+            return None
+        self.counts["parsed"] += 1
+        return parsed_job
+
+    async def _extract(self, parsed_jobs: list[dict]) -> list[dict]:
+        jobs = await asyncio.to_thread(self.scraper.extract_job_details, parsed_jobs)
+        self.counts["extracted"] += len(jobs)
+        return jobs
+
+    async def _persist(self, jobs: list[dict]) -> list[dict]:
+        counts = await asyncio.to_thread(self.scraper.save_to_db, jobs)
+        self.counts.update(counts)
+        if counts["inserted"] + counts["updated"] == 0:
+            return []
+        return [job for job in jobs if job.get("title") is not None]
+
+    async def _embed(self, jobs: list[dict]) -> list:
+        await asyncio.to_thread(self.scraper.add_job_details_to_collection, jobs)
+        self.counts["embedded"] += len(jobs)
+        return []
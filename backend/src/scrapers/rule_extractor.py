@@ -0,0 +1,93 @@
+import re
+from typing import NamedTuple, Optional
+
+REMOTE_PATTERN = re.compile(r"\b(?:fully\s+)?remote\b", re.IGNORECASE)
+NOT_REMOTE_PATTERN = re.compile(
+    r"\b(?:on-?site|in[- ]office|hybrid|not\s+(?:a\s+)?remote)\b", re.IGNORECASE
+)
+# "3+ years of experience", "5-7 years of professional software experience",
+# "minimum 2 yrs experience", "experience: 4+ years"
+EXPERIENCE_PATTERN = re.compile(
+    r"(\d{1,2})\s*(?:\+|plus)?\s*(?:(?:-|–|to)\s*\d{1,2}\s*)?\+?\s*(?:years?|yrs?)"
+    r"(?:\s+\S+){0,5}?\s+experience"
+    r"|experience\s*(?:of|:)?\s*(\d{1,2})\s*\+?\s*(?:years?|yrs?)",
+    re.IGNORECASE,
+)
+# "$150,000.00/yr - $200,000.00/yr", "₹20L - ₹35L", "€60k to €80k per year"
+SALARY_PATTERN = re.compile(
+    r"(?P<currency>[$€£₹])\s?(?P<min>\d[\d,]*(?:\.\d+)?)\s*(?P<min_unit>[kKL])?"
+    r"\s*(?:/\s*(?:yr|year)|per\s+year|a\s+year)?"
+    r"\s*(?:-|–|to)\s*"
+    r"[$€£₹]?\s?(?P<max>\d[\d,]*(?:\.\d+)?)\s*(?P<max_unit>[kKL])?"
+    r"(?![\d,.]*\s*(?:/\s*|per\s+|an\s+)(?:hr|hour))"
+)
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "₹": "INR"}
+SALARY_UNITS = {None: 1, "k": 1_000, "K": 1_000, "L": 100_000}
+# Salary ranges whose maximum is more than this multiple of the minimum are
+# treated as misparsed rather than real.
+MAX_SALARY_RANGE_RATIO = 4
+
+
+class RuleExtraction(NamedTuple):
+    fields: dict
+    # Fraction (0 to 1) of the fields that the rules determined with certainty.
+    confidence: float
+
+
+def _parse_amount(amount: str, unit: Optional[str]) -> int:
+    return int(float(amount.replace(",", "")) * SALARY_UNITS[unit])
+
+
+def extract_remote(page_data: str) -> Optional[bool]:
+    remote = REMOTE_PATTERN.search(page_data) is not None
+    not_remote = NOT_REMOTE_PATTERN.search(page_data) is not None
+    # Mentions of both ("remote, with on-site final rounds") are left to the LLM.
+    if remote == not_remote:
+        return None
+    return remote
+
+
+def extract_required_experience(page_data: str) -> Optional[int]:
+    years = [
+        int(match.group(1) or match.group(2))
+        for match in EXPERIENCE_PATTERN.finditer(page_data)
+    ]
+    return min(years) if years else None
+
+
+def extract_salary(page_data: str) -> Optional[tuple[int, int, str]]:
+    match = SALARY_PATTERN.search(page_data)
+    if match is None:
+        return None
+    salary_min = _parse_amount(match["min"], match["min_unit"] or match["max_unit"])
+    salary_max = _parse_amount(match["max"], match["max_unit"] or match["min_unit"])
+    if not 0 < salary_min <= salary_max <= salary_min * MAX_SALARY_RANGE_RATIO:
+        return None
+    return salary_min, salary_max, CURRENCY_SYMBOLS[match["currency"]]
+
+
+def extract_job_fields(page_data: str) -> RuleExtraction:
+    """
+    Extract `remote`, `required_experience` and the salary range from the text of
+    a job page with precompiled patterns. The confidence is the fraction of these
+    three that were determined, so it is only 1 when nothing is missing.
+    """
+    fields: dict = {"salary_from_levels_fyi": False}
+    score = 0.0
+
+    remote = extract_remote(page_data)
+    if remote is not None:
+        fields["remote"] = remote
+        score += 1
+
+    required_experience = extract_required_experience(page_data)
+    if required_experience is not None:
+        fields["required_experience"] = required_experience
+        score += 1
+
+    salary = extract_salary(page_data)
+    if salary is not None:
+        fields["salary_min"], fields["salary_max"], fields["salary_currency"] = salary
+        score += 1
+
+    return RuleExtraction(fields=fields, confidence=score / 3)
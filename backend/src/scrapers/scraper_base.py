@@ -1,23 +1,65 @@
 import logging
-from sqlite3 import IntegrityError
 import traceback
-import requests
 import time
 from abc import abstractmethod
 from bs4 import BeautifulSoup
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
 from typing import Callable, Dict, List, Optional
 
-from ..deps import db_dependency, job_collection, llm
+from ..constants import (
+    KNOWN_URLS_LOOKUP_CHUNK_SIZE,
+    REFORMAT_JOB_DESCRIPTIONS_WITH_LLM,
+    RULE_EXTRACTION_MIN_CONFIDENCE,
+    SAVE_JOBS_BATCH_SIZE,
+)
+from ..database import (
+    SessionLocal,
+    checkout_waits,
+    get_dialect_insert,
+    task_session,
+)
+from ..deps import job_embedder, llm, vector_store
 from ..models import Job
+from ..recommendations import refresh_recommendations
+from ..utils import get_job_metadata
+from .fetcher import run_coroutine_sync
+from .http_client import http_client
+from .pipeline import ScrapePipeline
+from .rule_extractor import extract_job_fields
 
 logger = logging.getLogger("uvicorn")
 
+# Fields refreshed when a job that is already in the database is saved again.
+JOB_UPSERT_MUTABLE_FIELDS = [
+    "posted_at",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+    "salary_from_levels_fyi",
+    "required_experience",
+    "remote",
+    "is_active",
+]
+
 
 class ScraperBase:
-    def __init__(self, source: str, role: str, db: db_dependency):
+    # Session of the current run, see `run`.
+    db: Session
+
+    def __init__(
+        self,
+        source: str,
+        role: str,
+        db: Optional[Session] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
         self.source = source
         self.role = role
-        self.db = db
+        self.given_db = db
+        if db is not None:
+            self.db = db
+        self.session_factory = session_factory
         self.location_to_urls: Dict[str, list[str]] = {}
         self.job_listings: List[Dict[str, str]] = []
 
@@ -56,13 +98,48 @@ class ScraperBase:
         """Parse the posted date from the soup object fetched from the URL."""
         pass
 
-    def infer_job_details(
-        self, page_data: str, company: str, location: str
-    ) -> dict[str, str]:
-        """Infer job details using LLM."""
+    def get_known_urls(self, urls: list[str]) -> set[str]:
+        """Returns the subset of `urls` that are already saved in the database."""
+        known_urls: set[str] = set()
+        for i in range(0, len(urls), KNOWN_URLS_LOOKUP_CHUNK_SIZE):
+            known_urls.update(
+                url
+                for (url,) in self.db.query(Job.url).filter(
+                    Job.url.in_(urls[i : i + KNOWN_URLS_LOOKUP_CHUNK_SIZE])
+                )
+            )
+        return known_urls
+
+    def drop_known_job_listing_urls(self) -> None:
+        """
+        Keep each URL only under the first location it was listed for and drop
+        URLs that are already in the database, so that we only pay for fetching
+        and extracting postings we have never seen.
+        """
+        seen_urls: set[str] = set()
+        for location, urls in self.location_to_urls.items():
+            unique_urls = []
+            for url in urls:
+                if url not in seen_urls:
+                    seen_urls.add(url)
+                    unique_urls.append(url)
+            self.location_to_urls[location] = unique_urls
+
+        known_urls = self.get_known_urls(list(seen_urls))
+        for location, urls in self.location_to_urls.items():
+            self.location_to_urls[location] = [
+                url for url in urls if url not in known_urls
+            ]
+        logger.info(
+            f"Skipping {len(known_urls)} already known job listings, "
+            + f"{len(seen_urls) - len(known_urls)} new job listings left to scrape."
+        )
+
+    def infer_job_details(self, pages: dict[str, str]) -> dict[str, dict]:
+        """Infer job details of several pages (url → page data) using LLM."""
         try:
-            return llm.extract_job_from_page_data(
-                page_data=page_data,
+            return llm.extract_jobs_from_page_data_batch(
+                pages=pages,
                 source=self.source,
             )
         except Exception:
@@ -70,26 +147,45 @@ class ScraperBase:
             return {}
 
     def add_job_details_to_collection(self, job_details: list[dict[str, str]]) -> None:
-        """Add job details to the collection."""
+        """
+        Add job details to the collection, along with the metadata searches filter
+        on. Jobs already in the collection get their embedding and metadata updated.
+        Only jobs whose title and description were never embedded before are
+        embedded, and the jobs are linked to their embeddings by content hash.
+        """
         try:
-            job_collection.add(
-                documents=[
-                    job_detail["title"] + job_detail["description"]
-                    for job_detail in job_details
-                ],
-                ids=[job_detail["url"] for job_detail in job_details],
-            )
+            urls = [job_detail["url"] for job_detail in job_details]
+            documents = [
+                job_detail["title"] + job_detail["description"]
+                for job_detail in job_details
+            ]
+            # Its own session, as the persist stage of the pipeline may be using
+            # the one of the scraper at the same time.
+            with Session(self.db.get_bind()) as db:
+                hashes, embeddings = job_embedder.embed(db, documents)
+                vector_store.upsert(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=[
+                        get_job_metadata({**job_detail, "source": self.source})
+                        for job_detail in job_details
+                    ],
+                    ids=urls,
+                )
+                db.execute(
+                    update(Job)
+                    .where(Job.url.in_(urls))
+                    .values(content_hash=case(dict(zip(urls, hashes)), value=Job.url))
+                )
+                db.commit()
         except Exception as e:
             logger.error(f"Error adding job details to collection: {e}")
 
-    def parse_job_details(self, url: str, location: str):
+    def parse_job_page(self, url: str, location: str, page_html: str) -> Optional[dict]:
+        """Parse everything that does not need the LLM from a fetched job page."""
         logger.info(f"Parsing job details from {url}...")
-        logger.info(f"Sleeping for 10 seconds before starting to scrape")
-        time.sleep(10)
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(page_html, "html.parser")
             soup_find = soup.find("div", class_="top-card-layout__card")
             page_data = ""
             if soup_find:
@@ -99,73 +195,118 @@ class ScraperBase:
             )
             if soup_find:
                 page_data += soup_find.get_text(strip=True, separator=" ")
-            company = self.parse_job_company(soup)
-            job_details = {
-                **self.infer_job_details(page_data, company, location),
+            return {
                 "title": self.parse_job_title(soup),
-                "company": company,
+                "company": self.parse_job_company(soup),
                 "location": location,
                 "url": url,
                 "posted_at": self.parse_posted_at(soup),
                 "role": self.role,
+                "page_data": page_data,
+                "parsed_description": self.parse_job_description(soup),
             }
-            if "description" not in job_details:
-                description = self.parse_job_description(soup)
-                if description:
-                    job_details["description"] = description
-            return job_details
-        except Exception as e:
+        except Exception:
             logger.error(
                 f"Error parsing job details from {url}: {traceback.format_exc()}"
             )
-            return {
-                "title": None,
-                "company": None,
-                "location": None,
-                "description": None,
-                "required_experience": None,
-                "url": url,
-                "posted_at": None,
-                "salary_min": None,
-                "salary_max": None,
-                "salary_currency": None,
-                "salary_from_levels_fyi": False,
-                "role": self.role,
-                "remote": None,
+            return None
+
+    def extract_job_details(self, parsed_jobs: list[dict]) -> list[dict]:
+        """
+        Complete jobs parsed by `parse_job_page` with the details extracted by
+        patterns. Jobs for which the patterns are not confident are sent to the
+        LLM together, in a single batch, and the details it inferred take
+        precedence over the patterns, which only fill in what it left out.
+        """
+        rule_extractions = [
+            extract_job_fields(parsed_job["page_data"]) for parsed_job in parsed_jobs
+        ]
+        pages_for_llm: dict[str, str] = {}
+        for parsed_job, rule_extraction in zip(parsed_jobs, rule_extractions):
+            if (
+                rule_extraction.confidence >= RULE_EXTRACTION_MIN_CONFIDENCE
+                and not REFORMAT_JOB_DESCRIPTIONS_WITH_LLM
+            ):
+                logger.info(
+                    f"Extracted job details from {parsed_job['url']} without the LLM "
+                    + f"(confidence {rule_extraction.confidence:.2f})"
+                )
+            else:
+                pages_for_llm[parsed_job["url"]] = parsed_job["page_data"]
+        inferred_job_details = (
+            self.infer_job_details(pages_for_llm) if pages_for_llm else {}
+        )
+
+        jobs = []
+        for parsed_job, rule_extraction in zip(parsed_jobs, rule_extractions):
+            parsed_job = dict(parsed_job)
+            parsed_job.pop("page_data")
+            parsed_description = parsed_job.pop("parsed_description")
+            job_details = {
+                **rule_extraction.fields,
+                **inferred_job_details.get(parsed_job["url"], {}),
+                **parsed_job,
+            }
+            if "description" not in job_details and parsed_description:
+                job_details["description"] = parsed_description
+            jobs.append(job_details)
+        return jobs
+
+    def save_to_db(self, jobs: list[dict]) -> dict[str, int]:
+        """
+        Save the scraped jobs in a single transaction. New jobs are inserted and
+        jobs whose URL is already known get their mutable fields refreshed via
+        INSERT ... ON CONFLICT DO UPDATE, a batch of rows per statement.
+        Returns the number of inserted, updated and skipped jobs.
+        """
+        counts = {"inserted": 0, "updated": 0, "skipped": 0}
+        rows: dict[str, dict] = {}
+        for job_dict in jobs:
+            if job_dict.get("title") is None or job_dict["url"] in rows:
+                counts["skipped"] += 1
+                continue
+            rows[job_dict["url"]] = {
+                "title": job_dict["title"],
+                "company": job_dict["company"],
+                "location": job_dict["location"],
+                "role": job_dict["role"],
+                "description": job_dict.get("description"),
+                "required_experience": job_dict.get("required_experience"),
+                "url": job_dict["url"],
+                "source": self.source,
+                "salary_min": job_dict.get("salary_min"),
+                "salary_max": job_dict.get("salary_max"),
+                "salary_currency": job_dict.get("salary_currency", "USD"),
+                "salary_from_levels_fyi": job_dict.get("salary_from_levels_fyi", False),
+                "posted_at": job_dict.get("posted_at"),
+                "remote": job_dict.get("remote"),
+                "is_active": True,
             }
+        if not rows:
+            return counts
 
-    def save_to_db(self, jobs: list[dict]):
         try:
-            for job_dict in jobs:
-                if "title" in job_dict and job_dict["title"] is not None:
-                    job = Job(
-                        title=job_dict["title"],
-                        company=job_dict["company"],
-                        location=job_dict["location"],
-                        role=job_dict["role"],
-                        description=job_dict["description"],
-                        required_experience=job_dict.get("required_experience"),
-                        url=job_dict["url"],
-                        source=self.source,
-                        salary_min=job_dict.get("salary_min"),
-                        salary_max=job_dict.get("salary_max"),
-                        salary_currency=job_dict.get("salary_currency", "USD"),
-                        salary_from_levels_fyi=job_dict.get(
-                            "salary_from_levels_fyi", False
-                        ),
-                        posted_at=job_dict["posted_at"],
-                        remote=job_dict["remote"],
-                    )
-                    self.db.add(job)
-                    self.db.commit()
-        except IntegrityError:
-            logger.error(
-                f"Integrity error while saving to DB: {traceback.format_exc()}"
-            )
-            self.db.rollback()
+            known_urls = self.get_known_urls(list(rows.keys()))
+            insert = get_dialect_insert(self.db)
+            all_rows = list(rows.values())
+            for i in range(0, len(all_rows), SAVE_JOBS_BATCH_SIZE):
+                statement = insert(Job).values(all_rows[i : i + SAVE_JOBS_BATCH_SIZE])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[Job.url],
+                    set_={
+                        field: statement.excluded[field]
+                        for field in JOB_UPSERT_MUTABLE_FIELDS
+                    },
+                )
+                self.db.execute(statement)
+            self.db.commit()
+            counts["updated"] += len(known_urls)
+            counts["inserted"] += len(rows) - len(known_urls)
         except Exception:
             logger.error(f"Error while saving to DB: {traceback.format_exc()}")
             self.db.rollback()
+            counts["skipped"] += len(rows)
+        return counts
 
     def log_jobs(self, jobs: list[dict]):
         for job in jobs:
@@ -188,26 +329,43 @@ Salary From Levels FYI: {job.get("salary_from_levels_fyi", False)}
             )
 
     def run(self):
-        """Main method to run the scraper."""
+        """
+        Main method to run the scraper. Unless the scraper was given a session,
+        every run checks a fresh one out of the pool, so scrapers running on
+        different scheduler threads never share one, nor hold one between runs.
+        """
+        if self.given_db is not None:
+            self.scrape()
+            return
+        with task_session(self.session_factory) as db:
+            self.db = db
+            self.scrape()
+
+    def scrape(self):
+        """Scrape, save and embed the new job listings, in the session `self.db`."""
         start_time = time.time()
         self.fetch_job_listing_urls()
         logger.info(
             f"Fetched {sum(len(urls) for urls in self.location_to_urls.values())} "
             + f"job listings in {time.time() - start_time:.2f} seconds."
         )
-        parse_jobs_start_time = time.time()
-        jobs = [
-            self.parse_job_details(job_listing_url, location)
-            for location, job_listing_urls in self.location_to_urls.items()
-            for job_listing_url in job_listing_urls
-        ]
-        logger.info(
-            f"Parsed {len(jobs)} job listings in {time.time() - parse_jobs_start_time:.2f} seconds."
+        self.drop_known_job_listing_urls()
+        counts = run_coroutine_sync(
+            ScrapePipeline(self).run(
+                [
+                    (location, job_listing_url)
+                    for location, job_listing_urls in self.location_to_urls.items()
+                    for job_listing_url in job_listing_urls
+                ]
+            )
         )
-        save_jobs_start_time = time.time()
-        self.save_to_db(jobs)
-        self.add_job_details_to_collection(jobs)
         logger.info(
-            f"Saved {len(jobs)} job listings to the database in {time.time() - save_jobs_start_time:.2f} seconds."
+            f"Scraping completed in {time.time() - start_time:.2f} seconds: {counts}"
         )
-        logger.info(f"Scraping completed in {time.time() - start_time:.2f} seconds.")
+        logger.info(f"Scraper HTTP client stats: {http_client.stats()}")
+        logger.info(f"LLM extraction cache stats: {llm.extraction_cache.stats()}")
+        logger.info(f"LLM model stats: {llm.router.stats()}")
+        logger.info(f"LLM token usage: {llm.token_stats()}")
+        logger.info(f"Database pool checkout waits: {checkout_waits.stats()}")
+        # The new jobs are candidates for every role, not just the scraped one.
+        refresh_recommendations(self.db)
@@ -1,4 +1,5 @@
 from ..constants import ROLES
+from ..database import SessionLocal
 from .linkedin import LinkedInScraper
 from .scraper_base import ScraperBase
 
@@ -8,9 +9,12 @@ class ScraperFactory:
     A factory class to create scraper instances based on the provided scraper type.
     """
 
-    def __init__(self, db) -> None:
+    def __init__(self, db=None, session_factory=SessionLocal) -> None:
         self.scrapers: dict[str, list[ScraperBase]] = {
-            "LinkedIn": list(LinkedInScraper(db, role) for role in ROLES),
+            "LinkedIn": list(
+                LinkedInScraper(db, role, session_factory=session_factory)
+                for role in ROLES
+            ),
             # Add other scrappers here as needed
         }
 
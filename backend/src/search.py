@@ -0,0 +1,144 @@
+import re
+from typing import Any, Optional
+
+from sqlalchemy import Connection, column, event, select, table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from .constants import RECIPROCAL_RANK_FUSION_K
+from .models import Job
+
+# Full-text index over the title, company and description of the jobs: an FTS5
+# table kept in sync by triggers on SQLite, and an expression GIN index on Postgres.
+# Only when the indexed text changes, so that marking jobs inactive in bulk does
+# not rewrite their index entries.
+SQLITE_JOBS_FTS_UPDATE_TRIGGER_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS jobs_fts_after_update "
+    "AFTER UPDATE OF title, company, description ON jobs BEGIN "
+    "INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description) "
+    "VALUES ('delete', old.id, old.title, old.company, old.description); "
+    "INSERT INTO jobs_fts (rowid, title, company, description) "
+    "VALUES (new.id, new.title, new.company, new.description); END"
+)
+SQLITE_FULL_TEXT_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+    "title, company, description, content='jobs', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS jobs_fts_after_insert AFTER INSERT ON jobs BEGIN "
+    "INSERT INTO jobs_fts (rowid, title, company, description) "
+    "VALUES (new.id, new.title, new.company, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS jobs_fts_after_delete AFTER DELETE ON jobs BEGIN "
+    "INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description) "
+    "VALUES ('delete', old.id, old.title, old.company, old.description); END",
+    SQLITE_JOBS_FTS_UPDATE_TRIGGER_DDL,
+]
+POSTGRES_JOBS_TSVECTOR = (
+    "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(company, '') "
+    "|| ' ' || coalesce(description, ''))"
+)
+POSTGRES_FULL_TEXT_INDEX_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_jobs_full_text ON jobs USING GIN ({POSTGRES_JOBS_TSVECTOR})"
+]
+
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+jobs_fts = table("jobs_fts", column("rowid"))
+
+
+def create_full_text_index(connection: Connection) -> None:
+    """Create the full-text index of the jobs table if it does not exist yet."""
+    if connection.dialect.name == "postgresql":
+        for statement in POSTGRES_FULL_TEXT_INDEX_DDL:
+            connection.execute(text(statement))
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")
+    ).first()
+    for statement in SQLITE_FULL_TEXT_INDEX_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        # Index the jobs saved before the index existed.
+        connection.execute(text("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')"))
+
+
+@event.listens_for(Job.__table__, "after_create")
+def _create_full_text_index_with_jobs_table(target, connection, **kw) -> None:
+    create_full_text_index(connection)
+
+
+def get_job_filter_conditions(
+    location: str = "",
+    source: str = "",
+    role: str = "",
+    remote: bool = False,
+    min_experience_years: Optional[int] = None,
+    max_experience_years: Optional[int] = None,
+) -> list[ColumnElement[bool]]:
+    """SQL conditions of the job search filters."""
+    conditions: list[ColumnElement[bool]] = [Job.is_active == True]
+    if location:
+        conditions.append(Job.location == location)
+    if source:
+        conditions.append(Job.source == source)
+    if role:
+        conditions.append(Job.role == role)
+    if remote:
+        conditions.append(Job.remote == True)
+    if min_experience_years is not None:
+        conditions.append(Job.required_experience >= min_experience_years)
+    if max_experience_years is not None:
+        conditions.append(Job.required_experience <= max_experience_years)
+    return conditions
+
+
+def full_text_search(
+    db: Session,
+    search_query: str,
+    conditions: list[ColumnElement[bool]],
+    limit: int,
+) -> list[str]:
+    """
+    URLs of the `limit` jobs best matching any of the terms of `search_query`,
+    best first. Jobs matching more (and rarer) terms rank higher, and jobs
+    matching equally well are ordered by URL.
+    """
+    terms = SEARCH_TERM_PATTERN.findall(search_query)
+    if not terms:
+        return []
+    statement: Any
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = "to_tsquery('english', :search_terms)"
+        statement = (
+            select(Job.url)
+            .where(text(f"{POSTGRES_JOBS_TSVECTOR} @@ {tsquery}"))
+            .order_by(
+                text(f"ts_rank({POSTGRES_JOBS_TSVECTOR}, {tsquery}) DESC"), Job.url
+            )
+        )
+        search_terms = " | ".join(terms)
+    else:
+        statement = (
+            select(Job.url)
+            .join(jobs_fts, jobs_fts.c.rowid == Job.id)
+            .where(text("jobs_fts MATCH :search_terms"))
+            .order_by(text("bm25(jobs_fts)"), Job.url)
+        )
+        search_terms = " OR ".join(f'"{term}"' for term in terms)
+    statement = statement.where(*conditions).limit(limit)
+    return list(db.scalars(statement, {"search_terms": search_terms}))
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[str]], k: int = RECIPROCAL_RANK_FUSION_K
+) -> list[str]:
+    """
+    Fuse several rankings of the same items, best first. Every item scores
+    1 / (k + rank) in each ranking it appears in, so items ranked well by
+    several retrievers beat items ranked first by only one of them. Items
+    scoring the same are ordered by themselves, so the fused ranking (and its
+    pages) don't depend on the order of equal scores.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1 / (k + rank)
+    return sorted(scores, key=lambda item: (-scores[item], item))
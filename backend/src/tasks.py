@@ -0,0 +1,193 @@
+from datetime import datetime, timezone
+from dateutil.relativedelta import relativedelta
+import functools
+import logging
+import traceback
+from typing import Any, Callable
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.base import BaseScheduler
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from .constants import (
+    EXPIRE_JOBS_AFTER_DAYS,
+    EXPIRE_JOBS_CHUNK_SIZE,
+    JOB_COLLECTION_BACKFILL_CHUNK_SIZE,
+    LEASE_HEARTBEAT_SECONDS,
+)
+from .database import task_session
+from .deps import vector_store
+from .lease import LeaseHolder
+from .models import Job, Recommendation
+from .recommendations import refresh_recommendations
+from .scrapers.scraper_factory import ScraperFactory
+from .utils import JOB_METADATA_FIELDS, get_job_metadata
+
+logger = logging.getLogger("uvicorn")
+
+
+def mark_jobs_inactive(db: Session) -> None:
+    """
+    Mark the jobs posted more than `EXPIRE_JOBS_AFTER_DAYS` days ago inactive,
+    `EXPIRE_JOBS_CHUNK_SIZE` jobs per UPDATE and transaction, so neither memory
+    nor the time rows stay locked grow with the number of jobs.
+    """
+    try:
+        cutoff_date = datetime.now(timezone.utc) - relativedelta(
+            days=EXPIRE_JOBS_AFTER_DAYS
+        )
+        num_updated = 0
+        while True:
+            chunk_ids = (
+                select(Job.id)
+                .where(Job.posted_at < cutoff_date, Job.is_active == True)
+                .limit(EXPIRE_JOBS_CHUNK_SIZE)
+            )
+            result: Any = db.execute(
+                update(Job).where(Job.id.in_(chunk_ids)).values(is_active=False)
+            )
+            db.commit()
+            if result.rowcount == 0:
+                break
+            num_updated += result.rowcount
+            logger.info(f"{num_updated} jobs marked as inactive so far.")
+        logger.info(f"{num_updated} jobs marked as inactive.")
+    except Exception:
+        logger.error(f"Error marking old jobs inactive: {traceback.format_exc()}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def expire_jobs(db: Session) -> None:
+    """
+    Delete the inactive jobs, their embeddings and their recommendations,
+    `EXPIRE_JOBS_CHUNK_SIZE` jobs at a time. The embeddings of a chunk are
+    deleted before its transaction commits, so a failed chunk is retried whole
+    on the next run instead of leaving embeddings without a job behind.
+    """
+    try:
+        num_deleted = 0
+        while True:
+            chunk_ids = (
+                select(Job.id)
+                .where(Job.is_active == False)
+                .limit(EXPIRE_JOBS_CHUNK_SIZE)
+            )
+            deleted_jobs = db.execute(
+                delete(Job).where(Job.id.in_(chunk_ids)).returning(Job.id, Job.url)
+            ).all()
+            if not deleted_jobs:
+                break
+            job_ids = [job_id for job_id, _ in deleted_jobs]
+            db.execute(delete(Recommendation).where(Recommendation.job_id.in_(job_ids)))
+            vector_store.delete(ids=[url for _, url in deleted_jobs])
+            db.commit()
+            num_deleted += len(deleted_jobs)
+            logger.info(f"{num_deleted} jobs deleted so far.")
+        logger.info(f"{num_deleted} jobs deleted.")
+        refresh_recommendations(db)
+    except Exception:
+        logger.error(f"Error deleting inactive jobs: {traceback.format_exc()}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def backfill_job_collection_metadata(db: Session) -> None:
+    """Add the metadata searches filter on to jobs embedded before it was stored."""
+    try:
+        num_updated = 0
+        offset = 0
+        while True:
+            entries = vector_store.get_metadatas(
+                limit=JOB_COLLECTION_BACKFILL_CHUNK_SIZE, offset=offset
+            )
+            if not entries:
+                break
+            offset += len(entries)
+            urls = [url for url, metadata in entries if not metadata]
+            if not urls:
+                continue
+            jobs = db.query(Job).filter(Job.url.in_(urls)).all()
+            if not jobs:
+                continue
+            vector_store.update_metadatas(
+                ids=[str(job.url) for job in jobs],
+                metadatas=[
+                    get_job_metadata(
+                        {field: getattr(job, field) for field in JOB_METADATA_FIELDS}
+                    )
+                    for job in jobs
+                ],
+            )
+            num_updated += len(jobs)
+        logger.info(f"Backfilled the metadata of {num_updated} embedded jobs.")
+    except Exception:
+        logger.error(f"Error backfilling job metadata: {traceback.format_exc()}")
+    finally:
+        db.close()
+
+
+def run_in_task_session(
+    func: Callable[[Session], None], session_factory: Callable[[], Session]
+) -> Callable[[], None]:
+    """`func`, called with a fresh session of `session_factory` on every run."""
+
+    @functools.wraps(func)
+    def run() -> None:
+        with task_session(session_factory) as db:
+            func(db)
+
+    return run
+
+
+def schedule_background_tasks(
+    scheduler: BaseScheduler,
+    session_factory: Callable[[], Session],
+    lease: LeaseHolder,
+) -> None:
+    """
+    Schedule the scrapers (first run right away, in the background), the daily
+    expiry of old jobs and the one-off backfill of the job metadata. Every API
+    and worker process schedules them, but they only run in the process holding
+    `lease`, which is renewed (or taken over) by a heartbeat. Every task run gets
+    its own session of `session_factory`, so runs can overlap safely.
+    """
+    # The heartbeat has its own thread, so it isn't delayed by long tasks taking
+    # up the workers, and late beats are skipped as the next one is due soon.
+    scheduler.add_executor(ThreadPoolExecutor(1), "lease")
+    scheduler.add_job(
+        lease.acquire,
+        trigger="interval",
+        seconds=LEASE_HEARTBEAT_SECONDS,
+        next_run_time=datetime.now(timezone.utc),
+        executor="lease",
+        coalesce=True,
+        misfire_grace_time=max(LEASE_HEARTBEAT_SECONDS // 4, 1),
+    )
+    for scraper in ScraperFactory(session_factory=session_factory).get_all_scrapers():
+        scheduler.add_job(
+            lease.guard(scraper.run),
+            name=f"{type(scraper).__name__}.run",
+            trigger="interval",
+            seconds=60 * 60 * 6,  # Run every 6 hours
+            next_run_time=datetime.now(timezone.utc),
+        )
+    scheduler.add_job(
+        lease.guard(run_in_task_session(mark_jobs_inactive, session_factory)),
+        trigger="interval",
+        seconds=60 * 60 * 24,  # Run everyday
+    )
+    scheduler.add_job(
+        lease.guard(run_in_task_session(expire_jobs, session_factory)),
+        trigger="interval",
+        seconds=60 * 60 * 24,  # Run everyday
+    )
+    # Runs once, in the background
+    scheduler.add_job(
+        lease.guard(
+            run_in_task_session(backfill_job_collection_metadata, session_factory)
+        )
+    )
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
 import bcrypt
 import re
+from typing import Any, Optional
 
 from .constants import LOCATION_GEO_IDS_FOR_LINKEDIN
 
@@ -65,3 +66,44 @@ def get_normalized_locations_list_string():
         for country, city_dict in LOCATION_GEO_IDS_FOR_LINKEDIN.items()
         for city in city_dict.keys()
     ]
+
+
+# Job fields stored as metadata of the job embeddings, so vector queries can be
+# filtered on them.
+JOB_METADATA_FIELDS = ["location", "source", "role", "remote", "required_experience"]
+
+
+def get_job_metadata(job: dict[str, Any]) -> dict[str, Any]:
+    # Missing values are left out, the vector store does not accept them.
+    return {
+        field: job[field] for field in JOB_METADATA_FIELDS if job.get(field) is not None
+    }
+
+
+def get_job_metadata_filter(
+    location: str = "",
+    source: str = "",
+    role: str = "",
+    remote: bool = False,
+    min_experience_years: Optional[int] = None,
+    max_experience_years: Optional[int] = None,
+) -> Optional[dict[str, Any]]:
+    """`where` clause of a vector query matching the job search filters."""
+    conditions: list[dict[str, Any]] = []
+    if location:
+        conditions.append({"location": location})
+    if source:
+        conditions.append({"source": source})
+    if role:
+        conditions.append({"role": role})
+    if remote:
+        conditions.append({"remote": True})
+    if min_experience_years is not None:
+        conditions.append({"required_experience": {"$gte": min_experience_years}})
+    if max_experience_years is not None:
+        conditions.append({"required_experience": {"$lte": max_experience_years}})
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
@@ -0,0 +1,695 @@
+import contextlib
+import json
+import logging
+import operator
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional, Sequence
+
+import chromadb
+import numpy as np
+from chromadb import Collection, Documents, Embeddings
+
+from .constants import (
+    CHROMA_HOST,
+    CHROMA_PORT,
+    VECTOR_STORE_DTYPE,
+    VECTOR_STORE_INDEX,
+    VECTOR_STORE_IVF_LISTS,
+    VECTOR_STORE_IVF_MIN_POINTS_PER_LIST,
+    VECTOR_STORE_IVF_PROBES,
+    VECTOR_STORE_LOG_MIN_COMPACT_BYTES,
+    VECTOR_STORE_PATH,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# (id, cosine distance) of the nearest entries to a query, nearest first.
+QueryResult = list[tuple[str, float]]
+EmbeddingFunction = Callable[[Documents], Embeddings]
+
+WHERE_OPERATORS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+
+class VectorStore(ABC):
+    """
+    Embeddings of the jobs keyed by job URL, along with the metadata searches
+    filter on. `where` filters use the Chroma syntax, e.g.
+    `{"$and": [{"role": "Software Engineer"}, {"required_experience": {"$lte": 3}}]}`.
+    """
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: list[str],
+        documents: Optional[list[str]] = None,
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        metadatas: Optional[list[dict[str, Any]]] = None,
+    ) -> None:
+        """Add or replace entries, embedding `documents` unless `embeddings` are given."""
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        query_texts: Optional[list[str]] = None,
+        query_embeddings: Optional[Sequence[Sequence[float]]] = None,
+        n_results: int = 10,
+        where: Optional[dict[str, Any]] = None,
+    ) -> list[QueryResult]:
+        """Nearest entries matching `where` to every query text or embedding."""
+        pass
+
+    @abstractmethod
+    def delete(self, ids: list[str]) -> None:
+        pass
+
+    @abstractmethod
+    def get_metadatas(
+        self, limit: int, offset: int = 0
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """(id, metadata) of a page of the entries, in a stable order."""
+        pass
+
+    @abstractmethod
+    def update_metadatas(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        """Merge `metadatas` into the metadata of the entries with `ids`."""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+
+class ChromaVectorStore(VectorStore):
+    """Vector store backed by a Chroma collection in the cosine space."""
+
+    def __init__(self, collection: Collection) -> None:
+        self.collection = collection
+
+    def upsert(
+        self,
+        ids: list[str],
+        documents: Optional[list[str]] = None,
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        metadatas: Optional[list[dict[str, Any]]] = None,
+    ) -> None:
+        self.collection.upsert(
+            ids=ids,
+            documents=documents,
+            embeddings=embeddings,  # type: ignore[arg-type]
+            metadatas=metadatas,  # type: ignore[arg-type]
+        )
+
+    def query(
+        self,
+        query_texts: Optional[list[str]] = None,
+        query_embeddings: Optional[Sequence[Sequence[float]]] = None,
+        n_results: int = 10,
+        where: Optional[dict[str, Any]] = None,
+    ) -> list[QueryResult]:
+        results = self.collection.query(
+            query_texts=query_texts,
+            query_embeddings=query_embeddings,  # type: ignore[arg-type]
+            n_results=n_results,
+            where=where,
+            include=["distances"],  # type: ignore[list-item]
+        )
+        return [
+            list(zip(ids, distances))
+            for ids, distances in zip(results["ids"], results["distances"] or [])
+        ]
+
+    def delete(self, ids: list[str]) -> None:
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def get_metadatas(
+        self, limit: int, offset: int = 0
+    ) -> list[tuple[str, dict[str, Any]]]:
+        entries = self.collection.get(
+            include=["metadatas"],  # type: ignore[list-item]
+            limit=limit,
+            offset=offset,
+        )
+        return [
+            (id, dict(metadata or {}))
+            for id, metadata in zip(entries["ids"], entries["metadatas"] or [])
+        ]
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        self.collection.update(ids=ids, metadatas=metadatas)  # type: ignore[arg-type]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store keeping normalized embeddings in a memory-mapped
+    matrix, quantized to float16 or to int8 with a scale per row.
+
+    Queries are answered by brute force over the whole matrix, or with
+    `index="ivf"` over the `nprobe` inverted lists whose (spherical k-means)
+    centroids are nearest to the query. The index is trained once there are
+    enough entries and retrained whenever their number doubles. All operations
+    hold a lock, as the matrix may be reallocated when it grows.
+
+    Ids and metadata are kept next to the matrix in a JSON snapshot, along with
+    the IVF centroids and lists of its generation, and writes append the rows
+    they changed to the log of the generation. A new snapshot is written when
+    the index is retrained or the log outgrows the snapshot.
+
+    Only one process (the worker) should write to the store. Other processes
+    replay the log whenever it grew, and reload the store when the snapshot was
+    replaced.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        dtype: str = "float16",
+        index: str = "flat",
+        nlist: int = VECTOR_STORE_IVF_LISTS,
+        nprobe: int = VECTOR_STORE_IVF_PROBES,
+    ) -> None:
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported vector store dtype {dtype}")
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"Unsupported vector store index {index}")
+        self.path = path
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self.index = index
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._ids: list[Optional[str]] = []
+        self._metadatas: list[Optional[dict[str, Any]]] = []
+        self._rows: dict[str, int] = {}
+        self._free_rows: set[int] = set()
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        # Per-row arrays (metadata columns, valid rows) cached until the next write.
+        self._columns: dict[str, np.ndarray] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._trained_count = 0
+        self._generation = 0
+        self._state_mtime: Optional[int] = None
+        self._state_size = 0
+        self._log_offset = 0
+        # Whether the next write should start a new generation rather than log.
+        self._needs_snapshot = True
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.path, "embeddings.npy")
+
+    @property
+    def _scales_path(self) -> str:
+        return os.path.join(self.path, "scales.npy")
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.path, "state.json")
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"log-{generation}.jsonl")
+
+    def _ivf_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"ivf-{generation}.npz")
+
+    def _load(self) -> None:
+        if not os.path.exists(self._state_path):
+            return
+        with open(self._state_path) as f:
+            state = json.load(f)
+            stat = os.fstat(f.fileno())
+        if state["dtype"] != self.dtype.name:
+            raise ValueError(
+                f"Vector store at {self.path} holds {state['dtype']} embeddings, "
+                + f"not {self.dtype.name}"
+            )
+        # Stores saved before there were generations have neither log nor index.
+        self._generation = state.get("generation", 0)
+        self._needs_snapshot = "generation" not in state
+        self._ids = state["ids"]
+        self._metadatas = state["metadatas"]
+        self._rows = {id: row for row, id in enumerate(self._ids) if id is not None}
+        self._free_rows = {row for row, id in enumerate(self._ids) if id is None}
+        self._state_mtime = stat.st_mtime_ns
+        self._state_size = stat.st_size
+        self._centroids = None
+        self._lists = np.zeros(len(self._ids), dtype=np.int32)
+        self._trained_count = 0
+        ivf_path = self._ivf_path(self._generation)
+        if self.index == "ivf" and os.path.exists(ivf_path):
+            with np.load(ivf_path) as ivf:
+                if len(ivf["centroids"]) == self.nlist:
+                    self._centroids = ivf["centroids"]
+                    self._lists = ivf["lists"]
+                    self._trained_count = state["trained_count"]
+        self._log_offset = 0
+        self._replay_log()
+        self._open_matrix()
+        self._columns = {}
+        self._train_if_needed()
+
+    def _open_matrix(self) -> None:
+        self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+        self._scales = np.load(self._scales_path, mmap_mode="r+")
+
+    def _replay_log(self) -> bool:
+        """Apply the rows appended to the log since it was read, if any."""
+        try:
+            with open(self._log_path(self._generation), "rb") as f:
+                f.seek(self._log_offset)
+                appended = f.read()
+        except FileNotFoundError:
+            return False
+        # A write may be in progress, its rows are replayed once complete.
+        end = appended.rfind(b"\n") + 1
+        for line in appended[:end].splitlines():
+            for row, id, metadata, list_ in json.loads(line):
+                self._set_row(row, id, metadata, list_)
+        self._log_offset += end
+        return end > 0
+
+    def _reload_if_changed(self) -> None:
+        """Load the writes of other processes, if any."""
+        try:
+            state_mtime = os.stat(self._state_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if state_mtime != self._state_mtime:
+            self._load()
+        elif self._replay_log():
+            # The matrix may have been reallocated to hold the new rows.
+            self._open_matrix()
+            self._columns = {}
+
+    def _set_row(
+        self,
+        row: int,
+        id: Optional[str],
+        metadata: Optional[dict[str, Any]],
+        list_: Optional[int] = None,
+    ) -> None:
+        """Store the entry `id` (or none if deleted) in `row`."""
+        while len(self._ids) <= row:
+            self._free_rows.add(len(self._ids))
+            self._ids.append(None)
+            self._metadatas.append(None)
+        previous_id = self._ids[row]
+        if previous_id is not None:
+            del self._rows[previous_id]
+        self._free_rows.discard(row)
+        self._ids[row] = id
+        self._metadatas[row] = metadata
+        if id is None:
+            self._free_rows.add(row)
+        else:
+            self._rows[id] = row
+        if list_ is not None:
+            self._grow_lists()
+            self._lists[row] = list_
+
+    def _save(self, changes: list[list[Any]]) -> None:
+        """
+        Persist the changed rows, each given as `[row, id, metadata, list]`, by
+        appending them to the log, or in a new snapshot.
+        """
+        if self._matrix is not None and self._scales is not None:
+            self._matrix.flush()
+            self._scales.flush()
+        if self._needs_snapshot or self._log_offset > max(
+            self._state_size, VECTOR_STORE_LOG_MIN_COMPACT_BYTES
+        ):
+            self._save_snapshot()
+            return
+        line = (json.dumps(changes) + "\n").encode()
+        with open(self._log_path(self._generation), "ab") as f:
+            f.write(line)
+        self._log_offset += len(line)
+
+    def _save_snapshot(self) -> None:
+        """Start a new generation with the current entries and IVF index."""
+        generation = self._generation + 1
+        if self._centroids is not None:
+            self._grow_lists()
+            np.savez(
+                self._ivf_path(generation),
+                centroids=self._centroids,
+                lists=self._lists[: len(self._ids)],
+            )
+        open(self._log_path(generation), "wb").close()
+        with open(self._state_path + ".tmp", "w") as f:
+            json.dump(
+                {
+                    "dtype": self.dtype.name,
+                    "generation": generation,
+                    "ids": self._ids,
+                    "metadatas": self._metadatas,
+                    "trained_count": self._trained_count,
+                },
+                f,
+            )
+        os.replace(self._state_path + ".tmp", self._state_path)
+        stat = os.stat(self._state_path)
+        self._state_mtime = stat.st_mtime_ns
+        self._state_size = stat.st_size
+        self._generation = generation
+        self._log_offset = 0
+        self._needs_snapshot = False
+        # Other processes may still be loading the previous generation.
+        for path in [self._log_path(generation - 2), self._ivf_path(generation - 2)]:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def _ensure_capacity(self, num_rows: int, dim: int) -> None:
+        """Grow the matrix (by doubling) so it holds at least `num_rows` rows."""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(
+                f"Expected embeddings of dimension {self._matrix.shape[1]}, got {dim}"
+            )
+        if num_rows <= capacity:
+            return
+        capacity = max(num_rows, 2 * capacity, 1024)
+        for path, shape, dtype in [
+            (self._matrix_path, (capacity, dim), self.dtype),
+            (self._scales_path, (capacity,), np.dtype(np.float32)),
+        ]:
+            grown = np.lib.format.open_memmap(
+                path + ".tmp", mode="w+", dtype=dtype, shape=shape
+            )
+            old = self._matrix if path == self._matrix_path else self._scales
+            if old is not None:
+                grown[: old.shape[0]] = old
+            grown.flush()
+            del grown
+            os.replace(path + ".tmp", path)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+        self._scales = np.load(self._scales_path, mmap_mode="r+")
+
+    def _embed(
+        self,
+        texts: Optional[list[str]],
+        embeddings: Optional[Sequence[Sequence[float]]],
+    ) -> np.ndarray:
+        """Normalized float32 embeddings, computed from `texts` if not given."""
+        if embeddings is None:
+            if texts is None or self.embedding_function is None:
+                raise ValueError("Either embeddings or an embedding function is needed")
+            vectors = np.asarray(self.embedding_function(texts), dtype=np.float32)
+        else:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def _quantize(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Rows of the matrix and their scales for normalized `vectors`."""
+        if self.dtype == np.float16:
+            return vectors.astype(np.float16), np.ones(len(vectors), np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales = np.where(scales > 0, scales, 1).astype(np.float32)
+        return np.round(vectors / scales[:, np.newaxis]).astype(np.int8), scales
+
+    def _similarities(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine similarities of the entries in `rows` to the normalized `query`."""
+        assert self._matrix is not None and self._scales is not None
+        return (self._matrix[rows].astype(np.float32) @ query) * self._scales[rows]
+
+    def upsert(
+        self,
+        ids: list[str],
+        documents: Optional[list[str]] = None,
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        metadatas: Optional[list[dict[str, Any]]] = None,
+    ) -> None:
+        if not ids:
+            return
+        vectors = self._embed(documents, embeddings)
+        quantized, scales = self._quantize(vectors)
+        with self._lock:
+            self._reload_if_changed()
+            changes: list[list[Any]] = []
+            for i, id in enumerate(ids):
+                row = self._rows.get(id)
+                if row is None:
+                    row = self._free_rows.pop() if self._free_rows else len(self._ids)
+                    metadata: Optional[dict[str, Any]] = {}
+                else:
+                    metadata = self._metadatas[row]
+                if metadatas is not None:
+                    metadata = dict(metadatas[i])
+                self._set_row(row, id, metadata)
+                changes.append([row, id, metadata, None])
+            rows = [row for row, *_ in changes]
+            self._ensure_capacity(len(self._ids), vectors.shape[1])
+            assert self._matrix is not None and self._scales is not None
+            self._matrix[rows] = quantized
+            self._scales[rows] = scales
+            self._columns = {}
+            if self._centroids is not None:
+                self._grow_lists()
+                lists = np.argmax(vectors @ self._centroids.T, axis=1)
+                self._lists[rows] = lists
+                for change, list_ in zip(changes, lists):
+                    change[3] = int(list_)
+            self._train_if_needed()
+            self._save(changes)
+
+    def delete(self, ids: list[str]) -> None:
+        with self._lock:
+            self._reload_if_changed()
+            changes: list[list[Any]] = []
+            for id in ids:
+                row = self._rows.get(id)
+                if row is None:
+                    continue
+                self._set_row(row, None, None)
+                changes.append([row, None, None, None])
+            if changes:
+                self._columns = {}
+                self._save(changes)
+
+    def get_metadatas(
+        self, limit: int, offset: int = 0
+    ) -> list[tuple[str, dict[str, Any]]]:
+        with self._lock:
+            self._reload_if_changed()
+            entries = [
+                (id, dict(metadata or {}))
+                for id, metadata in zip(self._ids, self._metadatas)
+                if id is not None
+            ]
+        return entries[offset : offset + limit]
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._reload_if_changed()
+            changes: list[list[Any]] = []
+            for id, metadata in zip(ids, metadatas):
+                row = self._rows.get(id)
+                if row is None:
+                    continue
+                merged = {**(self._metadatas[row] or {}), **metadata}
+                if merged != self._metadatas[row]:
+                    self._metadatas[row] = merged
+                    changes.append([row, id, merged, None])
+            if changes:
+                self._columns = {}
+                self._save(changes)
+
+    def count(self) -> int:
+        with self._lock:
+            self._reload_if_changed()
+            return len(self._rows)
+
+    def query(
+        self,
+        query_texts: Optional[list[str]] = None,
+        query_embeddings: Optional[Sequence[Sequence[float]]] = None,
+        n_results: int = 10,
+        where: Optional[dict[str, Any]] = None,
+    ) -> list[QueryResult]:
+        queries = self._embed(query_texts, query_embeddings)
+        with self._lock:
+            self._reload_if_changed()
+            if not self._rows:
+                return [[] for _ in queries]
+            mask = self._valid_mask()
+            if where:
+                mask = mask & self._where_mask(where)
+            return [self._query(query, mask, n_results) for query in queries]
+
+    def _query(
+        self, query: np.ndarray, mask: np.ndarray, n_results: int
+    ) -> QueryResult:
+        if self._centroids is not None:
+            probes = np.argsort(-(self._centroids @ query))[: self.nprobe]
+            rows = np.flatnonzero(mask & np.isin(self._lists[: len(mask)], probes))
+        else:
+            rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return []
+        similarities = self._similarities(rows, query)
+        if len(rows) > n_results:
+            nearest = np.argpartition(-similarities, n_results - 1)[:n_results]
+        else:
+            nearest = np.arange(len(rows))
+        nearest = nearest[np.argsort(-similarities[nearest], kind="stable")]
+        return [(str(self._ids[rows[i]]), float(1 - similarities[i])) for i in nearest]
+
+    def _valid_mask(self) -> np.ndarray:
+        """Whether every row holds an entry (rather than a deleted one)."""
+        valid = self._columns.get("#valid")
+        if valid is None:
+            valid = np.array([id is not None for id in self._ids])
+            self._columns["#valid"] = valid
+        return valid
+
+    def _column(self, field: str, numeric: bool = False) -> np.ndarray:
+        """Values of a metadata field of every row (None or NaN if missing)."""
+        key = field + ("#numeric" if numeric else "")
+        column = self._columns.get(key)
+        if column is None:
+            values = [
+                None if metadata is None else metadata.get(field)
+                for metadata in self._metadatas
+            ]
+            if numeric:
+                column = np.array(
+                    [
+                        (
+                            value
+                            if isinstance(value, (int, float))
+                            and not isinstance(value, bool)
+                            else np.nan
+                        )
+                        for value in values
+                    ],
+                    dtype=np.float64,
+                )
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self._columns[key] = column
+        return column
+
+    def _where_mask(self, where: dict[str, Any]) -> np.ndarray:
+        masks = []
+        for key, value in where.items():
+            if key == "$and":
+                masks.append(
+                    np.logical_and.reduce([self._where_mask(v) for v in value])
+                )
+            elif key == "$or":
+                masks.append(np.logical_or.reduce([self._where_mask(v) for v in value]))
+            else:
+                condition = value if isinstance(value, dict) else {"$eq": value}
+                for op, operand in condition.items():
+                    masks.append(self._condition_mask(key, op, operand))
+        return np.logical_and.reduce(masks)
+
+    def _condition_mask(self, field: str, op: str, operand: Any) -> np.ndarray:
+        if op in ("$in", "$nin"):
+            column = self._column(field)
+            mask = np.fromiter(
+                (value in operand for value in column), dtype=bool, count=len(column)
+            )
+            return mask if op == "$in" else ~mask
+        if op not in WHERE_OPERATORS:
+            raise ValueError(f"Unsupported where operator {op}")
+        # Ordering comparisons only match numbers, as in Chroma.
+        column = self._column(field, numeric=op not in ("$eq", "$ne"))
+        return np.asarray(WHERE_OPERATORS[op](column, operand), dtype=bool)
+
+    def _grow_lists(self) -> None:
+        if len(self._lists) < len(self._ids):
+            lists = np.zeros(len(self._ids), dtype=np.int32)
+            lists[: len(self._lists)] = self._lists
+            self._lists = lists
+
+    def _train_if_needed(self) -> None:
+        """(Re)train the IVF index when there are enough entries or they doubled."""
+        count = len(self._rows)
+        if (
+            self.index != "ivf"
+            or count < self.nlist * VECTOR_STORE_IVF_MIN_POINTS_PER_LIST
+            or (self._centroids is not None and count < 2 * self._trained_count)
+        ):
+            return
+        assert self._matrix is not None and self._scales is not None
+        rows = np.array(sorted(self._rows.values()))
+        vectors = self._matrix[rows].astype(np.float32) * self._scales[rows, None]
+        self._centroids = train_centroids(vectors, self.nlist)
+        self._lists = np.zeros(len(self._ids), dtype=np.int32)
+        for start in range(0, len(rows), 4096):
+            chunk = rows[start : start + 4096]
+            self._lists[chunk] = np.argmax(
+                vectors[start : start + 4096] @ self._centroids.T, axis=1
+            )
+        self._trained_count = count
+        self._needs_snapshot = True
+        logger.info(f"Trained the IVF index of the vector store on {count} entries")
+
+
+def train_centroids(
+    vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means centroids of the normalized `vectors`."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), 256 * nlist), False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        empty = ~np.any(sums, axis=1)
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+    return centroids
+
+
+def create_vector_store(
+    backend: str, embedding_function: Optional[EmbeddingFunction] = None
+) -> VectorStore:
+    """Vector store of the configured backend, `chroma` or `numpy`."""
+    if backend == "chroma":
+        # A Chroma server is shared by the API and worker processes, while a
+        # local persistent client only suits a single process.
+        client = (
+            chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+            if CHROMA_HOST
+            else chromadb.PersistentClient()
+        )
+        collection = client.get_or_create_collection(
+            name="job_collection",
+            embedding_function=embedding_function,  # type: ignore[arg-type]
+            metadata={"hnsw:space": "cosine"},
+        )
+        return ChromaVectorStore(collection)
+    if backend == "numpy":
+        return NumpyVectorStore(
+            VECTOR_STORE_PATH,
+            embedding_function,
+            dtype=VECTOR_STORE_DTYPE,
+            index=VECTOR_STORE_INDEX,
+        )
+    raise ValueError(f"Unknown vector store backend {backend}")
@@ -0,0 +1,53 @@
+"""
+Worker running the scrapers, the expiry of old jobs and the other background
+tasks on a schedule, apart from the API processes:
+
+    python -m src.worker
+"""
+
+import logging
+import signal
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+from .constants import MIGRATE_ON_STARTUP, SCHEDULER_LEASE_NAME, SCHEDULER_WORKERS
+from .database import SessionLocal, checkout_waits, engine
+from .deps import job_embedder
+from .lease import LeaseHolder
+from .migrations import check_schema_version, migrate
+from .tasks import schedule_background_tasks
+
+logger = logging.getLogger("uvicorn")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    if MIGRATE_ON_STARTUP:
+        migrate(engine)  # Create or upgrade the database schema
+    check_schema_version(engine)
+
+    scheduler = BlockingScheduler(
+        executors={"default": ThreadPoolExecutor(SCHEDULER_WORKERS)}
+    )
+    # Workers can be scaled out, the tasks run in whichever holds the lease.
+    lease = LeaseHolder(engine, SCHEDULER_LEASE_NAME)
+    schedule_background_tasks(scheduler, SessionLocal, lease)
+    # Stop on `docker stop` as well as on Ctrl+C.
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.shutdown(wait=False))
+    logger.info("Starting background jobs scheduler...")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        logger.info("Shut down background jobs scheduler.")
+        lease.release()
+        job_embedder.shutdown()
+        logger.info(f"Database pool checkout waits: {checkout_waits.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
+import os
+
+# Keep the LLM caches of the app under test out of the working directory.
+os.environ.setdefault("LLM_CACHE_PATH", ":memory:")
+os.environ.setdefault("COVER_LETTER_CACHE_PATH", ":memory:")
+
+import uuid
+
+import chromadb
 import pytest
+from chromadb import Documents, EmbeddingFunction, Embeddings
 from fastapi.testclient import TestClient
 from sqlalchemy import StaticPool, create_engine
 from sqlalchemy.orm import sessionmaker
 
 from ..src.deps import get_db
 from ..src.main import app
-from ..src.models import Base, User
+from ..src.migrations import migrate
+from ..src.models import User
 from ..src.utils import hash_password, verify_password
+from ..src.vector_store import ChromaVectorStore
 
 
 @pytest.fixture(scope="function")
@@ -16,7 +28,7 @@ def db():
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
     testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = testing_session_local()
     yield db
@@ -71,3 +83,33 @@ def token(client, db_with_user):
     data = response.json()
     assert "access_token" in data
     yield data["access_token"]
+
+
+class FakeEmbeddingFunction(EmbeddingFunction):
+    """Embeds documents by letter frequency, so tests need no embedding model."""
+
+    def __init__(self) -> None:
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [
+            [document.lower().count(letter) + 0.01 for letter in "abcdefghijklmnop"]
+            for document in input
+        ]
+
+
+@pytest.fixture()
+def job_collection():
+    client = chromadb.EphemeralClient()
+    name = f"jobs-{uuid.uuid4().hex}"
+    yield client.get_or_create_collection(
+        name=name,
+        embedding_function=FakeEmbeddingFunction(),  # type: ignore[arg-type]
+        metadata={"hnsw:space": "cosine"},
+    )
+    client.delete_collection(name)
+
+
+@pytest.fixture()
+def vector_store(job_collection):
+    yield ChromaVectorStore(job_collection)
@@ -0,0 +1,281 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from groq import APIConnectionError, RateLimitError
+import httpx
+import pytest
+
+from ..src.constants import (
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_DEFAULT_PAGE_DATA_TOKEN_BUDGET,
+)
+from ..src.llm.cache import LLMCache
+from ..src.llm.compaction import compact_page_data, estimate_tokens
+from ..src.llm.llm import LLM, LLM_MODELS, Job, JobBatch, JobWithUrl
+from ..src.llm.prompts import EXTRACT_JOB_FROM_PAGE_DATA_TEMPLATE
+from ..src.llm.router import AllModelsUnavailableError, ModelRouter
+
+
+def test_llm_cache(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "llm-cache.db"), max_entries=2)
+
+    def key(page_data, model_name="model-a"):
+        return LLMCache.make_key(
+            page_data, "LinkedIn", EXTRACT_JOB_FROM_PAGE_DATA_TEMPLATE, model_name
+        )
+
+    cache.set(
+        key("Engineer at Random Company 2 days ago  Over 200 applicants"), {"a": 1}
+    )
+    # Reposts only differ in volatile text and whitespace.
+    assert cache.get([key("Engineer at Random Company\n5 hours ago 3 applicants")]) == {
+        "a": 1
+    }
+    assert cache.get([key("Engineer at Random Company", "model-b")]) is None
+    assert cache.get(
+        [
+            key("Engineer at Random Company", "model-b"),
+            key("Engineer at Random Company"),
+        ]
+    ) == {"a": 1}
+
+    cache.set(key("Second page"), {"b": 2})
+    time.sleep(0.01)
+    cache.get([key("Engineer at Random Company")])
+    cache.set(key("Third page"), {"c": 3})
+    # The least recently used entry is evicted.
+    assert cache.get([key("Second page")]) is None
+    assert cache.get([key("Third page")]) == {"c": 3}
+    assert cache.stats() == {"hits": 4, "misses": 2, "size": 2}
+
+    cache.ttl_seconds = 0
+    assert cache.get([key("Third page")]) is None
+
+
+class FakeChain:
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def invoke(self, inputs):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def test_model_router_skips_unhealthy_models():
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    rate_limit_error = RateLimitError(
+        "Rate limited",
+        response=httpx.Response(429, headers={"retry-after": "120"}, request=request),
+        body=None,
+    )
+    api_error = APIConnectionError(request=request)
+    outcomes = {"primary": rate_limit_error, "secondary": "secondary answer"}
+    calls = []
+
+    def build_chain(model_name, llm):
+        calls.append(model_name)
+        return FakeChain(outcomes[model_name])
+
+    router = ModelRouter({"primary": None, "secondary": None})  # type: ignore[dict-item]
+    assert router.invoke(build_chain, {}) == ("secondary", "secondary answer")
+    # The primary model is cooling down, so it is not even tried.
+    assert router.invoke(build_chain, {}) == ("secondary", "secondary answer")
+    assert calls == ["primary", "secondary", "secondary"]
+
+    outcomes["secondary"] = api_error
+    for _ in range(LLM_CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(AllModelsUnavailableError):
+            router.invoke(build_chain, {})
+    assert router.available_models() == []
+
+    stats = router.stats()
+    assert stats["primary"]["rate_limits"] == 1
+    assert stats["primary"]["cooldown_seconds_left"] > 100
+    assert stats["secondary"]["successes"] == 2
+    assert stats["secondary"]["failures"] == LLM_CIRCUIT_FAILURE_THRESHOLD
+    assert stats["secondary"]["available"] is False
+
+
+def test_model_router_streams_from_the_first_healthy_model():
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+    class FakeStreamingChain:
+        def __init__(self, chunks, error=None):
+            self.chunks = chunks
+            self.error = error
+
+        async def astream(self, inputs):
+            for chunk in self.chunks:
+                yield chunk
+            if self.error is not None:
+                raise self.error
+
+    chains = {
+        "primary": FakeStreamingChain([], APIConnectionError(request=request)),
+        "secondary": FakeStreamingChain(["Dear ", "team"]),
+    }
+    router = ModelRouter({"primary": None, "secondary": None})  # type: ignore[dict-item]
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in router.astream(
+                lambda model_name, llm: chains[model_name], {}
+            )
+        ]
+
+    assert asyncio.run(collect()) == ["Dear ", "team"]
+    assert router.stats()["primary"]["failures"] == 1
+    assert router.stats()["secondary"]["successes"] == 1
+
+    # Chunks already sent cannot be taken back, so failing halfway is raised.
+    chains["secondary"] = FakeStreamingChain(
+        ["Dear "], APIConnectionError(request=request)
+    )
+    with pytest.raises(APIConnectionError):
+        asyncio.run(collect())
+
+
+def test_batch_extraction_falls_back_to_single_postings(tmp_path, monkeypatch):
+    llm = LLM(extraction_cache=LLMCache(path=str(tmp_path / "llm-cache.db")))
+    job = {
+        "description": "<p>Build things.</p>",
+        "required_experience": 2,
+        "salary_min": None,
+        "salary_max": None,
+        "salary_currency": None,
+        "salary_from_levels_fyi": False,
+        "remote": True,
+    }
+    pages = {
+        "https://www.linkedin.com/jobs/view/1": "First posting",
+        "https://www.linkedin.com/jobs/view/2": "Second posting",
+        "https://www.linkedin.com/jobs/view/3": "Third posting",
+    }
+    prompts = []
+
+    def fake_invoke(build_chain, inputs):
+        prompts.append(inputs)
+        if "postings" in inputs:
+            # The model skipped the third posting.
+            return LLM_MODELS[0], JobBatch(
+                jobs=[
+                    JobWithUrl(url="https://www.linkedin.com/jobs/view/1", **job),
+                    JobWithUrl(url="https://www.linkedin.com/jobs/view/2", **job),
+                ]
+            )
+        return LLM_MODELS[0], Job(**job)
+
+    monkeypatch.setattr(llm.router, "invoke", fake_invoke)
+    assert llm.extract_jobs_from_page_data_batch(pages, "LinkedIn") == {
+        url: job for url in pages
+    }
+    assert [list(inputs.keys()) for inputs in prompts] == [
+        ["postings", "source"],
+        ["page_data", "source"],
+    ]
+    assert prompts[1]["page_data"] == "Third posting"
+
+    # Everything is served from the cache the second time around.
+    prompts.clear()
+    assert llm.extract_jobs_from_page_data_batch(pages, "LinkedIn") == {
+        url: job for url in pages
+    }
+    assert prompts == []
+
+
+def test_compact_page_data():
+    page_data = (
+        "Software Engineer at Random Company. See who Random Company has hired for this role "
+        + "About the job. We build things. We build things.   You will write Go. "
+        + "Random Company is an equal opportunity employer and does not discriminate. "
+        + "Show more Show less Referrals increase your chances of interviewing at Random Company by 2x."
+    )
+    result = compact_page_data(page_data, 1000)
+    assert result.text == (
+        "Software Engineer at Random Company. About the job. We build things. "
+        + "You will write Go."
+    )
+    assert result.tokens_before == estimate_tokens(page_data)
+    assert result.tokens_after == estimate_tokens(result.text)
+
+    # Over budget, the text is cut off after the last sentence that fits...
+    trimmed = compact_page_data(page_data, 14)
+    assert trimmed.text == "Software Engineer at Random Company."
+    assert trimmed.tokens_after == 10
+    # ...or the last whole word if not even the first sentence fits.
+    trimmed = compact_page_data(page_data, 8)
+    assert trimmed.text == "Software Engineer at Random"
+    assert trimmed.tokens_after == 7
+
+
+def test_compact_pages_records_token_usage(tmp_path):
+    llm = LLM(extraction_cache=LLMCache(path=str(tmp_path / "llm-cache.db")))
+    pages = {
+        "a": "Short posting. " * 10,
+        "b": " ".join(f"Requirement {i}." for i in range(5000)),
+        "c": " ".join(f"Responsibility {i}." for i in range(5000)),
+    }
+    compacted_pages = llm.compact_pages(pages, "unknown-model", "Template {page_data}")
+    assert compacted_pages["a"] == "Short posting."
+    # Each posting gets the whole budget, regardless of the size of the batch.
+    for key in ["b", "c"]:
+        tokens = estimate_tokens(compacted_pages[key])
+        assert LLM_DEFAULT_PAGE_DATA_TOKEN_BUDGET - 10 < tokens
+        assert tokens <= LLM_DEFAULT_PAGE_DATA_TOKEN_BUDGET
+    stats = llm.token_stats()
+    assert stats["calls"] == 1
+    assert stats["tokens_sent"] + stats["tokens_saved"] == sum(
+        estimate_tokens(page_data) for page_data in pages.values()
+    ) + estimate_tokens("Template {page_data}")
+
+
+def test_cover_letters_are_cached_and_generated_once(tmp_path, monkeypatch):
+    llm = LLM(
+        extraction_cache=LLMCache(path=str(tmp_path / "llm-cache.db")),
+        cover_letter_cache=LLMCache(path=str(tmp_path / "cover-letter-cache.db")),
+    )
+    generating = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fake_generate_cover_letter(**inputs):
+        calls.append(inputs)
+        generating.set()
+        release.wait(5)
+        return f"Cover letter {len(calls)}"
+
+    monkeypatch.setattr(llm, "generate_cover_letter", fake_generate_cover_letter)
+    cache_key = LLM.get_cover_letter_cache_key(
+        "testuser@gmail.com", "https://www.linkedin.com/jobs/view/1", '{"A": ["B"]}'
+    )
+    inputs = {"resume_data": "B", "job_description": "Build things.", "company": "C"}
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        leader = executor.submit(llm.get_or_generate_cover_letter, cache_key, **inputs)
+        generating.wait(5)
+        followers = [
+            executor.submit(llm.get_or_generate_cover_letter, cache_key, **inputs)
+            for _ in range(2)
+        ]
+        time.sleep(0.05)
+        release.set()
+        # Concurrent requests share the generation of the first one.
+        assert [leader.result()] + [f.result() for f in followers] == [
+            "Cover letter 1"
+        ] * 3
+    assert len(calls) == 1
+
+    assert llm.get_or_generate_cover_letter(cache_key, **inputs) == "Cover letter 1"
+    assert (
+        llm.get_or_generate_cover_letter(cache_key, regenerate=True, **inputs)
+        == "Cover letter 2"
+    )
+    assert llm.get_or_generate_cover_letter(cache_key, **inputs) == "Cover letter 2"
+    # A new resume, or another job, gets its own cover letter.
+    assert cache_key != LLM.get_cover_letter_cache_key(
+        "testuser@gmail.com", "https://www.linkedin.com/jobs/view/1", '{"A": ["C"]}'
+    )
@@ -1,13 +1,32 @@
 from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
 from io import BytesIO
+import asyncio
 import json
 import os
+import time
+from apscheduler.schedulers.blocking import BlockingScheduler
 from fastapi import status
+from fastapi.testclient import TestClient
+from langchain_core.language_models import FakeListChatModel
+from sqlalchemy.orm import sessionmaker
 
+from ..src.database import checkout_waits
+from ..src.deps import llm, resume_processor
+from ..src.lease import LeaseHolder
+from ..src.llm.router import ModelRouter
+from ..src import main, recommendations, tasks
 from ..src.main import expire_jobs, mark_jobs_inactive
-from ..src.models import Job, User
+from ..src.routers import job as job_router
+from ..src.scrapers.linkedin import LinkedInScraper
+from ..src.models import Job, Recommendation, User
+from ..src.ranking import RankingWeights, rank_jobs
+from ..src.resume_processing import ResumeProcessor
+from ..src.search import reciprocal_rank_fusion
 from ..src.utils import verify_password
+from .conftest import FakeEmbeddingFunction
+
+RESUME_CONTENT = b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >> endobj\nxref\n0 4\n0000000000 65535 f \n0000000010 00000 n \n0000000067 00000 n \n0000000124 00000 n \ntrailer << /Size 4 /Root 1 0 R >>\nstartxref\n179\n%%EOF"
 
 
 def test_create_user(client, db) -> None:
@@ -22,8 +41,7 @@ def test_create_user(client, db) -> None:
     user_json = json.dumps(user_data)
 
     # Simulate a PDF file for the `resume` field
-    resume_content = b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >> endobj\nxref\n0 4\n0000000000 65535 f \n0000000010 00000 n \n0000000067 00000 n \n0000000124 00000 n \ntrailer << /Size 4 /Root 1 0 R >>\nstartxref\n179\n%%EOF"
-    resume_file = BytesIO(resume_content)
+    resume_file = BytesIO(RESUME_CONTENT)
     resume_file.name = "resume.pdf"
 
     # Send the request as `multipart/form-data`
@@ -61,6 +79,8 @@ def test_create_user(client, db) -> None:
     assert user_dict["resume_url"] == os.path.join(
         "static", user.email, resume_file.name
     )
+    # The resume is processed in the background.
+    assert user_dict["resume_status"] == "processing"
 
 
 def test_login_correct_password(client, db_with_user):
@@ -149,3 +169,585 @@ def test_expire_jobs(db):
     assert len(db.query(Job).filter(Job.is_active == True).all()) == 1
     expire_jobs(db)
     assert len(db.query(Job).all()) == 1
+
+
+def test_expire_jobs_in_chunks(db, vector_store, monkeypatch):
+    monkeypatch.setattr(tasks, "vector_store", vector_store)
+    monkeypatch.setattr(tasks, "EXPIRE_JOBS_CHUNK_SIZE", 2)
+    urls = [f"Old URL {i}" for i in range(5)]
+    db.add_all(
+        Job(
+            title="Old Title",
+            company="Old Company",
+            url=url,
+            source="Old Source",
+            role="Old Role",
+            posted_at=datetime.now(timezone.utc)
+            - relativedelta(days=1 if url == "New URL" else 9),
+        )
+        for url in urls + ["New URL"]
+    )
+    db.commit()
+    vector_store.upsert(ids=urls + ["New URL"], documents=["abc"] * 6)
+
+    mark_jobs_inactive(db)
+    assert db.query(Job).filter(Job.is_active == False).count() == 5
+    expire_jobs(db)
+    assert [url for (url,) in db.query(Job.url)] == ["New URL"]
+    assert vector_store.count() == 1
+
+
+def test_generate_cover_stream(client, db_with_user, token, monkeypatch):
+    user = db_with_user.query(User).filter(User.email == "testuser@gmail.com").first()
+    user.resume_text = json.dumps({"Random Role": ["Python", "Kubernetes"]})
+    db_with_user.add(
+        Job(
+            title="Random Title",
+            company="Random Company",
+            url="Random URL 1",
+            source="Random Source",
+            role="Random Role",
+            description="Build things.",
+            posted_at=datetime.now(timezone.utc),
+        )
+    )
+    db_with_user.commit()
+    monkeypatch.setattr(
+        llm,
+        "router",
+        ModelRouter(
+            {"fake": FakeListChatModel(responses=["Dear Random Company,\nHi"])}
+        ),
+    )
+    # The database and the SQLite cache are not queried on the event loop.
+    blocking_calls = []
+
+    def off_event_loop(func):
+        def call(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                blocking_calls.append(func.__name__)
+            except RuntimeError:
+                pass
+            return func(*args, **kwargs)
+
+        return call
+
+    for obj, name in [
+        (job_router, "get_cover_letter_request"),
+        (llm.cover_letter_cache, "get"),
+        (llm.cover_letter_cache, "set"),
+    ]:
+        monkeypatch.setattr(obj, name, off_event_loop(getattr(obj, name)))
+
+    response = client.get(
+        "/job/generate-cover/stream",
+        params={"job_url": "Random URL 1"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.split("\n\n")
+    assert events[-2:] == ["event: done\ndata: ", ""]
+    # Newlines within a chunk are sent as separate data lines.
+    assert "data: \ndata: " in events
+    letter = "".join(
+        "\n".join(line.removeprefix("data: ") for line in event.split("\n"))
+        for event in events[:-2]
+    )
+    assert letter == "Dear Random Company,\nHi"
+
+    # The cover letter is cached, unless it is regenerated.
+    monkeypatch.setattr(
+        llm,
+        "router",
+        ModelRouter({"fake": FakeListChatModel(responses=["Hello again"])}),
+    )
+    for regenerate, expected_letter in [
+        (False, "Dear Random Company,\nHi"),
+        (True, "Hello again"),
+    ]:
+        response = client.get(
+            "/job/generate-cover",
+            params={"job_url": "Random URL 1", "regenerate": regenerate},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.json() == expected_letter
+    response = client.get(
+        "/job/generate-cover/stream",
+        params={"job_url": "Random URL 1"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.text.startswith("data: Hello again\n\n")
+    assert blocking_calls == []
+
+    response = client.get(
+        "/job/generate-cover/stream",
+        params={"job_url": "Unknown URL"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+def test_resume_is_processed_in_the_background(
+    client, db_with_user, token, monkeypatch
+):
+    extracted = []
+
+    def fake_extract_skills_from_resume(resume_data, preferred_roles):
+        extracted.append(preferred_roles)
+        return {role: ["Python"] for role in preferred_roles}
+
+    monkeypatch.setattr(
+        resume_processor.llm,
+        "extract_skills_from_resume",
+        fake_extract_skills_from_resume,
+    )
+    monkeypatch.setattr(resume_processor, "embedding_function", FakeEmbeddingFunction())
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.patch(
+        "/auth",
+        data={"updated_user": json.dumps({"preferred_roles": ["Software Engineer"]})},
+        files={"resume": ("resume.pdf", BytesIO(RESUME_CONTENT), "application/pdf")},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["resume_status"] == "processing"
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        # The test client shares one session between requests.
+        db_with_user.expire_all()
+        resume_status = client.get("/auth/resume-status", headers=headers).json()
+        if resume_status["resume_status"] != "processing":
+            break
+        time.sleep(0.05)
+    assert resume_status == {
+        "resume_url": os.path.join("static", "testuser@gmail.com", "resume.pdf"),
+        "resume_status": "ready",
+        "has_keywords": True,
+    }
+    assert extracted == [["Software Engineer"]]
+    user = db_with_user.query(User).filter(User.email == "testuser@gmail.com").first()
+    assert json.loads(user.resume_text) == {"Software Engineer": ["Python"]}
+
+
+class FakeLLM:
+    """Extracts the resume text and role as the keywords of every role."""
+
+    def __init__(self, extracted=None):
+        self.extracted = [] if extracted is None else extracted
+
+    def extract_skills_from_resume(self, resume_data, preferred_roles):
+        self.extracted.append(preferred_roles)
+        return {role: [resume_data, role] for role in preferred_roles}
+
+
+def test_resume_keywords_are_extracted_incrementally(db_with_user):
+    extracted = []
+    processor = ResumeProcessor(FakeLLM(extracted))  # type: ignore[arg-type]
+    user = db_with_user.query(User).filter(User.email == "testuser@gmail.com").first()
+    user.resume_raw_text = "Python"
+    db_with_user.commit()
+
+    def process(roles):
+        processor.submit(db_with_user.get_bind(), user.email, roles).result()
+        db_with_user.expire_all()
+        return json.loads(user.resume_text)
+
+    assert process(["Backend"]) == {"Backend": ["Python", "Backend"]}
+    # Only the new role is sent to the LLM, and merged with the existing ones.
+    assert process(["Backend", "DevOps"]) == {
+        "Backend": ["Python", "Backend"],
+        "DevOps": ["Python", "DevOps"],
+    }
+    process(["Backend", "DevOps"])
+    assert extracted == [["Backend"], ["DevOps"]]
+
+    # A different resume invalidates the keywords of every role.
+    user.resume_raw_text = "Go"
+    db_with_user.commit()
+    assert process(["DevOps"]) == {
+        "Backend": ["Python", "Backend"],
+        "DevOps": ["Go", "DevOps"],
+    }
+    assert extracted[-1] == ["DevOps"]
+    assert user.resume_status == "ready"
+    processor.shutdown()
+
+
+def test_search_filters_in_vector_query(
+    client, db_with_user, token, vector_store, monkeypatch
+):
+    jobs = [
+        Job(
+            title=f"Engineer {i}",
+            company="Random Company",
+            location="Bengaluru, India" if i % 2 else "Hyderabad, India",
+            url=f"Random URL {i}",
+            source="LinkedIn",
+            role="Software Engineer",
+            description="Build things with Kubernetes.",
+            required_experience=i % 5,
+            remote=True,
+            posted_at=datetime.now(timezone.utc),
+        )
+        for i in range(30)
+    ]
+    db_with_user.add_all(jobs)
+    db_with_user.commit()
+    vector_store.upsert(
+        ids=[str(job.url) for job in jobs],
+        documents=[str(job.title) + str(job.description) for job in jobs],
+    )
+    # Jobs embedded before their metadata was stored get it backfilled.
+    monkeypatch.setattr(tasks, "vector_store", vector_store)
+    main.backfill_job_collection_metadata(db_with_user)
+    assert dict(vector_store.get_metadatas(limit=100))["Random URL 3"] == {
+        "location": "Bengaluru, India",
+        "source": "LinkedIn",
+        "role": "Software Engineer",
+        "remote": True,
+        "required_experience": 3,
+    }
+
+    monkeypatch.setattr(job_router, "vector_store", vector_store)
+    # The jobs embed the same, and equally near jobs are ordered by URL.
+    assert job_router.vector_search("Kubernetes", None, 30) == sorted(
+        str(job.url) for job in jobs
+    )
+
+    def search(**params):
+        response = client.get(
+            "/job/search",
+            params={"search_query": "Kubernetes", **params},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json().get("Software Engineer", [])
+
+    # All 6 matching jobs are found, even though 30 jobs are embedded.
+    filtered_params = {
+        "location": "Bengaluru, India",
+        "min_experience_years": 3,
+        "page_size": 4,
+    }
+    first_page = search(**filtered_params)
+    second_page = search(**filtered_params, page=2)
+    assert len(first_page) == 4
+    assert len(second_page) == 2
+    found_jobs = first_page + second_page
+    assert len({job["url"] for job in found_jobs}) == 6
+    assert all(
+        job["location"] == "Bengaluru, India" and job["required_experience"] >= 3
+        for job in found_jobs
+    )
+
+
+def test_hybrid_search_ranks_exact_terms(
+    client, db_with_user, token, vector_store, monkeypatch
+):
+    jobs = [
+        Job(
+            title=f"Backend Engineer {i}",
+            company="Random Company",
+            location="Bengaluru, India",
+            url=f"Random URL {i}",
+            source="LinkedIn",
+            role="Software Engineer",
+            description="Build services in Go.",
+            required_experience=2,
+            remote=True,
+            posted_at=datetime.now(timezone.utc),
+        )
+        for i in range(10)
+    ]
+    jobs[7].company = "Zyxwvu Labs"  # type: ignore[assignment]
+    jobs[7].description = "Build services in Rust."  # type: ignore[assignment]
+    db_with_user.add_all(jobs)
+    db_with_user.commit()
+    vector_store.upsert(
+        ids=[str(job.url) for job in jobs],
+        documents=[str(job.title) + str(job.description) for job in jobs],
+    )
+    monkeypatch.setattr(job_router, "vector_store", vector_store)
+
+    def search(search_query, page=1):
+        response = client.get(
+            "/job/search",
+            params={"search_query": search_query, "page_size": 5, "page": page},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert "vector;dur=" in response.headers["Server-Timing"]
+        assert "lexical;dur=" in response.headers["Server-Timing"]
+        return [job["url"] for job in response.json().get("Software Engineer", [])]
+
+    # Exact terms the embeddings don't capture are found by the full-text leg.
+    assert search("Rust")[0] == "Random URL 7"
+    assert search("zyxwvu labs")[0] == "Random URL 7"
+    # Pages are slices of one ranking, so no job is skipped or repeated.
+    pages = [search("Rust", page) for page in [1, 2, 3]]
+    assert sorted(url for page in pages for url in page) == sorted(
+        str(job.url) for job in jobs
+    )
+
+    # The full-text index follows updates and deletes of the jobs.
+    jobs[7].description = "Build services in Go."  # type: ignore[assignment]
+    jobs[3].description = "Build services in Rust."  # type: ignore[assignment]
+    db_with_user.commit()
+    assert search("Rust")[0] == "Random URL 3"
+    db_with_user.delete(jobs[3])
+    db_with_user.commit()
+    assert "Random URL 3" not in search("Rust")
+
+
+def test_reciprocal_rank_fusion():
+    # Ranked well by both beats ranked first by one.
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], k=60) == [
+        "b",
+        "a",
+        "d",
+        "c",
+    ]
+    # Equal scores are ordered by item.
+    assert reciprocal_rank_fusion([["b", "a"], ["a", "b"]]) == ["a", "b"]
+
+
+def test_recommendations_are_materialized(
+    client, db_with_user, token, vector_store, monkeypatch
+):
+    jobs = [
+        Job(
+            title=title,
+            company="Random Company",
+            location="Bengaluru, India",
+            url=f"Random URL {i}",
+            source="LinkedIn",
+            role="Software Engineer",
+            description=title,
+            required_experience=i,
+            remote=True,
+            posted_at=datetime.now(timezone.utc),
+        )
+        for i, title in enumerate(["Backend", "Frontend", "Data"])
+    ]
+    db_with_user.add_all(jobs)
+    db_with_user.commit()
+    vector_store.upsert(
+        ids=[str(job.url) for job in jobs],
+        documents=[str(job.description) for job in jobs],
+    )
+    queries = []
+
+    class CountingVectorStore:
+        def query(self, **kwargs):
+            queries.append(kwargs)
+            return vector_store.query(**kwargs)
+
+    monkeypatch.setattr(recommendations, "vector_store", CountingVectorStore())
+
+    # The keywords are embedded once, when the resume is processed.
+    processor = ResumeProcessor(
+        FakeLLM(), FakeEmbeddingFunction()  # type: ignore[arg-type]
+    )
+    user = db_with_user.query(User).filter(User.email == "testuser@gmail.com").first()
+    user.resume_raw_text = "Frontend"
+    db_with_user.commit()
+    processor.submit(
+        db_with_user.get_bind(), user.email, ["Software Engineer"]
+    ).result()
+    processor.shutdown()
+    db_with_user.expire_all()
+    assert "Software Engineer" in json.loads(user.resume_keyword_embeddings)
+    assert user.recommendations_refreshed_at is None
+
+    def recommended(**params):
+        response = client.get(
+            "/job/recommended",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return [job["url"] for job in response.json()["Software Engineer"]]
+
+    # Stale recommendations are computed live from the stored embeddings...
+    assert recommended()[0] == "Random URL 1"
+    assert len(queries) == 1 and "query_embeddings" in queries[0]
+    # ...and materialized, so later requests don't query the job collection.
+    assert recommended(sort_by="desc_experience") == [
+        "Random URL 2",
+        "Random URL 1",
+        "Random URL 0",
+    ]
+    assert len(recommended(sort_by="best_match")) == 3
+    assert len(queries) == 1
+    assert db_with_user.query(Recommendation).count() == 3
+
+    # Expiring jobs refreshes the recommendations of every user.
+    jobs[1].is_active = False  # type: ignore[assignment]
+    db_with_user.commit()
+    monkeypatch.setattr(tasks, "vector_store", vector_store)
+    expire_jobs(db_with_user)
+    assert len(queries) == 2
+    assert db_with_user.query(Recommendation).count() == 2
+    assert "Random URL 1" not in recommended()
+
+
+def test_scrapes_refresh_the_recommendations_of_other_roles(
+    db_with_user, vector_store, monkeypatch
+):
+    monkeypatch.setattr(recommendations, "vector_store", vector_store)
+    user = db_with_user.query(User).filter(User.email == "testuser@gmail.com").first()
+    user.resume_text = json.dumps({"Data Scientist": ["data"]})
+    db_with_user.commit()
+    recommendations.refresh_recommendations(db_with_user)
+    assert db_with_user.query(Recommendation).count() == 0
+
+    # A job of another role than the ones of the user is scraped...
+    job = Job(
+        title="Data Engineer",
+        company="Random Company",
+        url="Random URL",
+        source="LinkedIn",
+        role="Software Engineer",
+        posted_at=datetime.now(timezone.utc),
+    )
+    db_with_user.add(job)
+    db_with_user.commit()
+    vector_store.upsert(ids=["Random URL"], documents=["Data Engineer"])
+    scraper = LinkedInScraper(db_with_user, "Software Engineer")
+    monkeypatch.setattr(scraper, "fetch_job_listing_urls", lambda: None)
+    scraper.run()
+
+    # ...and still recommended for the roles of the user.
+    assert [
+        (recommendation.role, recommendation.job_id)
+        for recommendation in db_with_user.query(Recommendation)
+    ] == [("Data Scientist", job.id)]
+
+
+def test_rank_jobs_combines_signals():
+    now = datetime.now(timezone.utc)
+
+    def make_job(i, days_ago, salary, required_experience, currency="USD"):
+        return Job(
+            url=f"Random URL {i}",
+            posted_at=now - relativedelta(days=days_ago),
+            salary_min=salary,
+            salary_max=salary,
+            salary_currency=currency,
+            required_experience=required_experience,
+        )
+
+    jobs = [
+        make_job(0, days_ago=0, salary=100, required_experience=10),
+        make_job(1, days_ago=30, salary=None, required_experience=2),
+        make_job(2, days_ago=0, salary=100, required_experience=2),
+        make_job(3, days_ago=0, salary=5000, required_experience=2, currency="INR"),
+    ]
+    similarities = [0.9, 0.9, 0.8, 0.5]
+
+    def rank(**weights):
+        ranked = rank_jobs(
+            jobs, similarities, experience_years=3, weights=RankingWeights(**weights)
+        )
+        return [job.url for job in ranked]
+
+    only = dict(similarity=0, recency=0, salary=0, experience=0)
+    # Ties keep the order of the candidates.
+    assert rank(**{**only, "similarity": 1}) == [
+        "Random URL 0",
+        "Random URL 1",
+        "Random URL 2",
+        "Random URL 3",
+    ]
+    assert rank(**{**only, "recency": 1})[-1] == "Random URL 1"
+    # Salaries are compared within their currency.
+    assert rank(**{**only, "salary": 1})[:3] == [
+        "Random URL 0",
+        "Random URL 2",
+        "Random URL 3",
+    ]
+    assert rank(**{**only, "experience": 1})[-1] == "Random URL 0"
+    # A close match the user is qualified for beats a slightly closer one they
+    # are far from qualified for.
+    assert rank()[0] == "Random URL 2"
+
+
+def test_api_starts_without_running_background_tasks(monkeypatch):
+    def fail_scraping(*args, **kwargs):
+        raise AssertionError("Scrapers run in the worker")
+
+    monkeypatch.setattr(tasks, "ScraperFactory", fail_scraping)
+    # Keep the shared executors usable by the other tests.
+    monkeypatch.setattr(main.resume_processor, "shutdown", lambda: None)
+    monkeypatch.setattr(main.job_embedder, "shutdown", lambda: None)
+    start_time = time.monotonic()
+    with TestClient(main.app):
+        assert time.monotonic() - start_time < 1
+
+
+def test_background_tasks_are_scheduled_without_blocking(db):
+    scheduler = BlockingScheduler()
+    session_factory = sessionmaker(bind=db.get_bind())
+    tasks.schedule_background_tasks(
+        scheduler, session_factory, LeaseHolder(db.get_bind(), "test")
+    )
+    jobs = {job.name: job for job in scheduler.get_jobs()}
+    # The scrapers are only scheduled, with their first run right away.
+    assert jobs["LinkedInScraper.run"].next_run_time <= datetime.now(timezone.utc)
+    assert set(jobs) >= {
+        "LeaseHolder.acquire",
+        "mark_jobs_inactive",
+        "expire_jobs",
+        "backfill_job_collection_metadata",
+    }
+    # The heartbeat doesn't wait for the workers running long tasks.
+    assert jobs["LeaseHolder.acquire"].executor == "lease"
+    assert jobs["LinkedInScraper.run"].executor == "default"
+
+    # Every run gets a fresh session, which is closed afterwards.
+    db.add(
+        Job(
+            title="Old Title",
+            company="Old Company",
+            url="Old URL",
+            source="Old Source",
+            role="Old Role",
+            posted_at=datetime.now(timezone.utc) - relativedelta(days=9),
+        )
+    )
+    db.commit()
+    num_checkouts = checkout_waits.stats()["checkouts"]
+    for _ in range(2):
+        jobs["mark_jobs_inactive"].func()
+    db.expire_all()
+    assert db.query(Job).filter(Job.is_active == True).count() == 0
+    assert checkout_waits.stats()["checkouts"] == num_checkouts + 2
+
+
+def test_only_the_lease_holder_runs_background_tasks(db):
+    first = LeaseHolder(db.get_bind(), "scheduler", ttl_seconds=0.2)
+    second = LeaseHolder(db.get_bind(), "scheduler", ttl_seconds=0.2)
+    runs = []
+    first_task = first.guard(lambda: runs.append("first"))
+    second_task = second.guard(lambda: runs.append("second"))
+
+    first_task()
+    second_task()
+    assert runs == ["first"]
+    assert first.acquire()  # Heartbeat renews the lease
+    assert not second.acquire()
+
+    # The lease fails over once its holder stops renewing it.
+    time.sleep(0.3)
+    second_task()
+    assert not first.acquire()
+    first_task()
+    assert runs == ["first", "second"]
+
+    # Released on shutdown, so it is taken over without waiting for it to expire.
+    second.release()
+    first_task()
+    assert runs == ["first", "second", "first"]
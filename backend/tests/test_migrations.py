@@ -0,0 +1,162 @@
+import json
+import re
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import StaticPool, create_engine, event, inspect, text
+
+from ..src import tasks
+from ..src.migrations import SCHEMA_VERSION, check_schema_version, migrate
+from ..src.models import Base, Job, User
+from ..src.routers import job as job_router
+
+# Tables of the first released schema, before there were migrations.
+INITIAL_SCHEMA_DDL = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR UNIQUE, "
+    "hashed_password VARCHAR, full_name VARCHAR, experience_years INTEGER, "
+    "preferred_roles VARCHAR, preferred_locations VARCHAR, "
+    "preferred_sources VARCHAR, receive_email_alerts BOOLEAN, is_admin BOOLEAN, "
+    "resume_url VARCHAR, resume_text VARCHAR)",
+    "CREATE TABLE jobs (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, "
+    "company VARCHAR NOT NULL, location VARCHAR, description TEXT, "
+    "url VARCHAR NOT NULL UNIQUE, source VARCHAR NOT NULL, role VARCHAR NOT NULL, "
+    "salary_min INTEGER, salary_max INTEGER, salary_currency VARCHAR, "
+    "salary_from_levels_fyi BOOLEAN, required_experience INTEGER, remote BOOLEAN, "
+    "posted_at DATETIME, is_active BOOLEAN)",
+    "CREATE INDEX ix_jobs_location ON jobs (location)",
+    "INSERT INTO jobs (title, company, url, source, role, is_active) "
+    "VALUES ('Rust Engineer', 'Company', 'URL', 'LinkedIn', 'Software Engineer', 1)",
+]
+
+
+# Columns added to the initial tables by each request, in order.
+ADDED_COLUMNS = [
+    ("user-013", [("users", "resume_status VARCHAR")]),
+    (
+        "user-014",
+        [("users", "resume_raw_text TEXT"), ("users", "resume_keyword_hashes VARCHAR")],
+    ),
+    (
+        "user-017",
+        [
+            ("users", "resume_keyword_embeddings TEXT"),
+            ("users", "recommendations_refreshed_at DATETIME"),
+        ],
+    ),
+    ("user-020", [("jobs", "content_hash VARCHAR")]),
+]
+
+
+@pytest.mark.parametrize(
+    "num_requests",
+    range(len(ADDED_COLUMNS) + 1),
+    ids=["initial"] + [f"after {request_id}" for request_id, _ in ADDED_COLUMNS],
+)
+def test_migrations_upgrade_an_existing_database(num_requests):
+    """Databases created by any earlier version of the app are upgraded."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        for statement in INITIAL_SCHEMA_DDL:
+            connection.execute(text(statement))
+        for _, columns in ADDED_COLUMNS[:num_requests]:
+            for table_name, column in columns:
+                connection.execute(
+                    text(f"ALTER TABLE {table_name} ADD COLUMN {column}")
+                )
+    with pytest.raises(RuntimeError, match="missing migrations"):
+        check_schema_version(engine)
+
+    migrate(engine)
+    migrate(engine)  # Applied migrations are skipped
+    check_schema_version(engine)
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        assert set(table.c.keys()) <= {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+    assert {
+        "ix_jobs_active_posted_at",
+        "ix_jobs_active_role_posted_at",
+        "ix_jobs_content_hash",
+    } <= {index["name"] for index in inspector.get_indexes("jobs")}
+    assert inspector.has_table("recommendations")
+    with engine.begin() as connection:
+        # Jobs saved before the migrations were indexed for full-text search.
+        assert connection.execute(
+            text("SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH 'rust'")
+        ).all() == [(1,)]
+        connection.execute(
+            text("INSERT INTO schema_migrations VALUES (:version, 'Newer', :now)"),
+            {"version": SCHEMA_VERSION + 1, "now": datetime.now()},
+        )
+    with pytest.raises(RuntimeError, match="does not know about"):
+        check_schema_version(engine)
+
+
+def test_job_queries_do_not_scan_tables(
+    client, db_with_user, token, vector_store, monkeypatch
+):
+    db = db_with_user
+    monkeypatch.setattr(job_router, "vector_store", vector_store)
+    monkeypatch.setattr(tasks, "vector_store", vector_store)
+    db.add(
+        Job(
+            title="Rust Engineer",
+            company="Company",
+            location="Bengaluru, India",
+            description="Writes Rust",
+            url="URL",
+            source="LinkedIn",
+            role="Software Engineer",
+            required_experience=3,
+            remote=True,
+            posted_at=datetime.now(timezone.utc),
+        )
+    )
+    user = db.query(User).first()
+    user.resume_text = json.dumps({"Software Engineer": ["rust"]})
+    user.recommendations_refreshed_at = datetime.now(timezone.utc)
+    db.commit()
+    vector_store.upsert(ids=["URL"], documents=["Rust Engineer"])
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r"\b(jobs|recommendations)\b", statement) and not executemany:
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        headers = {"Authorization": f"Bearer {token}"}
+        for params in [
+            {},
+            {"role": "Software Engineer"},
+            {"source": "LinkedIn", "sort_by": "salary"},
+            {"remote": True, "min_experience_years": 2},
+            {"location": "Bengaluru, India"},
+            {"search_query": "Rust", "role": "Software Engineer"},
+        ]:
+            response = client.get("/job/search", params=params, headers=headers)
+            assert response.status_code == 200
+        for params in [{}, {"sort_by": "best_match"}]:
+            response = client.get("/job/recommended", params=params, headers=headers)
+            assert response.status_code == 200
+        tasks.mark_jobs_inactive(db)
+        tasks.expire_jobs(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+
+    assert any(statement.startswith("DELETE FROM jobs") for statement, _ in statements)
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            ).all()
+            details = [row[-1] for row in plan]
+            assert not [
+                detail
+                for detail in details
+                if re.match(r"SCAN (jobs|recommendations)\b", detail)
+            ], f"{statement} scans a table: {details}"
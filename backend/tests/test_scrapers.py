@@ -0,0 +1,389 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import requests
+
+from ..src.constants import RULE_EXTRACTION_MIN_CONFIDENCE
+from ..src.embedding import JobEmbedder, content_hash
+from ..src.models import Job, JobEmbedding
+from ..src.scrapers import fetcher, scraper_base
+from ..src.scrapers.fetcher import AsyncFetcher, HostRateController
+from ..src.scrapers.http_client import ScraperHttpClient
+from ..src.scrapers.linkedin import LinkedInScraper
+from ..src.scrapers.pipeline import ScrapePipeline
+from ..src.scrapers.rule_extractor import extract_job_fields
+from .conftest import FakeEmbeddingFunction
+
+
+class FakeResponse:
+    def __init__(
+        self, status_code: int, text: str = "", headers=None, elapsed: float = 0.01
+    ) -> None:
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.elapsed = timedelta(seconds=elapsed)
+
+
+def test_rate_controller_adapts_to_host_health(monkeypatch):
+    monkeypatch.setattr(fetcher, "SCRAPER_MIN_DELAY_SECONDS", 0.01)
+
+    async def scenario():
+        controller = HostRateController("www.linkedin.com")
+        initial_concurrency = controller.concurrency
+
+        await controller.acquire()
+        await controller.release(True, 0.1)
+        assert controller.concurrency == initial_concurrency / 2
+        assert controller.delay == 0.02
+
+        await controller.acquire()
+        await controller.release(False, 0.1)
+        assert controller.concurrency > initial_concurrency / 2
+        assert controller.delay < 0.02
+
+        # Far slower than the running average is treated like throttling.
+        concurrency = controller.concurrency
+        await controller.acquire()
+        await controller.release(False, 10.0)
+        assert controller.concurrency == max(1.0, concurrency / 2)
+
+    asyncio.run(scenario())
+
+
+def test_fetcher_retries_throttled_pages(monkeypatch):
+    monkeypatch.setattr(fetcher, "SCRAPER_MIN_DELAY_SECONDS", 0.0)
+    responses = {
+        "https://www.linkedin.com/jobs/view/1": [
+            FakeResponse(999),
+            FakeResponse(200, "<html>1</html>"),
+        ],
+        "https://www.linkedin.com/jobs/view/2": [FakeResponse(200, "<html>2</html>")],
+        "https://www.linkedin.com/jobs/view/3": [
+            requests.ConnectionError("reset"),
+            FakeResponse(429),
+            FakeResponse(429),
+        ],
+    }
+
+    class FakeClient:
+        def get(self, url, **kwargs):
+            response = responses[url].pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+    pages = asyncio.run(
+        AsyncFetcher(client=FakeClient()).fetch_all(list(responses.keys()))  # type: ignore[arg-type]
+    )
+    assert pages == {
+        "https://www.linkedin.com/jobs/view/1": "<html>1</html>",
+        "https://www.linkedin.com/jobs/view/2": "<html>2</html>",
+        "https://www.linkedin.com/jobs/view/3": None,
+    }
+
+
+def test_fetcher_ignores_client_backoff_in_latency(monkeypatch):
+    monkeypatch.setattr(fetcher, "SCRAPER_MIN_DELAY_SECONDS", 0.0)
+
+    class BackingOffClient:
+        def get(self, url, **kwargs):
+            if url.endswith("/2"):
+                # A 5xx retried after sleeping, answered quickly the second time.
+                time.sleep(0.2)
+            return FakeResponse(200, "<html></html>")
+
+    async def scenario():
+        async_fetcher = AsyncFetcher(client=BackingOffClient())  # type: ignore[arg-type]
+        await async_fetcher.fetch("https://www.linkedin.com/jobs/view/1")
+        controller = async_fetcher.get_controller("https://www.linkedin.com/")
+        concurrency = controller.concurrency
+        await async_fetcher.fetch("https://www.linkedin.com/jobs/view/2")
+        assert controller.concurrency > concurrency
+
+    asyncio.run(scenario())
+
+
+def test_http_client_reuses_connections_and_retries():
+    statuses = [503, 200, 200]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+
+        def do_GET(self):
+            body = b"ok"
+            self.send_response(statuses.pop(0))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = ScraperHttpClient(backoff_base=0.0)
+        url = f"http://127.0.0.1:{server.server_port}/"
+        assert client.get(url).status_code == 200
+        assert client.get(url).status_code == 200
+        assert client.stats() == {
+            "requests": 3,
+            "connections_opened": 1,
+            "connections_reused": 2,
+            "retries": 1,
+        }
+    finally:
+        server.shutdown()
+
+
+def test_drop_known_job_listing_urls(db):
+    db.add(
+        Job(
+            title="Random Title",
+            company="Random Company",
+            url="https://www.linkedin.com/jobs/view/known",
+            source="LinkedIn",
+            role="Software Engineer",
+        )
+    )
+    db.commit()
+    scraper = LinkedInScraper(db, "Software Engineer")
+    scraper.location_to_urls = {
+        "Bengaluru, India": [
+            "https://www.linkedin.com/jobs/view/known",
+            "https://www.linkedin.com/jobs/view/new",
+        ],
+        "Hyderabad, India": [
+            "https://www.linkedin.com/jobs/view/new",
+            "https://www.linkedin.com/jobs/view/other",
+        ],
+    }
+    scraper.drop_known_job_listing_urls()
+    assert scraper.location_to_urls == {
+        "Bengaluru, India": ["https://www.linkedin.com/jobs/view/new"],
+        "Hyderabad, India": ["https://www.linkedin.com/jobs/view/other"],
+    }
+
+
+def test_save_to_db_upserts_batch(db):
+    db.add(
+        Job(
+            title="Random Title",
+            company="Random Company",
+            url="https://www.linkedin.com/jobs/view/known",
+            source="LinkedIn",
+            role="Software Engineer",
+            salary_min=100,
+            is_active=False,
+        )
+    )
+    db.commit()
+
+    def job(url, **kwargs):
+        return {
+            "title": "Random Title",
+            "company": "Random Company",
+            "location": "Bengaluru, India",
+            "role": "Software Engineer",
+            "description": "Random Description",
+            "url": url,
+            "posted_at": datetime.now(timezone.utc),
+            "remote": True,
+            **kwargs,
+        }
+
+    scraper = LinkedInScraper(db, "Software Engineer")
+    counts = scraper.save_to_db(
+        [
+            job("https://www.linkedin.com/jobs/view/known", salary_min=200),
+            job("https://www.linkedin.com/jobs/view/new"),
+            job("https://www.linkedin.com/jobs/view/new"),
+            job("https://www.linkedin.com/jobs/view/failed", title=None),
+        ]
+    )
+    assert counts == {"inserted": 1, "updated": 1, "skipped": 2}
+    assert db.query(Job).count() == 2
+    known_job = (
+        db.query(Job)
+        .filter(Job.url == "https://www.linkedin.com/jobs/view/known")
+        .one()
+    )
+    db.refresh(known_job)
+    assert known_job.salary_min == 200
+    assert known_job.is_active is True
+
+
+def test_scrape_pipeline_streams_jobs_to_db(db, monkeypatch):
+    def job_page(job_id):
+        return f"""
+        <div class="top-card-layout__card">
+            <h1 class="top-card-layout__title">Engineer {job_id}</h1>
+            <a class="topcard__org-name-link">Random Company</a>
+            <time class="aside-job-card__listdate">2 days ago</time>
+        </div>
+        <div class="description__text description__text--rich">Build things.</div>
+        """
+
+    class FakeFetcher:
+        async def fetch(self, url):
+            job_id = url.rsplit("/", 1)[-1]
+            return None if job_id == "gone" else job_page(job_id)
+
+    scraper = LinkedInScraper(db, "Software Engineer")
+    embedded = []
+    monkeypatch.setattr(
+        scraper,
+        "infer_job_details",
+        lambda pages: {url: {"remote": True, "salary_min": 10} for url in pages},
+    )
+    monkeypatch.setattr(scraper, "add_job_details_to_collection", embedded.extend)
+
+    pipeline = ScrapePipeline(scraper, fetcher=FakeFetcher())  # type: ignore[arg-type]
+    listings = [
+        ("Bengaluru, India", f"https://www.linkedin.com/jobs/view/{job_id}")
+        for job_id in [*range(50), "gone"]
+    ]
+    counts = asyncio.run(pipeline.run(listings))
+
+    assert counts["fetched"] == 50
+    assert counts["fetch_failed"] == 1
+    assert counts["inserted"] == 50
+    assert counts["embedded"] == 50
+    assert db.query(Job).count() == 50
+    job = db.query(Job).filter(Job.title == "Engineer 7").one()
+    assert job.description == "Build things."
+    assert job.remote is True
+    assert job.salary_min == 10
+    assert sorted(job["url"] for job in embedded) == sorted(
+        url for _, url in listings[:-1]
+    )
+
+
+def test_rule_extractor_skips_llm_when_confident(db, monkeypatch):
+    extraction = extract_job_fields(
+        "Senior Engineer Random Company Bengaluru (Remote) ₹20L - ₹35L "
+        "You have 5+ years of professional software experience. "
+        "Bonus: 8 years experience with Kubernetes."
+    )
+    assert extraction.confidence == 1
+    assert extraction.fields == {
+        "salary_from_levels_fyi": False,
+        "remote": True,
+        "required_experience": 5,
+        "salary_min": 2_000_000,
+        "salary_max": 3_500_000,
+        "salary_currency": "INR",
+    }
+    assert extract_job_fields("Pay: $50 - $70/hr. Hybrid.").fields == {
+        "salary_from_levels_fyi": False,
+        "remote": False,
+    }
+    # The unit of either end applies to both, and implausible ranges are dropped.
+    assert extract_job_fields("$100 - $120k")[0]["salary_min"] == 100_000
+    assert "salary_min" not in extract_job_fields("$5 - $120,000")[0]
+    # Conflicting remote and on-site mentions are left to the LLM.
+    conflicting = extract_job_fields(
+        "Remote. 3+ years of experience. Final rounds are on-site interviews. $100k - $120k"
+    )
+    assert "remote" not in conflicting.fields
+    assert conflicting.confidence < RULE_EXTRACTION_MIN_CONFIDENCE
+
+    scraper = LinkedInScraper(db, "Software Engineer")
+    inferred_pages = []
+
+    def fake_infer_job_details(pages):
+        inferred_pages.append(pages)
+        return {
+            url: {
+                "required_experience": 1,
+                "salary_from_levels_fyi": True,
+                "description": "<p>Hi</p>",
+            }
+            for url in pages
+        }
+
+    monkeypatch.setattr(scraper, "infer_job_details", fake_infer_job_details)
+
+    def parsed_job(job_id, page_data):
+        return {
+            "title": "Senior Engineer",
+            "company": "Random Company",
+            "location": "Bengaluru, India",
+            "url": f"https://www.linkedin.com/jobs/view/{job_id}",
+            "page_data": page_data,
+            "parsed_description": "Plain description",
+        }
+
+    confident, unsure, also_unsure = scraper.extract_job_details(
+        [
+            parsed_job(1, "Remote. 3+ years of experience required. $100k - $120k"),
+            parsed_job(2, "Come work with us."),
+            parsed_job(3, "Remote. 3+ years of experience required."),
+        ]
+    )
+    # Only the postings the patterns are unsure about go to the LLM, together.
+    assert inferred_pages == [
+        {
+            "https://www.linkedin.com/jobs/view/2": "Come work with us.",
+            # A missing salary is enough to ask the LLM.
+            "https://www.linkedin.com/jobs/view/3": "Remote. 3+ years of experience required.",
+        }
+    ]
+    assert confident["required_experience"] == 3
+    assert confident["description"] == "Plain description"
+    assert "page_data" not in confident
+    assert unsure["required_experience"] == 1
+    assert unsure["description"] == "<p>Hi</p>"
+    assert also_unsure["url"] == "https://www.linkedin.com/jobs/view/3"
+    # The LLM overrides the unsure patterns, which fill in what it left out.
+    assert also_unsure["required_experience"] == 1
+    assert also_unsure["salary_from_levels_fyi"] is True
+    assert also_unsure["remote"] is True
+    assert confident["salary_from_levels_fyi"] is False
+
+
+def test_jobs_are_embedded_once_per_content(db, vector_store, monkeypatch):
+    embedded_documents = []
+
+    def embedding_function(documents):
+        embedded_documents.extend(documents)
+        return FakeEmbeddingFunction()(documents)
+
+    embedder = JobEmbedder(embedding_function, workers=2, batch_size=2)  # type: ignore[arg-type]
+    monkeypatch.setattr(scraper_base, "job_embedder", embedder)
+    monkeypatch.setattr(scraper_base, "vector_store", vector_store)
+
+    def job(i, description="Build things."):
+        return {
+            "title": f"Engineer {i}",
+            "company": "Random Company",
+            "location": "Bengaluru, India",
+            "role": "Software Engineer",
+            "description": description,
+            "url": f"https://www.linkedin.com/jobs/view/{i}",
+        }
+
+    scraper = LinkedInScraper(db, "Software Engineer")
+    jobs = [job(i) for i in range(5)]
+    scraper.save_to_db(jobs)
+    scraper.add_job_details_to_collection(jobs)
+    assert sorted(embedded_documents) == sorted(
+        f"Engineer {i}Build things." for i in range(5)
+    )
+    assert vector_store.count() == 5
+
+    # Only the job whose description changed is embedded again.
+    embedded_documents.clear()
+    scraper.add_job_details_to_collection(
+        [job(0), job(1, description="Build other things.")]
+    )
+    assert embedded_documents == ["Engineer 1Build other things."]
+    assert db.query(JobEmbedding).count() == 6
+    db.expire_all()
+    saved_job = db.query(Job).filter(Job.title == "Engineer 1").one()
+    assert saved_job.content_hash == content_hash("Engineer 1Build other things.")
+    embedder.shutdown()
@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from ..src import vector_store as vector_store_module
+from ..src.vector_store import ChromaVectorStore, NumpyVectorStore
+from .conftest import FakeEmbeddingFunction
+
+
+@pytest.fixture(params=["chroma", "float16", "int8", "ivf"])
+def any_vector_store(request, job_collection, tmp_path):
+    if request.param == "chroma":
+        yield ChromaVectorStore(job_collection)
+    elif request.param == "ivf":
+        yield NumpyVectorStore(
+            str(tmp_path), FakeEmbeddingFunction(), index="ivf", nlist=2, nprobe=2
+        )
+    else:
+        yield NumpyVectorStore(str(tmp_path), FakeEmbeddingFunction(), request.param)
+
+
+def test_vector_stores_are_interchangeable(any_vector_store):
+    any_vector_store.upsert(
+        ids=["backend", "frontend", "data"],
+        documents=["Backend developer", "Frontend engineer", "Data scientist"],
+        metadatas=[
+            {"role": "Software Engineer", "required_experience": 2, "remote": True},
+            {"role": "Software Engineer", "required_experience": 5, "remote": False},
+            {"role": "Data Scientist", "required_experience": 3, "remote": True},
+        ],
+    )
+    assert any_vector_store.count() == 3
+
+    [nearest] = any_vector_store.query(query_texts=["Frontend engineer"], n_results=2)
+    assert nearest[0][0] == "frontend"
+    assert nearest[0][1] == pytest.approx(0, abs=1e-2)
+    assert len(nearest) == 2
+
+    def query_ids(where):
+        [result] = any_vector_store.query(
+            query_texts=["engineer"], n_results=10, where=where
+        )
+        return sorted(id for id, _ in result)
+
+    assert query_ids({"remote": True}) == ["backend", "data"]
+    assert query_ids(
+        {
+            "$and": [
+                {"role": "Software Engineer"},
+                {"required_experience": {"$lte": 3}},
+            ]
+        }
+    ) == ["backend"]
+
+    # Updated metadata is merged into the existing one.
+    any_vector_store.update_metadatas(["data"], [{"role": "Software Engineer"}])
+    assert query_ids({"role": "Software Engineer"}) == ["backend", "data", "frontend"]
+    any_vector_store.delete(["frontend"])
+    assert query_ids(None) == ["backend", "data"]
+    assert sorted(any_vector_store.get_metadatas(limit=10)) == [
+        (
+            "backend",
+            {"role": "Software Engineer", "required_experience": 2, "remote": True},
+        ),
+        (
+            "data",
+            {"role": "Software Engineer", "required_experience": 3, "remote": True},
+        ),
+    ]
+
+
+def test_numpy_vector_store_persists_and_indexes(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(4, 16))
+    vectors = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.1, size=(200, 16))
+    ids = [f"job {i}" for i in range(200)]
+
+    store = NumpyVectorStore(str(tmp_path), dtype="int8", index="ivf", nlist=4)
+    store.upsert(ids=ids[:100], embeddings=vectors[:100].tolist())
+    # Too few entries to train the index yet.
+    assert store._centroids is None
+    store.upsert(
+        ids=ids[100:],
+        embeddings=vectors[100:].tolist(),
+        metadatas=[{"index": i} for i in range(100, 200)],
+    )
+    assert store._centroids is not None
+
+    # Reopening the store maps the saved matrix and loads the saved index.
+    def train_centroids(*args, **kwargs):
+        raise AssertionError("The index was retrained")
+
+    monkeypatch.setattr(vector_store_module, "train_centroids", train_centroids)
+    reopened = NumpyVectorStore(str(tmp_path), dtype="int8", index="ivf", nlist=4)
+    assert reopened.count() == 200
+    assert np.array_equal(reopened._centroids, store._centroids)
+    assert np.array_equal(reopened._lists[:200], store._lists[:200])
+    [result] = reopened.query(query_embeddings=[vectors[150].tolist()], n_results=5)
+    assert result[0][0] == "job 150"
+    assert all(id in ids[150:200] for id, _ in result)
+    assert dict(reopened.get_metadatas(limit=1, offset=150)) == {
+        "job 150": {"index": 150}
+    }
+    with pytest.raises(ValueError):
+        NumpyVectorStore(str(tmp_path), dtype="float16")
+
+
+def test_numpy_vector_store_sees_writes_of_other_processes(tmp_path):
+    reader = NumpyVectorStore(str(tmp_path))
+    writer = NumpyVectorStore(str(tmp_path))
+    writer.upsert(ids=["job"], embeddings=[[1.0, 0.0]])
+    assert reader.query(query_embeddings=[[1.0, 0.0]])[0][0][0] == "job"
+    writer.delete(["job"])
+    assert reader.count() == 0
+
+
+def test_numpy_vector_store_logs_writes(tmp_path, monkeypatch):
+    """Writes are appended to a log, compacted once it outgrows the snapshot."""
+    monkeypatch.setattr(vector_store_module, "VECTOR_STORE_LOG_MIN_COMPACT_BYTES", 0)
+    writer = NumpyVectorStore(str(tmp_path))
+    writer.upsert(
+        ids=["a", "b"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        metadatas=[{"n": 1}, {"n": 2}],
+    )
+    reader = NumpyVectorStore(str(tmp_path))
+    state_mtime = (tmp_path / "state.json").stat().st_mtime_ns
+
+    writer.update_metadatas(["a"], [{"n": 3}])
+    writer.delete(["b"])
+    log_size = (tmp_path / "log-1.jsonl").stat().st_size
+    writer.update_metadatas(["a"], [{"n": 3}])  # Unchanged metadata is not logged
+    writer.delete(["b"])
+    assert (tmp_path / "log-1.jsonl").stat().st_size == log_size
+    assert (tmp_path / "state.json").stat().st_mtime_ns == state_mtime
+    assert reader.get_metadatas(limit=10) == [("a", {"n": 3})]
+
+    writer.upsert(ids=["b"], embeddings=[[0.0, 1.0]], metadatas=[{"n": 4}])
+    writer.update_metadatas(["a"], [{"text": "x" * 200}])
+    assert reader.query(query_embeddings=[[0.0, 1.0]], n_results=1) == [
+        [("b", pytest.approx(0, abs=1e-3))]
+    ]
+    writer.update_metadatas(["b"], [{"text": "y" * 200}])
+    assert (tmp_path / "log-2.jsonl").exists()
+    assert sorted(reader.get_metadatas(limit=10)) == [
+        ("a", {"n": 3, "text": "x" * 200}),
+        ("b", {"n": 4, "text": "y" * 200}),
+    ]
+    assert sorted(NumpyVectorStore(str(tmp_path)).get_metadatas(limit=10)) == sorted(
+        reader.get_metadatas(limit=10)
+    )